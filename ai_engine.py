@@ -0,0 +1,421 @@
+import threading
+import time
+
+# Official Google Library. google.generativeai and google.api_core (which
+# pull in grpc) are imported on first use (_genai, _google_errors) - they
+# take over a second and most reruns never call Gemini.
+import config
+import rate_governor
+import resilience
+
+# ===============================
+# MODEL DISCOVERY CACHE
+# ===============================
+# Process-wide: genai.configure() and list_models() cost a network round trip,
+# so the resolved models are reused by every session until the TTL runs out,
+# the API key changes or Google says a model no longer exists.
+PREFERRED_MODELS = [
+    'models/gemini-2.5-flash',
+    'models/gemini-2.0-flash',
+    'models/gemini-flash-latest',
+    'models/gemini-2.5-pro',
+    'models/gemini-pro-latest'
+]
+
+MODEL_CACHE_TTL = config.get_int("GEMINI_MODEL_CACHE_TTL", 3600)
+
+# Resilience: total calls per generation (across fallback models and backoff
+# rounds) and the per-call deadline handed to the Gemini client
+MAX_ATTEMPTS = config.get_int("GEMINI_MAX_ATTEMPTS", 6)
+CALL_TIMEOUT_SECONDS = config.get_float("GEMINI_CALL_TIMEOUT_SECONDS", 60.0)
+
+_model_lock = threading.Lock()
+
+_model_cache = {
+    "api_key": None,
+    "candidates": [],
+    "expires_at": 0.0,
+    "served": False
+}
+
+_stats_lock = threading.Lock()
+
+_timing_stats = {
+    "cold": {"calls": 0, "total_seconds": 0.0, "last_seconds": None},
+    "warm": {"calls": 0, "total_seconds": 0.0, "last_seconds": None}
+}
+
+
+def _genai():
+
+    import google.generativeai as genai
+
+    return genai
+
+
+def _google_errors():
+
+    from google.api_core import exceptions
+
+    return exceptions
+
+
+def _transient_errors():
+
+    # Errors that mean "this model is busy right now" - fall back / back off
+    errors = _google_errors()
+
+    return (errors.ResourceExhausted, errors.ServiceUnavailable, errors.DeadlineExceeded)
+
+
+def invalidate_model_cache():
+
+    with _model_lock:
+        _model_cache.update(
+            api_key=None,
+            candidates=[],
+            expires_at=0.0,
+            served=False
+        )
+
+
+def _resolve_model_names():
+
+    available_models = [
+        m.name
+        for m in _genai().list_models()
+        if 'generateContent' in m.supported_generation_methods
+    ]
+
+    return [
+        preferred.replace("models/", "")
+        for preferred in PREFERRED_MODELS
+        if preferred in available_models
+    ]
+
+
+def get_candidate_models(api_key):
+
+    # [(model_name, GenerativeModel), ...] in preference order
+    with _model_lock:
+
+        if (
+            _model_cache["candidates"]
+            and _model_cache["api_key"] == api_key
+            and time.monotonic() < _model_cache["expires_at"]
+        ):
+            return list(_model_cache["candidates"])
+
+        genai = _genai()
+        genai.configure(api_key=api_key)
+
+        candidates = [
+            (name, genai.GenerativeModel(name))
+            for name in _resolve_model_names()
+        ]
+
+        _model_cache.update(
+            api_key=api_key,
+            candidates=candidates,
+            expires_at=time.monotonic() + MODEL_CACHE_TTL,
+            served=False
+        )
+
+        return list(candidates)
+
+
+# ===============================
+# TIMINGS
+# ===============================
+def _record_timing(cold, seconds):
+
+    with _model_lock:
+        _model_cache["served"] = True
+
+    with _stats_lock:
+        bucket = _timing_stats["cold" if cold else "warm"]
+        bucket["calls"] += 1
+        bucket["total_seconds"] += seconds
+        bucket["last_seconds"] = seconds
+
+
+def get_timing_stats():
+
+    # Time to first token (= full response when not streaming), split by
+    # whether model discovery had to run first
+    with _stats_lock:
+        return {
+            kind: {
+                "calls": bucket["calls"],
+                "last_seconds": bucket["last_seconds"],
+                "avg_seconds": (
+                    bucket["total_seconds"] / bucket["calls"]
+                    if bucket["calls"] else None
+                )
+            }
+            for kind, bucket in _timing_stats.items()
+        }
+
+
+# ===============================
+# PROMPT
+# ===============================
+def build_itinerary_prompt(destination, start_date, structure="", pnr="", highlights=""):
+
+    return f"""
+    Act as a Senior Consultant for Pristine Vacations.
+
+    Create a luxury structured itinerary for:
+    {destination}
+
+    DETAILS:
+    - Start Date: {start_date}
+    - Structure: {structure}
+    - Flight PNR: {pnr}
+    - Highlights: {highlights}
+
+    STRICT FORMAT:
+    Day X: [Date] - [Highlight]
+    """
+
+
+# ===============================
+# RESILIENT CALLS
+# ===============================
+class GenerationError(Exception):
+    pass
+
+
+def _call_resilient(candidates, call, estimated_tokens, label=None):
+
+    # Walks the preferred models in order, skipping any whose circuit breaker
+    # is open. A throttled model hands over to the next one straight away;
+    # only when every model has failed in a round do we back off (with
+    # jitter, never sooner than the server's retry hint) and start again.
+    not_found = _google_errors().NotFound
+    transient_errors = _transient_errors()
+
+    attempts = 0
+    last_error = None
+
+    for backoff_round in range(MAX_ATTEMPTS):
+
+        retry_after = None
+        tried = False
+
+        for model_name, model in candidates:
+
+            if attempts >= MAX_ATTEMPTS:
+                break
+
+            breaker = resilience.get_breaker(model_name)
+
+            if not breaker.allow():
+                continue
+
+            tried = True
+            attempts += 1
+
+            # Every call - first try, fallback or retry - waits its turn in
+            # the process-wide governor so sessions share the quota fairly
+            try:
+                rate_governor.get_governor().acquire(estimated_tokens, label=label)
+
+            except rate_governor.RateLimitRejected as e:
+                breaker.release()
+                raise GenerationError(str(e))
+
+            try:
+                result = call(model)
+
+            except not_found as e:
+                # Retired or renamed - rediscover on the next generation
+                breaker.record_failure()
+                invalidate_model_cache()
+                last_error = e
+                continue
+
+            except transient_errors as e:
+                breaker.record_failure()
+                last_error = e
+                hint = resilience.retry_after_seconds(e)
+                retry_after = max(retry_after or 0, hint or 0) or None
+                continue
+
+            except BaseException:
+                # Not the model's fault (bad request, blocked content,
+                # interrupt) - but a half-open trial must not stay claimed
+                breaker.release()
+                raise
+
+            breaker.record_success()
+
+            return model_name, result
+
+        if attempts >= MAX_ATTEMPTS:
+            break
+
+        if not tried:
+            # Every breaker is open - wait for the first one to half-open
+            retry_after = min(
+                resilience.get_breaker(name).retry_in()
+                for name, _ in candidates
+            )
+
+            if retry_after > resilience.BACKOFF_MAX_SECONDS:
+                break
+
+        time.sleep(resilience.backoff_delay(backoff_round, retry_after=retry_after))
+
+    if isinstance(last_error, not_found):
+        raise GenerationError(f"Google Error: {str(last_error)}")
+
+    raise GenerationError("Google servers are busy. Please try again later.")
+
+
+# ===============================
+# GENERATION
+# ===============================
+def generate_itinerary_detailed(prompt_text, api_key, label=None):
+
+    # Returns (text, status_msg, model_name) - model_name is the model that
+    # actually answered, which may be a fallback. label identifies the caller
+    # in the rate governor's queue (e.g. "job-12").
+    started = time.perf_counter()
+
+    try:
+        candidates = get_candidate_models(api_key)
+
+    except Exception as e:
+        return None, f"Google connection failed: {str(e)}", None
+
+    if not candidates:
+        return None, "No compatible Gemini model found.", None
+
+    with _model_lock:
+        cold = not _model_cache["served"]
+
+    try:
+        model_name, response = _call_resilient(
+            candidates,
+            lambda model: model.generate_content(
+                prompt_text,
+                request_options={"timeout": CALL_TIMEOUT_SECONDS}
+            ),
+            rate_governor.estimate_tokens(prompt_text),
+            label=label
+        )
+
+        result_text = response.text
+
+    except GenerationError as e:
+        return None, str(e), None
+
+    except Exception as e:
+        return None, f"Google Error: {str(e)}", None
+
+    elapsed = time.perf_counter() - started
+    _record_timing(cold, elapsed)
+
+    return (
+        result_text,
+        f"Success using {model_name} "
+        f"({elapsed:.1f}s, {'cold' if cold else 'warm'} start)",
+        model_name
+    )
+
+
+def generate_itinerary(prompt_text, api_key, label=None):
+
+    result_text, status_msg, _ = generate_itinerary_detailed(
+        prompt_text,
+        api_key,
+        label=label
+    )
+
+    return result_text, status_msg
+
+
+def _first_text_chunk(response):
+
+    for chunk in response:
+
+        try:
+            return chunk.text
+
+        except ValueError:
+            # Chunk without text parts (e.g. safety metadata only)
+            continue
+
+    return ""
+
+
+def stream_itinerary(prompt_text, api_key, info=None, label=None):
+
+    # Yields text chunks as Gemini produces them. Fallback and backoff apply
+    # until the first chunk arrives; after that a failure raises
+    # GenerationError, so the caller never receives a spliced draft.
+    # info (optional dict) receives the answering "model_name".
+    started = time.perf_counter()
+
+    try:
+        candidates = get_candidate_models(api_key)
+
+    except Exception as e:
+        raise GenerationError(f"Google connection failed: {str(e)}")
+
+    if not candidates:
+        raise GenerationError("No compatible Gemini model found.")
+
+    with _model_lock:
+        cold = not _model_cache["served"]
+
+    def open_stream(model):
+
+        response = iter(model.generate_content(
+            prompt_text,
+            stream=True,
+            request_options={"timeout": CALL_TIMEOUT_SECONDS}
+        ))
+
+        return response, _first_text_chunk(response)
+
+    try:
+        model_name, (response, first_text) = _call_resilient(
+            candidates,
+            open_stream,
+            rate_governor.estimate_tokens(prompt_text),
+            label=label
+        )
+
+    except GenerationError:
+        raise
+
+    except Exception as e:
+        raise GenerationError(f"Google Error: {str(e)}")
+
+    if info is not None:
+        info["model_name"] = model_name
+
+    _record_timing(cold, time.perf_counter() - started)
+
+    if first_text:
+        yield first_text
+
+    try:
+        for chunk in response:
+
+            try:
+                text = chunk.text
+
+            except ValueError:
+                continue
+
+            yield text
+
+    except _transient_errors() as e:
+        resilience.get_breaker(model_name).record_failure()
+        raise GenerationError(f"Generation interrupted: {str(e)}")
+
+    except Exception as e:
+        raise GenerationError(f"Generation interrupted: {str(e)}")
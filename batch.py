@@ -0,0 +1,239 @@
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from sqlalchemy import select
+
+import ai_engine
+import config
+import prompt_cache
+from database import init_db, session_scope
+from models import GenerationJob, Query
+
+# ===============================
+# SETTINGS
+# ===============================
+BATCH_WORKERS = config.get_int("BATCH_WORKERS", 4)
+
+
+# ===============================
+# SELECTION & PROMPTS
+# ===============================
+def select_queries(session, status="Pending", limit=None, query_ids=None):
+
+    stmt = select(Query.id).order_by(Query.id)
+
+    if query_ids:
+        stmt = stmt.where(Query.id.in_(query_ids))
+
+    elif status:
+        stmt = stmt.where(Query.status == status)
+
+    if limit:
+        stmt = stmt.limit(limit)
+
+    return session.execute(stmt).scalars().all()
+
+
+def prompt_for_query(query):
+
+    # Batch drafts only have what the enquiry stored: destination, travel
+    # date and the consultant's notes stand in for the builder's form fields
+    return ai_engine.build_itinerary_prompt(
+        query.destination,
+        query.travel_date or "",
+        highlights=query.notes or ""
+    )
+
+
+# ===============================
+# RUNNER
+# ===============================
+def _generate_one(query_id, api_key, force_refresh):
+
+    started = time.perf_counter()
+
+    try:
+        with session_scope() as session:
+
+            query = session.get(Query, query_id)
+
+            if query is None:
+                result_text, status_msg = None, "Query not found."
+
+            else:
+                result_text, status_msg = prompt_cache.generate_with_cache(
+                    session,
+                    prompt_for_query(query),
+                    api_key,
+                    force_refresh=force_refresh,
+                    label=f"batch-query-{query_id}"
+                )
+
+                if result_text:
+                    query.saved_itinerary = result_text
+                    query.status = "Draft Generated"
+
+    except Exception as e:
+        result_text, status_msg = None, f"Batch Error: {str(e)}"
+
+    return {
+        "query_id": query_id,
+        "ok": bool(result_text),
+        "latency_seconds": time.perf_counter() - started,
+        "message": status_msg
+    }
+
+
+def _percentile(values, pct):
+
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+
+    return ordered[index]
+
+
+def build_report(results, elapsed_seconds):
+
+    latencies = [r["latency_seconds"] for r in results if r["latency_seconds"] is not None]
+    succeeded = sum(1 for r in results if r["ok"])
+
+    return {
+        "results": sorted(results, key=lambda r: r["query_id"]),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "elapsed_seconds": elapsed_seconds,
+        "per_minute": (
+            len(results) / elapsed_seconds * 60
+            if elapsed_seconds else None
+        ),
+        "p50_latency_seconds": _percentile(latencies, 50),
+        "p95_latency_seconds": _percentile(latencies, 95)
+    }
+
+
+def run_batch(query_ids, api_key, max_workers=BATCH_WORKERS, force_refresh=False, progress=None):
+
+    # Synchronous: used by the command line. The UI queues the same work
+    # through jobs.submit_generation_job so the page never blocks.
+    started = time.perf_counter()
+    results = []
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as pool:
+
+        futures = [
+            pool.submit(_generate_one, query_id, api_key, force_refresh)
+            for query_id in query_ids
+        ]
+
+        for future in as_completed(futures):
+
+            results.append(future.result())
+
+            if progress:
+                progress(len(results), len(futures), results[-1])
+
+    return build_report(results, time.perf_counter() - started)
+
+
+def summarize_jobs(session, job_ids):
+
+    # Same report shape as run_batch, built from background job rows
+    job_rows = session.execute(
+        select(GenerationJob).where(GenerationJob.id.in_(job_ids))
+    ).scalars().all()
+
+    results = []
+    first_start = last_finish = None
+
+    for job in job_rows:
+
+        latency = None
+
+        if job.started_at and job.finished_at:
+            latency = (job.finished_at - job.started_at).total_seconds()
+            first_start = min(first_start or job.started_at, job.started_at)
+            last_finish = max(last_finish or job.finished_at, job.finished_at)
+
+        results.append({
+            "query_id": job.query_id,
+            "status": job.status,
+            "ok": job.status == "done",
+            "latency_seconds": latency,
+            "message": job.message
+        })
+
+    elapsed = (
+        (last_finish - first_start).total_seconds()
+        if first_start and last_finish else 0.0
+    )
+
+    report = build_report(results, elapsed)
+    report["finished"] = all(r["status"] in ("done", "failed") for r in results)
+
+    return report
+
+
+# ===============================
+# COMMAND LINE
+# ===============================
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(
+        description="Generate draft itineraries for many queries at once."
+    )
+    parser.add_argument("--status", default="Pending", help="Query status to pick (default: Pending)")
+    parser.add_argument("--ids", type=int, nargs="*", help="Explicit query IDs instead of --status")
+    parser.add_argument("--limit", type=int, help="Maximum number of queries")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Concurrent Gemini calls")
+    parser.add_argument("--force", action="store_true", help="Bypass the prompt cache")
+
+    args = parser.parse_args(argv)
+
+    api_key = (config.get_setting("GOOGLE_API_KEY") or "").strip()
+
+    if not api_key:
+        print("GOOGLE_API_KEY is not set (environment or .streamlit/secrets.toml).", file=sys.stderr)
+        return 2
+
+    init_db()
+
+    with session_scope() as session:
+        query_ids = select_queries(session, status=args.status, limit=args.limit, query_ids=args.ids)
+
+    if not query_ids:
+        print("No matching queries.")
+        return 0
+
+    def progress(done, total, result):
+        state = "ok" if result["ok"] else "FAILED"
+        print(
+            f"[{done}/{total}] query {result['query_id']}: {state} "
+            f"in {result['latency_seconds']:.1f}s - {result['message']}"
+        )
+
+    report = run_batch(
+        query_ids,
+        api_key,
+        max_workers=args.workers,
+        force_refresh=args.force,
+        progress=progress
+    )
+
+    print(
+        f"\n{report['succeeded']}/{report['total']} drafts generated, "
+        f"{report['failed']} failed in {report['elapsed_seconds']:.1f}s "
+        f"({report['per_minute']:.1f}/min, p50 {report['p50_latency_seconds']:.1f}s, "
+        f"p95 {report['p95_latency_seconds']:.1f}s)"
+    )
+
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Per-document cost with the logo decoded every time vs once per process.
+
+    python benchmarks/bench_branding.py [count]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import branding
+from pdf_maker import create_itinerary_pdf
+from voucher_maker import create_voucher_pdf
+
+from bench_voucher_output import SAMPLE
+
+# Eleven days of text: a four page quote
+ITINERARY = "\n".join(
+    f"Day {day}: {day + 10} Dec - Desert safari and dhow cruise\n"
+    + "Morning at leisure, afternoon pick-up from the hotel lobby. " * 12
+    for day in range(1, 12)
+)
+
+
+def render_quote():
+
+    return create_itinerary_pdf(
+        "Mr Rahul Sharma",
+        "Dubai",
+        ITINERARY,
+        "Atlantis The Palm\nOcean King Room",
+        "Rs. 2,45,000 per couple"
+    )
+
+
+def render_voucher():
+
+    return create_voucher_pdf(**SAMPLE)
+
+
+def timed(render, count, decode_every_time):
+
+    started = time.perf_counter()
+
+    for _ in range(count):
+
+        if decode_every_time:
+            branding.reset_logo_cache()
+
+        render()
+
+    return (time.perf_counter() - started) / count
+
+
+def run(count):
+
+    render_quote()
+    render_voucher() # warm-up: imports, fonts
+
+    for label, render in (("quote (4 pages)", render_quote), ("voucher", render_voucher)):
+
+        uncached = timed(render, count, True)
+        cached = timed(render, count, False)
+
+        print(
+            f"{label:16} decode per doc {uncached * 1000:7.2f} ms | "
+            f"cached {cached * 1000:7.2f} ms | x{uncached / cached:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -0,0 +1,65 @@
+"""Streaming export: time and peak Python memory for CSV and Parquet.
+
+    python benchmarks/bench_export.py [queries]     # default 200000
+
+Peak memory should stay flat as the row count grows.
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session
+
+import exporter
+from bench_search import seed
+from database import create_db_engine
+from migrations import run_migrations
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        run_migrations(engine)
+
+        with Session(engine) as session:
+
+            seed(session, count)
+
+            for fmt in exporter.EXPORT_FORMATS:
+
+                path = os.path.join(tmp, f"queries.{fmt}")
+
+                # Timed without tracemalloc, which slows allocation down
+                try:
+                    started = time.perf_counter()
+                    report = exporter.export_rows(session, "queries", path, fmt=fmt)
+                    elapsed = time.perf_counter() - started
+
+                except exporter.ExportError as e:
+                    print(f"{fmt}: skipped ({str(e)})")
+                    continue
+
+                tracemalloc.start()
+                exporter.export_rows(session, "queries", path, fmt=fmt)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+                print(
+                    f"{fmt:>8}: {report['rows']:,} rows in {elapsed:.1f}s "
+                    f"({report['rows'] / elapsed:,.0f} rows/s), peak {peak / 1e6:.1f} MB, "
+                    f"file {os.path.getsize(path) / 1e6:.1f} MB"
+                )
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Bulk lead import throughput on a synthetic export with duplicates.
+
+    python benchmarks/bench_import.py [rows]     # default 100000
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+import importer
+from database import create_db_engine
+from migrations import run_migrations
+from models import Lead, Query
+
+PLACES = ["Dubai", "Bali", "Maldives", "Singapore", "Thailand", "Switzerland", "Paris", "Kashmir"]
+
+
+def write_export(path, rows):
+
+    # ~1 in 5 rows is a returning client, with the phone typed differently
+    rng = random.Random(11)
+    clients = []
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+
+        writer = csv.writer(f)
+        writer.writerow(["Full Name", "Mobile Number", "Email Address", "Destination", "Date of Travel", "Pax", "Message"])
+
+        for i in range(rows):
+
+            if clients and rng.random() < 0.2:
+                name, number, email = rng.choice(clients)
+                phone = rng.choice([f"+91 {number[:5]} {number[5:]}", f"0{number}", number])
+
+            else:
+                name = f"Client {i}"
+                number = f"9{rng.randrange(10**9):09d}"
+                email = f"client{i}@example.com"
+                phone = f"+91-{number}"
+                clients.append((name, number, email))
+
+            writer.writerow([
+                name,
+                phone,
+                email,
+                rng.choice(PLACES),
+                f"{rng.randint(1, 28):02d}/12/2026",
+                rng.randint(1, 6),
+                "Looking for a family package"
+            ])
+
+
+def main():
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        export_path = os.path.join(tmp, "export.csv")
+        write_export(export_path, rows)
+
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        run_migrations(engine)
+
+        with Session(engine) as session:
+
+            report = importer.import_leads(session, export_path, "export.csv", default_source="Website")
+
+            leads = session.scalar(select(func.count(Lead.id)))
+            queries = session.scalar(select(func.count(Query.id)))
+
+        engine.dispose()
+
+    print(
+        f"Imported {report['rows']} rows in {report['elapsed_seconds']:.1f}s "
+        f"({report['rows_per_second']:,.0f} rows/s)\n"
+        f"  leads created {report['leads_created']}, rows for existing clients {report['leads_reused']}, "
+        f"queries {report['queries_created']}, errors {len(report['errors'])}\n"
+        f"  database now has {leads} leads / {queries} queries"
+    )
+
+
+if __name__ == "__main__":
+    main()
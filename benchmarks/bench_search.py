@@ -0,0 +1,104 @@
+"""Search latency with the FTS5 index vs LIKE scans, on a synthetic CRM.
+
+    python benchmarks/bench_search.py [queries]     # default 200000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.orm import Session
+
+import search
+from database import create_db_engine, bulk_insert
+from migrations import run_migrations
+from models import Lead, Query
+
+FIRST = ["Rahul", "Priya", "Amit", "Neha", "Vikram", "Simran", "Arjun", "Kavya", "Rohan", "Anjali"]
+LAST = ["Sharma", "Verma", "Kapoor", "Gill", "Sandhu", "Mehta", "Bansal", "Arora", "Malhotra", "Sethi"]
+PLACES = ["Dubai", "Bali", "Maldives", "Singapore", "Thailand", "Switzerland", "Paris", "Kashmir", "Goa", "Vietnam"]
+WORDS = "desert safari dhow cruise transfer breakfast sightseeing temple beach villa leisure".split()
+
+SEARCHES = ["sharma", "rahul dub", "98150", "atlantis", "honeymoon mald", "kapoor sing temple", "zzz"]
+
+
+def seed(session, count):
+
+    rng = random.Random(7)
+
+    leads = [
+        dict(
+            name=f"{rng.choice(FIRST)} {rng.choice(LAST)} {i}",
+            phone=f"+91 98{rng.randrange(10**8):08d}",
+            email=f"client{i}@example.com"
+        )
+        for i in range(count // 2)
+    ]
+
+    lead_ids = bulk_insert(session, Lead, leads, returning=Lead.id)
+
+    queries = [
+        dict(
+            lead_id=rng.choice(lead_ids),
+            destination=rng.choice(PLACES),
+            notes=rng.choice(["honeymoon", "family trip", "corporate offsite", ""]),
+            saved_itinerary=" ".join(rng.choice(WORDS) for _ in range(60)),
+            saved_hotels=rng.choice(["Atlantis The Palm", "Marina Bay Sands", "Taj Exotica", ""]),
+            status="Pending"
+        )
+        for _ in range(count)
+    ]
+
+    for start in range(0, len(queries), 20000):
+        bulk_insert(session, Query, queries[start:start + 20000])
+
+    session.commit()
+
+
+def timed(session, text, fts):
+
+    search._fts_available.clear()
+
+    if not fts:
+        search._fts_available[str(session.get_bind().url)] = False
+
+    started = time.perf_counter()
+    results = search.search(session, text)
+
+    return (time.perf_counter() - started) * 1000, len(results)
+
+
+def main():
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+
+    with tempfile.TemporaryDirectory() as tmp:
+
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        run_migrations(engine)
+
+        with Session(engine) as session:
+
+            started = time.perf_counter()
+            seed(session, count)
+
+            print(f"Seeded {count // 2} leads / {count} queries (indexed by triggers) "
+                  f"in {time.perf_counter() - started:.1f}s\n")
+
+            print(f"{'search':24} {'FTS5 ms':>9} {'LIKE ms':>9} {'results':>8}")
+
+            for text in SEARCHES:
+
+                fts_ms, found = timed(session, text, fts=True)
+                like_ms, _ = timed(session, text, fts=False)
+
+                print(f"{text:24} {fts_ms:9.1f} {like_ms:9.1f} {found:8}")
+
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Old per-engine clean() chains vs text_clean.clean() (shared replacement
+table applied as a str.replace chain, plus the pdf-latin1 codec error handler).
+
+    python benchmarks/bench_text_clean.py [days]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import text_clean
+
+
+def old_quote_clean(text):
+
+    return text.replace('₹', 'Rs.').replace('’', "'").replace('–', "-").encode('latin-1', 'replace').decode('latin-1')
+
+
+def old_voucher_clean(text):
+
+    return (
+        str(text)
+        .replace("•", "-")
+        .replace("‘", "'")
+        .replace("’", "'")
+        .replace("“", '"')
+        .replace("”", '"')
+        .replace("–", "-")
+        .replace("—", "-")
+        .encode("latin-1", "ignore")
+        .decode("latin-1")
+    )
+
+
+def itinerary(days):
+
+    # Gemini-style draft: mostly ASCII, with curly quotes, dashes, bullets
+    # and prices sprinkled in
+    day = (
+        "**Day {n}: 12 Dec – Arrival in Dubai**\n"
+        "• Meet & greet at DXB; transfer to your hotel – check-in from 15:00.\n"
+        "• Evening: Dhow cruise at the Marina with buffet dinner (“Premium” deck).\n"
+        "• Optional: Burj Khalifa ‘At the Top’ – ₹ 4,500 per person.\n"
+        "Overnight stay at the hotel. Today's pace is relaxed so you can rest after the flight.\n"
+    )
+
+    return "".join(day.format(n=n) for n in range(1, days + 1))
+
+
+def timed(clean, lines, rounds=5):
+
+    best = None
+
+    for _ in range(rounds):
+
+        started = time.perf_counter()
+
+        for line in lines:
+            clean(line)
+
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def run(days):
+
+    text = itinerary(days)
+    lines = text.split("\n")
+
+    print(f"{days} days, {len(lines)} lines, {len(text) / 1024:.0f} KiB")
+
+    for label, clean in (
+        ("old quote clean", old_quote_clean),
+        ("old voucher clean", old_voucher_clean),
+        ("text_clean.clean", text_clean.clean)
+    ):
+        per_line = timed(clean, lines)
+        whole = timed(clean, [text])
+
+        print(f"{label:18} per line {per_line * 1000:7.2f} ms | whole text {whole * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
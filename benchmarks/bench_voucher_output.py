@@ -0,0 +1,71 @@
+"""Per-voucher cost of the old temp-file output path vs the in-memory one.
+
+    python benchmarks/bench_voucher_output.py [count]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import voucher_maker
+
+SAMPLE = dict(
+    client_name="Mr Rahul Sharma, Mrs Priya Sharma",
+    conf_no="HX-2291-8812",
+    hotel_details="Atlantis The Palm\nCrescent Road, The Palm, Dubai",
+    check_in="12 Dec 2025",
+    check_out="16 Dec 2025",
+    nights=4,
+    room_type="Ocean King Room",
+    inclusions="Breakfast & Dinner\nAirport transfers",
+    notes="Late arrival ~ 23:30 hrs, honeymoon couple",
+    occupancy_details="2 Adults"
+)
+
+
+def temp_file_render(pdf, out=None):
+
+    # The pre-change implementation, for comparison
+    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
+
+    pdf.output(temp_file.name)
+
+    with open(temp_file.name, "rb") as f:
+        pdf_bytes = f.read()
+
+    os.remove(temp_file.name)
+
+    return pdf_bytes
+
+
+def run(count):
+
+    voucher_maker.create_voucher_pdf(**SAMPLE) # warm-up: imports, fonts
+
+    started = time.perf_counter()
+    for _ in range(count):
+        voucher_maker.create_voucher_pdf(**SAMPLE)
+    in_memory = (time.perf_counter() - started) / count
+
+    original = voucher_maker.render_pdf
+    voucher_maker.render_pdf = temp_file_render
+
+    try:
+        started = time.perf_counter()
+        for _ in range(count):
+            voucher_maker.create_voucher_pdf(**SAMPLE)
+        temp_file = (time.perf_counter() - started) / count
+
+    finally:
+        voucher_maker.render_pdf = original
+
+    print(f"vouchers:        {count}")
+    print(f"temp file path:  {temp_file * 1000:.2f} ms/voucher")
+    print(f"in-memory path:  {in_memory * 1000:.2f} ms/voucher")
+    print(f"saving:          {(temp_file - in_memory) * 1000:.2f} ms/voucher")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,118 @@
+import copy
+import os
+import threading
+
+import config
+
+# ===============================
+# STATIC BLOCKS
+# ===============================
+# Shared by every quote and voucher; kept here so both engines (and every
+# page of a document) draw the same text without rebuilding it.
+COMPANY_NAME = "PRISTINE VACATIONS"
+TAGLINE = "Making Holidays Memorable"
+WEBSITE = "www.pristinevacations.com"
+
+QUOTE_FOOTER_LINES = [
+    "College Road, Ludhiana 141001, Phone: 0161-4623384",
+    "Email - info@pristine.in"
+]
+
+QUOTE_TERMS = """1. All rates are subject to TCS and GST as per government regulations.
+2. Rates are subject to change as per availability.
+3. No booking is confirmed until the advance payment is received.
+4. Passports must be valid for at least 6 months from the date of return.
+5. Final payment is subject to ROE (Rate of Exchange) fluctuations.
+6. Standard Hotel Check-in: 14:00 | Check-out: 11:00.
+7. Visa issuance is at the sole discretion of the Embassy."""
+
+VOUCHER_ADDRESS = (
+    "College Road, Ludhiana, India 141001\n"
+    "+91 161 4613384\n"
+    f"info@pristine.in | {WEBSITE}"
+)
+
+VOUCHER_INFO = (
+    "- Please present this voucher and a valid Passport/ID upon arrival.\n"
+    "- Standard check-in time is 14:00/15:00 hrs and check-out is 12:00 hrs.\n"
+    "- Incidental charges/City Tax/Resort Fee to be settled directly with the hotel."
+)
+
+VOUCHER_FOOTER = f"{COMPANY_NAME} | {WEBSITE}"
+
+
+# ===============================
+# LOGO
+# ===============================
+# Decoding the 1280px logo (PNG inflate + re-compress) is the single most
+# expensive step of a render. It is done once per process; each document
+# then gets a shallow copy of the decoded image registered in its own
+# image cache, so fpdf never touches the file again.
+LOGO_PATH = config.get_setting(
+    "BRANDING_LOGO_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
+)
+
+LOGO_KEY = "branding-logo"
+
+_logo_lock = threading.Lock()
+
+_logo = {
+    "loaded": False,
+    "info": None
+}
+
+
+def get_logo_info():
+
+    # None when the logo is missing or unreadable - documents render without it
+    with _logo_lock:
+
+        if not _logo["loaded"]:
+
+            from fpdf.image_parsing import get_img_info, load_image
+
+            try:
+                _logo["info"] = get_img_info(LOGO_PATH, load_image(LOGO_PATH))
+
+            except Exception:
+                _logo["info"] = None
+
+            _logo["loaded"] = True
+
+        return _logo["info"]
+
+
+def reset_logo_cache():
+
+    with _logo_lock:
+        _logo.update(loaded=False, info=None)
+
+
+def place_logo(pdf, x, y, w=0, h=0):
+
+    info = get_logo_info()
+
+    if info is None:
+        return False
+
+    images = pdf.image_cache.images
+
+    if LOGO_KEY not in images:
+
+        # Same bookkeeping fpdf's preload_image does for a fresh image
+        logo = copy.copy(info)
+        logo["i"] = len(images) + 1
+        logo["usages"] = 0
+        logo["iccp_i"] = None
+
+        if logo.get("iccp"):
+            profiles = pdf.image_cache.icc_profiles
+            logo["iccp_i"] = profiles.setdefault(logo["iccp"], len(profiles))
+            logo["iccp"] = None
+
+        images[LOGO_KEY] = logo
+
+    pdf.image(LOGO_KEY, x=x, y=y, w=w, h=h)
+
+    return True
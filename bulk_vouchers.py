@@ -0,0 +1,261 @@
+import csv
+import datetime
+import io
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import config
+import pdf_cache
+
+# ===============================
+# SETTINGS
+# ===============================
+# Rendering is CPU-bound (fpdf2 is pure Python), so it fans out over
+# processes rather than threads. Tiny sheets are rendered inline - starting
+# the pool costs more than it saves.
+VOUCHER_WORKERS = config.get_int("VOUCHER_WORKERS", os.cpu_count() or 1)
+VOUCHER_POOL_MIN_ROWS = config.get_int("VOUCHER_POOL_MIN_ROWS", 8)
+
+VOUCHER_COLUMNS = [
+    "client_name",
+    "conf_no",
+    "hotel_details",
+    "check_in",
+    "check_out",
+    "nights",
+    "room_type",
+    "inclusions",
+    "notes",
+    "occupancy_details"
+]
+
+# Same mandatory fields as the single-voucher form
+REQUIRED_COLUMNS = ["client_name", "conf_no", "hotel_details"]
+
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y"
+]
+
+
+class VoucherSheetError(Exception):
+    pass
+
+
+# ===============================
+# READING THE SHEET
+# ===============================
+def _column_name(header):
+
+    return re.sub(r"[^a-z0-9]+", "_", str(header).strip().lower()).strip("_")
+
+
+def read_voucher_rows(source, filename):
+
+    # source: path or binary file-like (e.g. a Streamlit upload).
+    # Returns a list of {column: str} dicts, one per voucher.
+    import pandas as pd
+
+    extension = os.path.splitext(filename)[1].lower()
+
+    # Legacy .xls needs xlrd, which we do not ship
+    if extension == ".xls":
+        raise VoucherSheetError("Old .xls workbooks are not supported. Save the sheet as .xlsx or CSV.")
+
+    try:
+        if extension == ".xlsx":
+            frame = pd.read_excel(source, dtype=str)
+
+        else:
+            frame = pd.read_csv(source, dtype=str, keep_default_na=False)
+
+    except ImportError as e:
+        # read_excel needs openpyxl, which is optional
+        raise VoucherSheetError(f"Excel support is not installed ({str(e)}). Upload a CSV instead.")
+
+    except Exception as e:
+        raise VoucherSheetError(f"Could not read {filename}: {str(e)}")
+
+    frame = frame.fillna("")
+    frame.columns = [_column_name(c) for c in frame.columns]
+
+    missing = [c for c in REQUIRED_COLUMNS if c not in frame.columns]
+
+    if missing:
+        raise VoucherSheetError(f"Missing column(s): {', '.join(missing)}")
+
+    keep = [c for c in VOUCHER_COLUMNS if c in frame.columns]
+
+    return frame[keep].to_dict("records")
+
+
+def template_csv():
+
+    return ",".join(VOUCHER_COLUMNS) + "\n"
+
+
+# ===============================
+# RENDERING
+# ===============================
+def _parse_date(value):
+
+    value = str(value or "").strip()
+
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).date()
+
+        except ValueError:
+            continue
+
+    raise ValueError(f"unrecognised date '{value}'")
+
+
+def _safe_part(text):
+
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_")[:40] or "voucher"
+
+
+def voucher_filename(row_number, row):
+
+    # Row number keeps names unique when a confirmation number repeats
+    first_name = str(row.get("client_name", "")).split(",")[0]
+
+    return (
+        f"{row_number:03d}_Hotel_Voucher_"
+        f"{_safe_part(row.get('conf_no'))}_{_safe_part(first_name)}.pdf"
+    )
+
+
+def render_voucher_row(row_number, row):
+
+    # Runs in a worker process: returns (row_number, filename, pdf_bytes, error)
+    try:
+        for column in REQUIRED_COLUMNS:
+            if not str(row.get(column, "")).strip():
+                raise ValueError(f"{column} is empty")
+
+        check_in = _parse_date(row.get("check_in"))
+        check_out = _parse_date(row.get("check_out"))
+
+        nights = str(row.get("nights", "")).strip()
+        nights = int(float(nights)) if nights else max((check_out - check_in).days, 0)
+
+        pdf_bytes, _ = pdf_cache.voucher_pdf(
+            client_name=row.get("client_name", ""),
+            conf_no=row.get("conf_no", ""),
+            hotel_details=row.get("hotel_details", ""),
+            check_in=check_in.strftime("%d %b %Y"),
+            check_out=check_out.strftime("%d %b %Y"),
+            nights=nights,
+            room_type=row.get("room_type", ""),
+            inclusions=row.get("inclusions", ""),
+            notes=row.get("notes", ""),
+            occupancy_details=row.get("occupancy_details", "")
+        )
+
+        return row_number, voucher_filename(row_number, row), pdf_bytes, None
+
+    except Exception as e:
+        return row_number, None, None, str(e)
+
+
+def _render_all(rows, max_workers, first_row):
+
+    # Yields render_voucher_row results in completion order
+    numbered = list(enumerate(rows, start=first_row))
+
+    if max_workers <= 1 or len(numbered) < VOUCHER_POOL_MIN_ROWS:
+        for row_number, row in numbered:
+            yield render_voucher_row(row_number, row)
+
+        return
+
+    # spawn, not fork: the Streamlit server is multithreaded, and a forked
+    # child can inherit a lock some other thread was holding
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(numbered)),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+
+        futures = {
+            pool.submit(render_voucher_row, row_number, row): row_number
+            for row_number, row in numbered
+        }
+
+        for future in as_completed(futures):
+
+            # A worker that dies (killed, out of memory) breaks the pool and
+            # fails every row not yet finished; the rendered ones still ship
+            try:
+                result = future.result()
+
+            except BrokenProcessPool as e:
+                result = futures[future], None, None, f"Render worker crashed: {str(e)}"
+
+            yield result
+
+
+def build_voucher_zip(rows, out=None, max_workers=VOUCHER_WORKERS, progress=None, first_row=2):
+
+    # Streams each PDF into the archive as soon as its worker finishes, so
+    # at most one voucher per worker is held in memory. Rows that fail are
+    # listed in errors.csv inside the archive instead of stopping the batch.
+    # out: binary writable (file, BytesIO); when None the ZIP bytes are
+    # returned in the report under "zip_bytes". first_row numbers the rows
+    # in file names and errors (2 = spreadsheet row after the header).
+    started = time.perf_counter()
+    target = io.BytesIO() if out is None else out
+
+    errors = []
+    rendered = 0
+
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+
+        for done, (row_number, filename, pdf_bytes, error) in enumerate(
+            _render_all(rows, max_workers, first_row),
+            start=1
+        ):
+
+            if error:
+                errors.append({"row": row_number, "error": error})
+
+            else:
+                archive.writestr(filename, pdf_bytes)
+                rendered += 1
+
+            if progress:
+                progress(done, len(rows))
+
+        if errors:
+
+            errors.sort(key=lambda e: e["row"])
+
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=["row", "error"])
+            writer.writeheader()
+            writer.writerows(errors)
+
+            archive.writestr("errors.csv", buffer.getvalue())
+
+    report = {
+        "total": len(rows),
+        "rendered": rendered,
+        "errors": errors,
+        "elapsed_seconds": time.perf_counter() - started
+    }
+
+    if out is None:
+        report["zip_bytes"] = target.getvalue()
+
+    return report
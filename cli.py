@@ -0,0 +1,400 @@
+import argparse
+import json
+import os
+import sys
+
+# Headless entry point for scripts, cron jobs and workers:
+#
+#   python cli.py render-quote --query-id 42 -o quote.pdf
+#   python cli.py render-voucher --json voucher.json
+#   python cli.py render-voucher --sheet group.csv -o vouchers.zip
+#   python cli.py batch --limit 20
+#   python cli.py export queries --status Pending -o pending.csv
+#   python cli.py export itineraries --from 2025-01-01 -o itineraries.parquet
+#   python cli.py search sharma dubai
+#   python cli.py import instagram_leads.csv --source Instagram
+#   python cli.py dedup --dry-run
+#
+# Nothing here imports Streamlit, and each command imports only the engines
+# it needs, so a render does not pay for the Gemini client and vice versa.
+
+
+# ===============================
+# HELPERS
+# ===============================
+def _read_json(path):
+
+    if path == "-":
+        return json.load(sys.stdin)
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _fail(message):
+
+    print(message, file=sys.stderr)
+    return 1
+
+
+def _safe_name(text):
+
+    return str(text or "client").split(",")[0].strip().replace(" ", "_")
+
+
+# ===============================
+# RENDER QUOTE
+# ===============================
+def render_quote(args):
+
+    import pdf_cache
+    import pdf_maker
+
+    if args.query_id:
+
+        from database import init_db, session_scope
+        from models import Query
+
+        init_db()
+
+        with session_scope() as session:
+
+            query = session.get(Query, args.query_id)
+
+            if query is None:
+                return _fail(f"Query {args.query_id} not found.")
+
+            if not query.saved_itinerary:
+                return _fail(f"Query {args.query_id} has no saved itinerary yet.")
+
+            inputs = dict(
+                client_name=query.lead.name if query.lead else "",
+                destination=query.destination or "",
+                itinerary_text=query.saved_itinerary,
+                hotel_details=query.saved_hotels or "",
+                price_text=query.saved_price or ""
+            )
+
+    else:
+        data = _read_json(args.json)
+
+        inputs = dict(
+            client_name=data.get("client_name", ""),
+            destination=data.get("destination", ""),
+            itinerary_text=data.get("itinerary_text", ""),
+            hotel_details=data.get("hotel_details", ""),
+            price_text=data.get("price_text", "")
+        )
+
+    if args.no_cache:
+        pdf_bytes = pdf_maker.create_itinerary_pdf(**inputs)
+
+    else:
+        pdf_bytes, _ = pdf_cache.itinerary_pdf(**inputs)
+
+    output = args.output or f"Quote_{_safe_name(inputs['client_name'])}.pdf"
+
+    with open(output, "wb") as f:
+        f.write(pdf_bytes)
+
+    print(f"Wrote {output} ({len(pdf_bytes) / 1024:.0f} KiB)")
+
+    return 0
+
+
+# ===============================
+# RENDER VOUCHERS
+# ===============================
+def render_voucher(args):
+
+    import bulk_vouchers
+
+    if args.sheet:
+        try:
+            rows = bulk_vouchers.read_voucher_rows(args.sheet, args.sheet)
+
+        except bulk_vouchers.VoucherSheetError as e:
+            return _fail(str(e))
+
+        first_row = 2 # row 1 is the header
+
+    else:
+        data = _read_json(args.json)
+        rows = data if isinstance(data, list) else [data]
+        first_row = 1
+
+    # One voucher -> one PDF; several -> a ZIP, like the bulk page
+    if len(rows) == 1 and not args.sheet:
+
+        _, filename, pdf_bytes, error = bulk_vouchers.render_voucher_row(1, rows[0])
+
+        if error:
+            return _fail(f"Voucher Error: {error}")
+
+        output = args.output or f"Hotel_Voucher_{_safe_name(rows[0].get('client_name'))}.pdf"
+
+        with open(output, "wb") as f:
+            f.write(pdf_bytes)
+
+        print(f"Wrote {output}")
+
+        return 0
+
+    output = args.output or "vouchers.zip"
+
+    with open(output, "wb") as f:
+        report = bulk_vouchers.build_voucher_zip(
+            rows,
+            out=f,
+            max_workers=args.workers,
+            first_row=first_row
+        )
+
+    print(
+        f"Wrote {output}: {report['rendered']}/{report['total']} vouchers "
+        f"in {report['elapsed_seconds']:.1f}s"
+    )
+
+    for error in report["errors"]:
+        print(f"  row {error['row']}: {error['error']}", file=sys.stderr)
+
+    return 0 if not report["errors"] else 1
+
+
+# ===============================
+# BATCH GENERATION
+# ===============================
+def run_batch(args, batch_args):
+
+    # batch.py owns its options (--status, --ids, --limit, ...)
+    import batch
+
+    return batch.main(batch_args)
+
+
+# ===============================
+# EXPORT
+# ===============================
+def export(args):
+
+    import datetime
+
+    import exporter
+    from database import init_db, session_scope
+
+    init_db()
+
+    fmt = args.format or ("parquet" if (args.output or "").endswith(".parquet") else "csv")
+
+    try:
+        filters = {
+            "status": args.status,
+            "source": args.source,
+            "destination": args.destination,
+            "created_from": datetime.date.fromisoformat(args.date_from) if args.date_from else None,
+            "created_to": datetime.date.fromisoformat(args.date_to) if args.date_to else None
+        }
+
+    except ValueError as e:
+        return _fail(f"Dates are YYYY-MM-DD: {str(e)}")
+
+    # Streamed to the file (or stdout) a batch at a time
+    if args.output:
+        target = args.output
+
+    else:
+        sys.stdout.flush()
+        target = sys.stdout.buffer
+
+    try:
+        with session_scope() as session:
+            report = exporter.export_rows(session, args.table, target, fmt=fmt, **filters)
+
+    except (exporter.ExportError, OSError) as e:
+        return _fail(str(e))
+
+    if args.output:
+        print(
+            f"Wrote {report['rows']:,} {args.table} to {args.output} "
+            f"in {report['elapsed_seconds']:.1f}s ({report['rows_per_second']:,.0f} rows/s)"
+        )
+
+    return 0
+
+
+# ===============================
+# IMPORT
+# ===============================
+def import_file(args):
+
+    import importer
+    from database import init_db, session_scope
+
+    init_db()
+
+    def _progress(report):
+        print(
+            f"  {report['rows']:,} rows, {report['rows_per_second']:,.0f} rows/s",
+            file=sys.stderr
+        )
+
+    try:
+        with session_scope() as session:
+            report = importer.import_leads(
+                session,
+                args.file,
+                args.file,
+                default_source=args.source,
+                progress=_progress,
+                chunk_rows=args.chunk_rows or importer.IMPORT_CHUNK_ROWS
+            )
+
+    except (importer.ImportFileError, OSError) as e:
+        return _fail(str(e))
+
+    print(
+        f"Imported {report['rows']:,} rows in {report['elapsed_seconds']:.1f}s "
+        f"({report['rows_per_second']:,.0f} rows/s): "
+        f"{report['leads_created']} new leads, {report['leads_reused']} rows for existing clients, "
+        f"{report['queries_created']} enquiries, {len(report['errors'])} skipped"
+    )
+
+    for error in report["errors"]:
+        print(f"  row {error['row']}: {error['error']}", file=sys.stderr)
+
+    return 0
+
+
+# ===============================
+# DEDUP
+# ===============================
+def merge_duplicates(args):
+
+    import dedup
+    from database import init_db, session_scope
+
+    init_db()
+
+    with session_scope() as session:
+        report = dedup.merge_duplicates(session, dry_run=args.dry_run)
+
+    if args.dry_run:
+        print(f"{report['duplicate_leads']} duplicate leads across {report['groups']} clients")
+
+        for group in report["examples"]:
+            print(f"  leads {', '.join(str(i) for i in group)}")
+
+    else:
+        print(
+            f"Merged {report['leads_merged']} duplicate leads into {report['groups']} clients, "
+            f"moved {report['queries_moved']} enquiries in {report['elapsed_seconds']:.1f}s"
+        )
+
+    return 0
+
+
+# ===============================
+# SEARCH
+# ===============================
+def search_records(args):
+
+    import search
+    from database import init_db, session_scope
+
+    init_db()
+
+    with session_scope() as session:
+        results = search.search(session, " ".join(args.terms), limit=args.limit)
+
+    for r in results:
+
+        label = f"query {r['query_id']}" if r["kind"] == "query" else f"lead {r['lead_id']}"
+        trip = f" - {r['destination']} ({r['status']})" if r["kind"] == "query" else ""
+
+        print(f"{label:>12}  {r['client'] or '-'}{trip}")
+
+        if r["match"]:
+            print(f"{'':>12}  {r['match']}")
+
+    if not results:
+        print("No matches.", file=sys.stderr)
+
+    return 0
+
+
+# ===============================
+# COMMAND LINE
+# ===============================
+def build_parser():
+
+    parser = argparse.ArgumentParser(
+        prog="cli.py",
+        description="Pristine Vacations CRM - headless rendering, batch, import, dedup, export and search."
+    )
+
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    quote = commands.add_parser("render-quote", help="Render a quote PDF")
+    source = quote.add_mutually_exclusive_group(required=True)
+    source.add_argument("--query-id", type=int, help="Use the query's saved itinerary, hotels and price")
+    source.add_argument("--json", help="JSON with client_name, destination, itinerary_text, hotel_details, price_text ('-' for stdin)")
+    quote.add_argument("-o", "--output", help="Output PDF path")
+    quote.add_argument("--no-cache", action="store_true", help="Render even if an identical PDF is cached")
+    quote.set_defaults(handler=render_quote)
+
+    voucher = commands.add_parser("render-voucher", help="Render hotel vouchers (one PDF, or a ZIP for many)")
+    source = voucher.add_mutually_exclusive_group(required=True)
+    source.add_argument("--json", help="JSON voucher object, or a list of them ('-' for stdin)")
+    source.add_argument("--sheet", help="CSV/Excel sheet, one voucher per row")
+    voucher.add_argument("-o", "--output", help="Output PDF or ZIP path")
+    voucher.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Render processes for many vouchers")
+    voucher.set_defaults(handler=render_voucher)
+
+    batch = commands.add_parser("batch", help="Generate draft itineraries (see: cli.py batch --help)", add_help=False)
+    batch.set_defaults(handler=run_batch)
+
+    export_cmd = commands.add_parser("export", help="Export leads, queries or itineraries as CSV/Parquet")
+    export_cmd.add_argument("table", choices=["leads", "queries", "itineraries"])
+    export_cmd.add_argument("--status", help="Only queries with this status (leads: with such a query)")
+    export_cmd.add_argument("--source", help="Only leads from this source")
+    export_cmd.add_argument("--destination", help="Only trips whose destination contains this")
+    export_cmd.add_argument("--from", dest="date_from", help="Created on or after (YYYY-MM-DD)")
+    export_cmd.add_argument("--to", dest="date_to", help="Created on or before (YYYY-MM-DD)")
+    export_cmd.add_argument("--format", choices=["csv", "parquet"], help="Default: from the output extension, else csv")
+    export_cmd.add_argument("-o", "--output", help="Output path (default: stdout)")
+    export_cmd.set_defaults(handler=export)
+
+    import_cmd = commands.add_parser("import", help="Import leads and enquiries from a CSV/Excel export")
+    import_cmd.add_argument("file", help="CSV or .xlsx file")
+    import_cmd.add_argument("--source", default="Import", help="Lead source for rows without one")
+    import_cmd.add_argument("--chunk-rows", type=int, help="Rows per transaction (default: the IMPORT_CHUNK_ROWS setting)")
+    import_cmd.set_defaults(handler=import_file)
+
+    dedup_cmd = commands.add_parser("dedup", help="Merge leads that share a phone number or email")
+    dedup_cmd.add_argument("--dry-run", action="store_true", help="Only report the duplicate groups")
+    dedup_cmd.set_defaults(handler=merge_duplicates)
+
+    search_cmd = commands.add_parser("search", help="Full-text search over clients and trips")
+    search_cmd.add_argument("terms", nargs="+", help="Words or prefixes; all must match")
+    search_cmd.add_argument("--limit", type=int, default=25, help="Max results")
+    search_cmd.set_defaults(handler=search_records)
+
+    return parser
+
+
+def main(argv=None):
+
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+
+    if args.handler is run_batch:
+        return run_batch(args, extra)
+
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
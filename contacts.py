@@ -0,0 +1,100 @@
+import re
+
+import config
+
+# ===============================
+# SETTINGS
+# ===============================
+# Country code assumed for national numbers ("98765 43210", "0161-4623384")
+DEFAULT_COUNTRY_CODE = config.get_setting("DEFAULT_COUNTRY_CODE", "91")
+
+_NON_DIGITS = re.compile(r"\D+")
+
+_EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
+
+# ===============================
+# NORMALIZERS
+# ===============================
+def normalize_phone(raw, country_code=DEFAULT_COUNTRY_CODE):
+
+    # "+91 98765-43210", "098765 43210", "9876543210", "0091 98765 43210"
+    # -> "+919876543210". None when there is no plausible number.
+    if raw is None:
+        return None
+
+    text = str(raw).strip()
+
+    # Spreadsheets hand phone columns back as floats
+    if text.endswith(".0") and text[:-2].isdigit():
+        text = text[:-2]
+
+    digits = _NON_DIGITS.sub("", text)
+
+    if len(digits) < 7:
+        return None
+
+    if text.startswith("+"):
+        return f"+{digits}"
+
+    if digits.startswith("00"):
+        return f"+{digits[2:]}"
+
+    # National trunk prefix: 098765 43210, 0161 4623384
+    digits = digits.lstrip("0")
+
+    if len(digits) <= 10:
+        return f"+{country_code}{digits}"
+
+    return f"+{digits}"
+
+
+def normalize_email(raw):
+
+    if raw is None:
+        return None
+
+    email = str(raw).strip().lower()
+
+    if email.startswith("mailto:"):
+        email = email[len("mailto:"):]
+
+    return email if _EMAIL.fullmatch(email) else None
+
+
+# ===============================
+# MATCH KEYS
+# ===============================
+# Stored on every lead (indexed) so a returning client is found with one
+# index lookup however the number or address was typed
+def phone_key(raw):
+
+    phone = normalize_phone(raw)
+
+    return phone[1:] if phone else None
+
+
+def email_key(raw):
+
+    # Plus-addressing dropped everywhere, dots too where Gmail ignores them
+    email = normalize_email(raw)
+
+    if not email:
+        return None
+
+    local, domain = email.rsplit("@", 1)
+    local = local.split("+", 1)[0]
+
+    if domain in ("gmail.com", "googlemail.com"):
+        local = local.replace(".", "")
+        domain = "gmail.com"
+
+    return f"{local}@{domain}" if local else None
+
+
+def match_keys(phone, email):
+
+    return {
+        "phone_key": phone_key(phone),
+        "email_key": email_key(email)
+    }
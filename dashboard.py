@@ -0,0 +1,172 @@
+from sqlalchemy import func, case, or_, tuple_
+
+from models import Lead, Query
+
+
+# ===============================
+# DASHBOARD METRICS
+# ===============================
+def get_dashboard_metrics(session):
+
+    # COUNT(*) / GROUP BY in the database - never load the rows themselves
+    total_leads = session.query(func.count(Lead.id)).scalar() or 0
+
+    status_rows = (
+        session.query(Query.status, func.count(Query.id))
+        .group_by(Query.status)
+        .all()
+    )
+
+    by_status = {
+        (status or "Pending"): 0
+        for status, _ in status_rows
+    }
+
+    for status, count in status_rows:
+        by_status[status or "Pending"] += count
+
+    total_queries = sum(by_status.values())
+    quoted = by_status.get("Quoted", 0)
+
+    return {
+        "total_leads": total_leads,
+        "active_queries": total_queries,
+        "quoted": quoted,
+        "pending": total_queries - quoted,
+        "by_status": by_status
+    }
+
+
+# ===============================
+# ACTIVE QUERIES
+# ===============================
+ACTIVE_QUERY_SORTS = ["Newest", "Oldest", "Travel Date"]
+
+
+def get_active_queries_page(
+    session,
+    status=None,
+    sort="Newest",
+    cursor=None,
+    page_size=25
+):
+
+    # One statement per page: leads joined in, itinerary text never loaded,
+    # keyset (cursor) paging instead of OFFSET so every page costs the same.
+    # Filters and sort keys are plain columns so they stay on the indexes.
+    last_saved = case(
+        (func.length(func.coalesce(Query.saved_itinerary, "")) > 0, "✅"),
+        else_="❌"
+    )
+
+    stmt = (
+        session.query(
+            Query.id,
+            Lead.name,
+            Query.destination,
+            Query.travel_date,
+            func.coalesce(Query.status, "Pending"),
+            last_saved
+        )
+        .outerjoin(Lead, Query.lead_id == Lead.id)
+    )
+
+    # Migration 2 backfilled NULL statuses to "Pending"
+    if status:
+        stmt = stmt.filter(Query.status == status)
+
+    if sort == "Oldest":
+
+        if cursor:
+            stmt = stmt.filter(Query.id > cursor[1])
+
+        rows = stmt.order_by(Query.id.asc()).limit(page_size + 1).all()
+
+    elif sort == "Travel Date":
+
+        # Queries without a travel date first, then by date - two segments,
+        # each a range scan in index order (a COALESCE would hide the index)
+        rows = []
+
+        if cursor is None or cursor[0] is None:
+
+            undated = stmt.filter(Query.travel_date.is_(None))
+
+            if cursor:
+                undated = undated.filter(Query.id > cursor[1])
+
+            rows = undated.order_by(Query.id.asc()).limit(page_size + 1).all()
+
+        if len(rows) <= page_size:
+
+            dated = stmt.filter(Query.travel_date.is_not(None))
+
+            if cursor and cursor[0] is not None:
+                dated = dated.filter(
+                    tuple_(Query.travel_date, Query.id) > tuple_(cursor[0], cursor[1])
+                )
+
+            rows += (
+                dated.order_by(Query.travel_date.asc(), Query.id.asc())
+                .limit(page_size + 1 - len(rows))
+                .all()
+            )
+
+    else:
+
+        if cursor:
+            stmt = stmt.filter(Query.id < cursor[1])
+
+        rows = stmt.order_by(Query.id.desc()).limit(page_size + 1).all()
+
+    # One extra row was fetched to know whether a next page exists
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    data = [
+        {
+            "ID": row[0],
+            "Client": row[1],
+            "Destination": row[2],
+            "Travel Date": row[3],
+            "Status": row[4],
+            "Last Saved": row[5]
+        }
+        for row in rows
+    ]
+
+    next_cursor = (rows[-1][3], rows[-1][0]) if has_more else None
+
+    return data, next_cursor
+
+
+# ===============================
+# QUERY PICKER
+# ===============================
+def get_recent_open_queries(session, limit=15):
+
+    # Newest queries not yet quoted: the builder's shortlist before anything
+    # is typed. Walks the primary key backwards and stops at the limit.
+    rows = (
+        session.query(
+            Query.id,
+            Lead.name,
+            Query.destination,
+            func.coalesce(Query.status, "Pending")
+        )
+        .outerjoin(Lead, Query.lead_id == Lead.id)
+        .filter(or_(Query.status.is_(None), Query.status != "Quoted"))
+        .order_by(Query.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+    return [
+        {
+            "query_id": query_id,
+            "client": name,
+            "destination": destination,
+            "status": status
+        }
+        for query_id, name, destination, status in rows
+    ]
@@ -0,0 +1,262 @@
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import config
+
+# ===============================
+# ENGINE
+# ===============================
+# Lives at module level so it is created once per process and shared by
+# every Streamlit session, instead of once per script rerun.
+# URL and pool settings come from config.py (environment / secrets.toml).
+DATABASE_URL = config.DATABASE_URL
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+
+    cursor = dbapi_connection.cursor()
+
+    # WAL: readers never wait for a writer and a writer never waits for readers
+    cursor.execute("PRAGMA journal_mode=WAL")
+
+    # Safe with WAL - only the last commits can be lost on power failure
+    cursor.execute("PRAGMA synchronous=NORMAL")
+
+    # Wait for the write lock instead of failing with "database is locked"
+    cursor.execute(f"PRAGMA busy_timeout={config.SQLITE_BUSY_TIMEOUT_MS}")
+
+    cursor.close()
+
+
+def create_db_engine(url=DATABASE_URL):
+
+    url = make_url(url)
+
+    if url.get_backend_name() != "sqlite":
+
+        # PostgreSQL (or any server database): plain pooled engine
+        return create_engine(
+            url,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_pre_ping=config.DB_POOL_PRE_PING,
+            pool_recycle=config.DB_POOL_RECYCLE
+        )
+
+    connect_args = {
+        "check_same_thread": False,
+        "timeout": config.SQLITE_BUSY_TIMEOUT_MS / 1000
+    }
+
+    if url.database in (None, "", ":memory:"):
+
+        # In-memory databases exist per connection - share a single one
+        engine = create_engine(
+            url,
+            connect_args=connect_args,
+            poolclass=StaticPool
+        )
+
+    else:
+
+        engine = create_engine(
+            url,
+            connect_args=connect_args,
+            pool_size=config.DB_POOL_SIZE,
+            max_overflow=config.DB_MAX_OVERFLOW,
+            pool_pre_ping=config.DB_POOL_PRE_PING,
+            pool_recycle=config.DB_POOL_RECYCLE
+        )
+
+    event.listen(engine, "connect", _configure_sqlite)
+
+    return engine
+
+
+engine = create_db_engine()
+
+SessionLocal = sessionmaker(bind=engine)
+
+
+# ===============================
+# DATA VERSION
+# ===============================
+# A process-wide counter bumped after every commit that wrote CRM data -
+# from Streamlit pages, background jobs or batch runs alike. Read caches
+# take it as part of their key (see main.py), so a write makes every
+# session's next read miss instead of waiting for a TTL.
+DATA_TABLES = {"leads", "queries", "itineraries", "generation_jobs"}
+
+_version_lock = threading.Lock()
+_data_version = 0
+
+
+def get_data_version():
+
+    with _version_lock:
+        return _data_version
+
+
+def bump_data_version():
+
+    global _data_version
+
+    with _version_lock:
+        _data_version += 1
+        return _data_version
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _note_flushed_writes(session, flush_context):
+
+    # new / dirty / deleted still show what this flush wrote
+    for obj in session.new | session.dirty | session.deleted:
+        if getattr(obj, "__tablename__", None) in DATA_TABLES:
+            session.info["data_changed"] = True
+            return
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _note_statement_writes(orm_execute_state):
+
+    # Bulk insert / upsert / UPDATE statements bypass the flush
+    if not (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        return
+
+    table = getattr(orm_execute_state.statement, "table", None)
+
+    if getattr(table, "name", None) in DATA_TABLES:
+        orm_execute_state.session.info["data_changed"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_on_commit(session):
+
+    if session.info.pop("data_changed", False):
+        bump_data_version()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_on_rollback(session):
+
+    session.info.pop("data_changed", None)
+
+
+# ===============================
+# SCHEMA
+# ===============================
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def init_db():
+
+    global _schema_ready
+
+    with _schema_lock:
+
+        if _schema_ready:
+            return
+
+        from migrations import run_migrations
+
+        run_migrations(engine)
+
+        _schema_ready = True
+
+
+# ===============================
+# SESSION SCOPE
+# ===============================
+@contextmanager
+def session_scope():
+
+    session = SessionLocal()
+
+    try:
+        yield session
+        session.commit()
+
+    # BaseException: Streamlit's st.stop()/st.rerun() are not Exceptions,
+    # and anything left uncommitted at that point must not leak
+    except BaseException:
+        session.rollback()
+        raise
+
+    finally:
+        session.close()
+
+
+# ===============================
+# DIALECT-AWARE WRITE HELPERS
+# ===============================
+def _dialect_insert(session, model):
+
+    dialect = session.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    else:
+        raise NotImplementedError(f"Upsert is not supported on {dialect}.")
+
+    return dialect_insert(model.__table__)
+
+
+def upsert(session, model, rows, index_elements, update_columns=None):
+
+    # INSERT ... ON CONFLICT (index_elements) DO UPDATE, same SQL shape on
+    # SQLite and PostgreSQL. index_elements must be covered by a unique index.
+    if not rows:
+        return
+
+    stmt = _dialect_insert(session, model)
+
+    if update_columns is None:
+        update_columns = [
+            col.name
+            for col in model.__table__.columns
+            if col.name not in index_elements and not col.primary_key
+        ]
+
+    if update_columns:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={name: stmt.excluded[name] for name in update_columns}
+        )
+
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+
+    session.execute(stmt, rows)
+
+
+def bulk_insert(session, model, rows, returning=None):
+
+    # executemany through SQLAlchemy's "insertmanyvalues": batched multi-row
+    # INSERTs on both dialects. With returning=<column> the generated values
+    # come back in the same order as rows - but SQLite has no sentinel to
+    # sort them by, so there it is one INSERT per row. For large batches,
+    # insert without returning and look rows up by a natural key instead.
+    if not rows:
+        return []
+
+    if returning is None:
+        session.execute(insert(model), rows)
+        return []
+
+    stmt = insert(model).returning(returning, sort_by_parameter_order=True)
+
+    return session.scalars(stmt, rows).all()
@@ -0,0 +1,206 @@
+import time
+
+from sqlalchemy import select, update, delete, func, bindparam
+
+import config
+import contacts
+from models import Lead, Query
+
+# Duplicate leads: every "Save Enquiry" used to create a fresh lead, so a
+# returning client is spread over several. Leads sharing a phone or email
+# match key (contacts.py, indexed) are the same client; groups are built
+# by GROUP BY on each key plus union-find across the two, so the work is
+# proportional to the number of duplicates, never pairwise over all leads.
+
+# ===============================
+# SETTINGS
+# ===============================
+DEDUP_BATCH_GROUPS = config.get_int("DEDUP_BATCH_GROUPS", 500)
+
+
+# ===============================
+# MATCHING
+# ===============================
+def find_matching_lead(session, phone, email):
+
+    # The client's existing lead (oldest first) - used before creating one
+    keys = contacts.match_keys(phone, email)
+
+    for column, key in ((Lead.phone_key, keys["phone_key"]), (Lead.email_key, keys["email_key"])):
+
+        if not key:
+            continue
+
+        lead = (
+            session.query(Lead)
+            .filter(column == key)
+            .order_by(Lead.id)
+            .first()
+        )
+
+        if lead:
+            return lead
+
+    return None
+
+
+def find_duplicate_groups(session):
+
+    # [[lead_id, ...]] - each group sorted, oldest lead first
+    parent = {}
+
+    def _root(lead_id):
+
+        while parent[lead_id] != lead_id:
+            parent[lead_id] = parent[parent[lead_id]]
+            lead_id = parent[lead_id]
+
+        return lead_id
+
+    for column in (Lead.phone_key, Lead.email_key):
+
+        # Blocking: only keys held by more than one lead come back
+        shared = (
+            select(column)
+            .where(column.is_not(None))
+            .group_by(column)
+            .having(func.count() > 1)
+        )
+
+        rows = session.execute(
+            select(column, Lead.id)
+            .where(column.in_(shared))
+            .order_by(column, Lead.id)
+        )
+
+        first_of_key = {}
+
+        for key, lead_id in rows:
+
+            parent.setdefault(lead_id, lead_id)
+
+            if key not in first_of_key:
+                first_of_key[key] = lead_id
+                continue
+
+            a, b = _root(first_of_key[key]), _root(lead_id)
+
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    groups = {}
+
+    for lead_id in parent:
+        groups.setdefault(_root(lead_id), []).append(lead_id)
+
+    return sorted(sorted(group) for group in groups.values())
+
+
+# ===============================
+# MERGING
+# ===============================
+def _merge_batch(session, groups):
+
+    lead_ids = [lead_id for group in groups for lead_id in group]
+
+    leads = {
+        lead.id: lead
+        for lead in session.execute(
+            select(Lead.id, Lead.phone, Lead.email, Lead.source)
+            .where(Lead.id.in_(lead_ids))
+        )
+    }
+
+    fills = []
+    moves = []
+
+    for group in groups:
+
+        # The oldest lead survives; it keeps its own details and takes any
+        # phone / email / source it was missing from the others
+        survivor, others = group[0], group[1:]
+
+        fill = {}
+
+        for field in ("phone", "email", "source"):
+
+            if getattr(leads[survivor], field):
+                continue
+
+            value = next((getattr(leads[o], field) for o in others if getattr(leads[o], field)), None)
+
+            if value:
+                fill[field] = value
+
+        if fill:
+
+            if "phone" in fill:
+                fill["phone_key"] = contacts.phone_key(fill["phone"])
+
+            if "email" in fill:
+                fill["email_key"] = contacts.email_key(fill["email"])
+
+            fills.append((survivor, fill))
+
+        moves.extend({"old_id": other, "new_id": survivor} for other in others)
+
+    for survivor, fill in fills:
+        session.execute(
+            update(Lead).where(Lead.id == survivor).values(**fill),
+            execution_options={"synchronize_session": False}
+        )
+
+    moved = session.scalar(
+        select(func.count(Query.id)).where(Query.lead_id.in_([m["old_id"] for m in moves]))
+    )
+
+    # One executemany each for the whole batch instead of a statement per group
+    session.execute(
+        update(Query.__table__)
+        .where(Query.__table__.c.lead_id == bindparam("old_id"))
+        .values(lead_id=bindparam("new_id")),
+        moves
+    )
+
+    session.execute(
+        delete(Lead.__table__).where(Lead.__table__.c.id == bindparam("old_id")),
+        [{"old_id": m["old_id"]} for m in moves]
+    )
+
+    return moved
+
+
+def merge_duplicates(session, dry_run=False, progress=None, batch_groups=DEDUP_BATCH_GROUPS):
+
+    # Re-points the duplicates' queries at the surviving lead and deletes
+    # the duplicates, committing every batch_groups groups
+    started = time.perf_counter()
+
+    groups = find_duplicate_groups(session)
+
+    report = {
+        "groups": len(groups),
+        "duplicate_leads": sum(len(group) - 1 for group in groups),
+        "leads_merged": 0,
+        "queries_moved": 0,
+        "examples": groups[:20],
+        "elapsed_seconds": 0.0
+    }
+
+    if not dry_run:
+
+        for start in range(0, len(groups), batch_groups):
+
+            batch = groups[start:start + batch_groups]
+
+            report["queries_moved"] += _merge_batch(session, batch)
+            report["leads_merged"] += sum(len(group) - 1 for group in batch)
+
+            session.commit()
+
+            if progress:
+                progress(min(start + batch_groups, len(groups)), len(groups))
+
+    report["elapsed_seconds"] = time.perf_counter() - started
+
+    return report
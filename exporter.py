@@ -0,0 +1,253 @@
+import csv
+import datetime
+import io
+import os
+import time
+
+from sqlalchemy import select, exists
+
+import config
+from models import Lead, Query
+
+# Export of leads, queries and saved itineraries to CSV or Parquet. Rows
+# are read with yield_per (a server-side cursor on PostgreSQL, incremental
+# fetches on SQLite) and written a batch at a time, so memory stays the
+# same whether the table has a hundred rows or a million.
+
+# ===============================
+# SETTINGS
+# ===============================
+EXPORT_BATCH_ROWS = config.get_int("EXPORT_BATCH_ROWS", 5000)
+
+EXPORT_TABLES = ["leads", "queries", "itineraries"]
+
+EXPORT_FORMATS = ["csv", "parquet"]
+
+# Column -> Parquet type ("int", "datetime", everything else text)
+COLUMN_TYPES = {
+    "id": "int",
+    "lead_id": "int",
+    "query_id": "int",
+    "pax": "int",
+    "created_at": "datetime"
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+# ===============================
+# WHAT TO EXPORT
+# ===============================
+def _start_of(day):
+
+    return datetime.datetime.combine(day, datetime.time())
+
+
+def _query_filters(status, source, destination):
+
+    filters = []
+
+    if status:
+        filters.append(Query.status == status)
+
+    if source:
+        filters.append(Lead.source == source)
+
+    if destination:
+        filters.append(Query.destination.ilike(f"%{destination}%"))
+
+    return filters
+
+
+def export_statement(table, status=None, source=None, destination=None, created_from=None, created_to=None):
+
+    # created_from / created_to: dates (inclusive) on the exported table's
+    # created_at. For leads, status / destination pick leads with at least
+    # one such query.
+    if table == "leads":
+
+        stmt = select(
+            Lead.id,
+            Lead.name,
+            Lead.phone,
+            Lead.email,
+            Lead.source,
+            Lead.created_at
+        ).order_by(Lead.id)
+
+        created = Lead.created_at
+
+        if source:
+            stmt = stmt.where(Lead.source == source)
+
+        if status or destination:
+            stmt = stmt.where(
+                exists().where(Query.lead_id == Lead.id, *_query_filters(status, None, destination))
+            )
+
+    elif table == "queries":
+
+        stmt = select(
+            Query.id,
+            Query.lead_id,
+            Lead.name.label("client"),
+            Query.destination,
+            Query.travel_date,
+            Query.pax,
+            Query.budget,
+            Query.status,
+            Query.created_at
+        ).outerjoin(Lead, Query.lead_id == Lead.id).order_by(Query.id)
+
+        created = Query.created_at
+
+        stmt = stmt.where(*_query_filters(status, source, destination))
+
+    elif table == "itineraries":
+
+        # The builder saves the working itinerary on the query itself
+        stmt = select(
+            Query.id.label("query_id"),
+            Query.lead_id,
+            Lead.name.label("client"),
+            Query.destination,
+            Query.travel_date,
+            Query.status,
+            Query.saved_price,
+            Query.saved_hotels,
+            Query.saved_itinerary,
+            Query.created_at
+        ).outerjoin(Lead, Query.lead_id == Lead.id).order_by(Query.id)
+
+        created = Query.created_at
+
+        stmt = stmt.where(
+            Query.saved_itinerary.is_not(None),
+            Query.saved_itinerary != "",
+            *_query_filters(status, source, destination)
+        )
+
+    else:
+        raise ExportError(f"Unknown table '{table}' (expected one of {', '.join(EXPORT_TABLES)}).")
+
+    if created_from:
+        stmt = stmt.where(created >= _start_of(created_from))
+
+    if created_to:
+        stmt = stmt.where(created < _start_of(created_to + datetime.timedelta(days=1)))
+
+    return stmt
+
+
+# ===============================
+# WRITERS
+# ===============================
+def _write_csv(batches, columns, target):
+
+    # target: path or binary file-like
+    if isinstance(target, (str, os.PathLike)):
+        f = open(target, "w", newline="", encoding="utf-8")
+
+    else:
+        f = io.TextIOWrapper(target, encoding="utf-8", newline="")
+
+    try:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+
+        for rows in batches:
+            writer.writerows(rows)
+
+    finally:
+        if isinstance(target, (str, os.PathLike)):
+            f.close()
+
+        else:
+            f.flush()
+            f.detach()
+
+
+def _write_parquet(batches, columns, target):
+
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+    except ImportError as e:
+        raise ExportError(f"Parquet export needs pyarrow ({str(e)}). Export as CSV instead.")
+
+    types = {"int": pa.int64(), "datetime": pa.timestamp("us")}
+
+    schema = pa.schema([
+        (column, types.get(COLUMN_TYPES.get(column), pa.string()))
+        for column in columns
+    ])
+
+    # One row group per batch
+    with pq.ParquetWriter(target, schema) as writer:
+
+        for rows in batches:
+
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)],
+                schema=schema
+            ))
+
+
+# ===============================
+# EXPORT
+# ===============================
+def export_rows(session, table, target, fmt="csv", progress=None, batch_rows=EXPORT_BATCH_ROWS, **filters):
+
+    # Writes table (filtered, see export_statement) to target - a path or a
+    # binary file-like - and returns a report. progress(rows) after each batch.
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unknown format '{fmt}' (expected one of {', '.join(EXPORT_FORMATS)}).")
+
+    started = time.perf_counter()
+
+    report = {
+        "table": table,
+        "format": fmt,
+        "rows": 0,
+        "elapsed_seconds": 0.0,
+        "rows_per_second": 0.0
+    }
+
+    stmt = export_statement(table, **filters)
+
+    result = session.execute(stmt, execution_options={"yield_per": batch_rows})
+
+    def batches():
+
+        for rows in result.partitions():
+
+            yield rows
+
+            report["rows"] += len(rows)
+
+            if progress:
+                progress(report["rows"])
+
+    try:
+        if fmt == "parquet":
+            _write_parquet(batches(), list(result.keys()), target)
+
+        else:
+            _write_csv(batches(), list(result.keys()), target)
+
+    finally:
+        result.close()
+
+    elapsed = time.perf_counter() - started
+    report["elapsed_seconds"] = elapsed
+    report["rows_per_second"] = report["rows"] / elapsed if elapsed else 0.0
+
+    return report
+
+
+def export_file_name(table, fmt):
+
+    return f"pristine_{table}.{fmt}"
@@ -0,0 +1,388 @@
+import csv
+import datetime
+import functools
+import io
+import os
+import re
+import time
+
+from sqlalchemy import select
+
+import config
+import contacts
+import search
+from database import bulk_insert
+from models import Lead, Query
+
+# Bulk import of leads and enquiries from CSV / Excel exports (Instagram
+# lead forms, the website, the old system). The file is read a chunk at a
+# time; each chunk is de-duplicated against the file so far and against
+# existing leads (indexed phone / email match keys), then inserted with
+# two bulk INSERTs and committed as one transaction.
+
+# ===============================
+# SETTINGS
+# ===============================
+IMPORT_CHUNK_ROWS = config.get_int("IMPORT_CHUNK_ROWS", 5000)
+
+# Header spellings seen in the exports we get, after normalization
+# ("Full Name" -> full_name). First match wins.
+COLUMN_ALIASES = {
+    "name": ["name", "client_name", "full_name", "client", "customer_name", "lead_name"],
+    "phone": ["phone", "phone_number", "mobile", "mobile_number", "contact_number", "whatsapp", "contact"],
+    "email": ["email", "email_address", "e_mail", "mail"],
+    "source": ["source", "lead_source", "platform", "channel"],
+    "destination": ["destination", "trip", "where_to", "country", "location"],
+    "travel_date": ["travel_date", "date_of_travel", "departure_date", "travel_dates", "start_date"],
+    "pax": ["pax", "no_of_pax", "travellers", "travelers", "guests", "adults"],
+    "budget": ["budget", "approx_budget"],
+    "notes": ["notes", "requirements", "message", "comments", "remarks"],
+    "status": ["status"]
+}
+
+DATE_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%d %b %Y",
+    "%d %B %Y"
+]
+
+
+class ImportFileError(Exception):
+    pass
+
+
+# ===============================
+# READING THE FILE
+# ===============================
+def _column_name(header):
+
+    return re.sub(r"[^a-z0-9]+", "_", str(header or "").strip().lower()).strip("_")
+
+
+def _column_map(headers):
+
+    # {field: position in the row}
+    positions = {}
+    names = [_column_name(h) for h in headers]
+
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                positions[field] = names.index(alias)
+                break
+
+    if "name" not in positions:
+        raise ImportFileError("No client name column (e.g. 'Name' or 'Client Name').")
+
+    if "phone" not in positions and "email" not in positions:
+        raise ImportFileError("No phone or email column.")
+
+    return positions
+
+
+def _csv_rows(source):
+
+    if isinstance(source, (str, os.PathLike)):
+
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            yield from csv.reader(f)
+
+        return
+
+    # Binary upload (Streamlit UploadedFile, BytesIO)
+    text = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+
+    try:
+        yield from csv.reader(text)
+
+    finally:
+        text.detach()
+
+
+def _excel_rows(source):
+
+    try:
+        import openpyxl
+
+    except ImportError as e:
+        raise ImportFileError(f"Excel support is not installed ({str(e)}). Upload a CSV instead.")
+
+    # read_only streams the sheet instead of loading every cell
+    workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield ["" if value is None else value for value in row]
+
+    finally:
+        workbook.close()
+
+
+def read_chunks(source, filename, chunk_rows=IMPORT_CHUNK_ROWS):
+
+    # source: path or binary file-like. Yields (first_row_number, [record])
+    # with records as {field: raw value}; the header is row 1.
+    extension = os.path.splitext(filename)[1].lower()
+
+    rows = _excel_rows(source) if extension in (".xlsx", ".xlsm") else _csv_rows(source)
+
+    try:
+        headers = next(rows)
+
+    except StopIteration:
+        raise ImportFileError(f"{filename} is empty.")
+
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read {filename}: {str(e)}")
+
+    positions = _column_map(headers)
+
+    chunk = []
+    first_row = 2
+
+    try:
+        for row in rows:
+
+            chunk.append({
+                field: row[position] if position < len(row) else ""
+                for field, position in positions.items()
+            })
+
+            if len(chunk) >= chunk_rows:
+                yield first_row, chunk
+                first_row += len(chunk)
+                chunk = []
+
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFileError(f"Could not read {filename} after row {first_row + len(chunk)}: {str(e)}")
+
+    if chunk:
+        yield first_row, chunk
+
+
+def template_csv():
+
+    return "name,phone,email,source,destination,travel_date,pax,budget,notes\n"
+
+
+# ===============================
+# CLEANING
+# ===============================
+def _text(value):
+
+    return str(value).strip() if value not in (None, "") else ""
+
+
+def _travel_date(value):
+
+    # ISO date when recognisable, otherwise kept as typed ("Dec 2025")
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.strftime("%Y-%m-%d")
+
+    return _parse_date_text(_text(value))
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_date_text(value):
+
+    # A file has a few hundred distinct dates at most; strptime (and the
+    # formats that fail first) runs once for each
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+
+        except ValueError:
+            continue
+
+    return value or None
+
+
+def _pax(value):
+
+    match = re.search(r"\d+", _text(value))
+
+    return int(match.group()) if match else None
+
+
+def clean_record(record, default_source):
+
+    # Raises ValueError for a row that cannot become a lead
+    name = _text(record.get("name"))
+
+    if not name:
+        raise ValueError("name is empty")
+
+    phone = contacts.normalize_phone(record.get("phone"))
+    email = contacts.normalize_email(record.get("email"))
+
+    if not phone and not email:
+        raise ValueError("no valid phone or email")
+
+    return {
+        "name": name,
+        "phone": phone,
+        "email": email,
+        **contacts.match_keys(phone, email),
+        "source": _text(record.get("source")) or default_source,
+        "destination": _text(record.get("destination")),
+        "travel_date": _travel_date(record.get("travel_date")),
+        "pax": _pax(record.get("pax")),
+        "budget": _text(record.get("budget")),
+        "notes": _text(record.get("notes")),
+        "status": _text(record.get("status")) or "Pending"
+    }
+
+
+# ===============================
+# IMPORT
+# ===============================
+def _existing_leads(session, phones, emails):
+
+    # {("phone", key) / ("email", key): lead_id} for leads already in the
+    # database - two IN lookups on the indexed match keys per chunk
+    found = {}
+
+    for kind, column, values in (("phone", Lead.phone_key, phones), ("email", Lead.email_key, emails)):
+
+        if not values:
+            continue
+
+        for lead_id, value in session.execute(
+            select(Lead.id, column).where(column.in_(values))
+        ):
+            found.setdefault((kind, value), lead_id)
+
+    return found
+
+
+def _import_chunk(session, first_row, records, default_source, known, report):
+
+    cleaned = []
+
+    for row_number, record in enumerate(records, start=first_row):
+        try:
+            cleaned.append(clean_record(record, default_source))
+
+        except ValueError as e:
+            report["errors"].append({"row": row_number, "error": str(e)})
+
+    # Leads the file or the database already has (phone first, then email)
+    wanted_phones = {r["phone_key"] for r in cleaned if r["phone_key"] and ("phone", r["phone_key"]) not in known}
+    wanted_emails = {r["email_key"] for r in cleaned if r["email_key"] and ("email", r["email_key"]) not in known}
+
+    known.update(_existing_leads(session, wanted_phones, wanted_emails))
+
+    new_leads = {}  # lead key -> lead row, one per new client in this chunk
+    new_keys = {}   # each phone / email key of those clients -> lead key
+    rows = []       # (record, existing lead id, new lead key)
+
+    for r in cleaned:
+
+        keys = [key for key in (("phone", r["phone_key"]), ("email", r["email_key"])) if key[1]]
+
+        lead_id = next((known[key] for key in keys if key in known), None)
+
+        if lead_id:
+            rows.append((r, lead_id, None))
+            continue
+
+        lead_key = next((new_keys[key] for key in keys if key in new_keys), None)
+
+        if lead_key is None:
+
+            lead_key = keys[0]
+
+            new_leads[lead_key] = {
+                "name": r["name"],
+                "phone": r["phone"],
+                "email": r["email"],
+                "phone_key": r["phone_key"],
+                "email_key": r["email_key"],
+                "source": r["source"]
+            }
+
+        for key in keys:
+            new_keys.setdefault(key, lead_key)
+
+        rows.append((r, None, lead_key))
+
+    # Indexed for search once per chunk rather than by a trigger per row
+    with search.deferred_indexing(session):
+
+        # The new leads' ids are read back through the same indexed lookup
+        # (ordered RETURNING costs one INSERT per row on SQLite)
+        bulk_insert(session, Lead, list(new_leads.values()))
+
+        known.update(_existing_leads(
+            session,
+            {key[1] for key in new_keys if key[0] == "phone"},
+            {key[1] for key in new_keys if key[0] == "email"}
+        ))
+
+        created = {lead_key: known[lead_key] for lead_key in new_leads}
+
+        # A second phone / email seen for a new client in this chunk
+        for key, lead_key in new_keys.items():
+            known[key] = created[lead_key]
+
+        # One enquiry per row that names a trip
+        queries = [
+            {
+                "lead_id": lead_id or created[lead_key],
+                "destination": r["destination"],
+                "travel_date": r["travel_date"],
+                "pax": r["pax"],
+                "budget": r["budget"],
+                "notes": r["notes"],
+                "status": r["status"]
+            }
+            for r, lead_id, lead_key in rows
+            if r["destination"]
+        ]
+
+        bulk_insert(session, Query, queries)
+
+    session.commit()
+
+    report["leads_created"] += len(created)
+    report["leads_reused"] += len(rows) - len(created)
+    report["queries_created"] += len(queries)
+
+
+def import_leads(session, source, filename, default_source="Import", progress=None, chunk_rows=IMPORT_CHUNK_ROWS):
+
+    # Returns a report; rows that cannot be imported are listed in
+    # report["errors"] and skipped. Each chunk is its own transaction, so
+    # an interrupted import keeps the chunks before it.
+    started = time.perf_counter()
+
+    report = {
+        "rows": 0,
+        "leads_created": 0,
+        "leads_reused": 0, # rows that belonged to an existing or earlier client
+        "queries_created": 0,
+        "errors": [],
+        "elapsed_seconds": 0.0,
+        "rows_per_second": 0.0
+    }
+
+    known = {}
+
+    for first_row, records in read_chunks(source, filename, chunk_rows=chunk_rows):
+
+        _import_chunk(session, first_row, records, default_source, known, report)
+
+        report["rows"] += len(records)
+
+        elapsed = time.perf_counter() - started
+        report["elapsed_seconds"] = elapsed
+        report["rows_per_second"] = report["rows"] / elapsed if elapsed else 0.0
+
+        if progress:
+            progress(report)
+
+    return report
@@ -0,0 +1,300 @@
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
+
+import config
+import prompt_cache
+from database import session_scope
+from models import GenerationJob, Query
+
+# ===============================
+# SETTINGS
+# ===============================
+JOB_WORKERS = config.get_int("GENERATION_JOB_WORKERS", 4)
+
+# A running job's worker stamps heartbeat_at this often, however long the
+# generation takes (rate governor waits, retries, fallbacks, backoff)
+JOB_HEARTBEAT_SECONDS = config.get_int("GENERATION_JOB_HEARTBEAT_SECONDS", 30)
+
+# A "running" job with no heartbeat for this long belonged to a process that died
+JOB_STALE_SECONDS = config.get_int("GENERATION_JOB_STALE_SECONDS", 300)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+# ===============================
+# WORKER POOL
+# ===============================
+# One bounded pool per process, shared by every Streamlit session, so jobs
+# keep running when the consultant navigates away or closes the tab.
+_executor = None
+_executor_lock = threading.Lock()
+
+_resume_lock = threading.Lock()
+_resumed = False
+
+
+def _get_executor():
+
+    global _executor
+
+    with _executor_lock:
+
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=JOB_WORKERS,
+                thread_name_prefix="generation-job"
+            )
+
+        return _executor
+
+
+def job_label(job_id):
+
+    # How a job identifies itself in the rate governor's wait queue
+    return f"job-{job_id}"
+
+
+def _heartbeat(job_id, stop):
+
+    while not stop.wait(JOB_HEARTBEAT_SECONDS):
+
+        try:
+            with session_scope() as session:
+                session.execute(
+                    update(GenerationJob)
+                    .where(GenerationJob.id == job_id, GenerationJob.status == "running")
+                    .values(heartbeat_at=datetime.datetime.utcnow())
+                )
+
+        # A missed beat (e.g. database busy) is retried on the next one
+        except Exception:
+            continue
+
+
+def _finish(session, job_id, claimed_at, **values):
+
+    # Only while this worker still owns the job - if it was presumed dead and
+    # requeued, the new run's result wins. Returns whether it was written.
+    return session.execute(
+        update(GenerationJob)
+        .where(
+            GenerationJob.id == job_id,
+            GenerationJob.status == "running",
+            GenerationJob.started_at == claimed_at
+        )
+        .values(finished_at=datetime.datetime.utcnow(), **values)
+    ).rowcount > 0
+
+
+def _run_job(job_id, api_key):
+
+    now = datetime.datetime.utcnow()
+
+    # Claim the job atomically - another worker or replica may race for it
+    with session_scope() as session:
+
+        claimed = session.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.status == "queued")
+            .values(status="running", started_at=now, heartbeat_at=now)
+        ).rowcount
+
+    if not claimed:
+        return
+
+    stop = threading.Event()
+
+    threading.Thread(
+        target=_heartbeat,
+        args=(job_id, stop),
+        name=f"generation-job-{job_id}-heartbeat",
+        daemon=True
+    ).start()
+
+    try:
+        with session_scope() as session:
+
+            job = session.get(GenerationJob, job_id)
+
+            result_text, status_msg = prompt_cache.generate_with_cache(
+                session,
+                job.prompt,
+                api_key,
+                force_refresh=bool(job.force_refresh),
+                label=job_label(job_id)
+            )
+
+            owned = _finish(
+                session,
+                job_id,
+                now,
+                status="done" if result_text else "failed",
+                message=status_msg
+            )
+
+            if owned and result_text:
+
+                query = session.get(Query, job.query_id)
+
+                if query is not None:
+                    query.saved_itinerary = result_text
+                    query.status = "Draft Generated"
+
+    except Exception as e:
+
+        with session_scope() as session:
+            _finish(session, job_id, now, status="failed", message=f"Job Error: {str(e)}")
+
+    finally:
+        stop.set()
+
+
+# ===============================
+# PUBLIC API
+# ===============================
+def get_active_job(session, query_id):
+
+    return session.execute(
+        select(GenerationJob)
+        .where(
+            GenerationJob.query_id == query_id,
+            GenerationJob.status.in_(ACTIVE_STATUSES)
+        )
+        .order_by(GenerationJob.id.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def get_latest_job(session, query_id):
+
+    return session.execute(
+        select(GenerationJob)
+        .where(GenerationJob.query_id == query_id)
+        .order_by(GenerationJob.id.desc())
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def is_stale(job):
+
+    # Left "running" by a worker that no longer exists (no recent heartbeat)
+    last_seen = job.heartbeat_at or job.started_at
+
+    return (
+        job.status == "running"
+        and last_seen is not None
+        and last_seen < datetime.datetime.utcnow() - datetime.timedelta(seconds=JOB_STALE_SECONDS)
+    )
+
+
+def recover_stale_jobs(session, api_key):
+
+    # Requeues "running" jobs whose heartbeat stopped JOB_STALE_SECONDS ago
+    # and hands them to this process's pool. Cheap (indexed status), so it
+    # runs on every submit and whenever a status poll sees a stale job - a
+    # restart shortly before the first submission must not leave a job
+    # stuck for good.
+    stale_before = (
+        datetime.datetime.utcnow()
+        - datetime.timedelta(seconds=JOB_STALE_SECONDS)
+    )
+
+    stale = (
+        GenerationJob.status == "running",
+        func.coalesce(GenerationJob.heartbeat_at, GenerationJob.started_at) < stale_before
+    )
+
+    job_ids = session.execute(
+        select(GenerationJob.id).where(*stale).order_by(GenerationJob.id)
+    ).scalars().all()
+
+    if not job_ids:
+        return []
+
+    session.execute(
+        update(GenerationJob)
+        .where(GenerationJob.id.in_(job_ids), *stale)
+        .values(status="queued", started_at=None, heartbeat_at=None),
+        execution_options={"synchronize_session": False}
+    )
+
+    session.commit()
+
+    # A job another replica requeued too is claimed by only one worker
+    for job_id in job_ids:
+        _get_executor().submit(_run_job, job_id, api_key)
+
+    return job_ids
+
+
+def submit_generation_job(session, query_id, prompt_text, api_key, force_refresh=False):
+
+    recover_stale_jobs(session, api_key)
+
+    # One active job per query - a second click just returns the first job
+    active = get_active_job(session, query_id)
+
+    if active is not None:
+        return active.id
+
+    job = GenerationJob(
+        query_id=query_id,
+        prompt=prompt_text,
+        force_refresh=force_refresh,
+        status="queued"
+    )
+
+    session.add(job)
+
+    # The worker reads the job with its own session, so it must be committed.
+    # A concurrent submit for the same query loses on the unique index.
+    try:
+        session.commit()
+
+    except IntegrityError:
+        session.rollback()
+
+        # The winner may already have finished
+        winner = get_active_job(session, query_id) or get_latest_job(session, query_id)
+
+        return winner.id
+
+    _get_executor().submit(_run_job, job.id, api_key)
+
+    return job.id
+
+
+def resume_pending_jobs(api_key):
+
+    # Once per process: pick up jobs queued before a restart and jobs whose
+    # worker died mid-run (later ones are caught by recover_stale_jobs)
+    global _resumed
+
+    with _resume_lock:
+
+        if _resumed:
+            return []
+
+        _resumed = True
+
+    with session_scope() as session:
+
+        recovered = recover_stale_jobs(session, api_key)
+
+        job_ids = session.execute(
+            select(GenerationJob.id)
+            .where(
+                GenerationJob.status == "queued",
+                GenerationJob.id.not_in(recovered)
+            )
+            .order_by(GenerationJob.id)
+        ).scalars().all()
+
+    for job_id in job_ids:
+        _get_executor().submit(_run_job, job_id, api_key)
+
+    return recovered + job_ids
@@ -1,19 +1,11 @@
 import streamlit as st
-import pandas as pd
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey, Text, DateTime
-from sqlalchemy.orm import sessionmaker, declarative_base, relationship
-import datetime
 import os
-import time
 import tempfile
-import re
-import requests
 
-# Official Google Library
-import google.generativeai as genai
-from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
-
-from fpdf import FPDF
+# Heavy libraries are imported by the code that needs them, not here:
+# pandas where a table is drawn, google.generativeai on the first Gemini
+# call (ai_engine), fpdf on the first PDF render (pdf_cache). Pages that use
+# none of them never pay for them. See startup_profile.py.
 
 # ===============================
 # 1. PAGE CONFIGURATION
@@ -27,843 +19,1395 @@ st.set_page_config(
 # ===============================
 # 2. DATABASE SETUP
 # ===============================
-DATABASE_URL = "sqlite:///pristine_crm.db"
-
-Base = declarative_base()
+# Engine and pool are process-wide (database.py); each rerun gets its own
+# session, committed or rolled back by session_scope() at the end of the page
+from database import init_db, session_scope, get_data_version
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
-
-SessionLocal = sessionmaker(bind=engine)
-db_session = SessionLocal()
+init_db()
 
 # ===============================
 # 3. DATABASE MODELS
 # ===============================
-class Lead(Base):
-    __tablename__ = "leads"
+from models import Lead, Query, GenerationJob
+
+# ===============================
+# 4. DASHBOARD METRICS & CACHED READS
+# ===============================
+# Plain SQLAlchemy helpers, shared with the command line (cli.py)
+from dashboard import (
+    get_dashboard_metrics,
+    get_active_queries_page,
+    get_recent_open_queries,
+    ACTIVE_QUERY_SORTS
+)
+
+import config
+import contacts
+import dedup
+import exporter
+import importer
+import jobs
+import search
+
+# Read models shared by every session. The first argument is the database's
+# data version: any commit that writes leads, queries or jobs in this
+# process bumps it, so the next rerun misses and re-reads. The TTL only
+# bounds staleness from other processes (command line, other replicas).
+# The engine, session factory and Gemini client are already process-wide
+# singletons (database.py, ai_engine.py), so they need no cache_resource.
+READ_CACHE_TTL = config.get_int("READ_CACHE_TTL", 30)
+
+# Queries offered by the builder's client picker at a time
+QUERY_PICKER_SIZE = config.get_int("QUERY_PICKER_SIZE", 15)
+
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=50, show_spinner=False)
+def cached_dashboard_metrics(data_version):
+
+    with session_scope() as session:
+        return get_dashboard_metrics(session)
+
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=200, show_spinner=False)
+def cached_active_queries_page(data_version, status, sort, cursor, page_size):
+
+    with session_scope() as session:
+        return get_active_queries_page(
+            session,
+            status=status,
+            sort=sort,
+            cursor=cursor,
+            page_size=page_size
+        )
+
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=50, show_spinner=False)
+def cached_recent_open_queries(data_version, limit):
 
-    id = Column(Integer, primary_key=True)
-    name = Column(String)
-    email = Column(String)
-    phone = Column(String)
-    source = Column(String)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    with session_scope() as session:
+        return get_recent_open_queries(session, limit=limit)
 
-    queries = relationship("Query", back_populates="lead")
 
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=200, show_spinner=False)
+def cached_find_queries(data_version, query_text, limit):
 
-class Query(Base):
-    __tablename__ = "queries"
+    with session_scope() as session:
+        return search.find_queries(session, query_text, limit=limit)
 
-    id = Column(Integer, primary_key=True)
-    lead_id = Column(Integer, ForeignKey("leads.id"))
 
-    destination = Column(String)
-    travel_date = Column(String)
-    pax = Column(Integer)
-    budget = Column(String)
-    notes = Column(Text)
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=200, show_spinner=False)
+def cached_query_detail(data_version, query_id):
 
-    # Workflow
-    status = Column(String, default="Pending")
+    # Read-only snapshot for the builder; writes load the ORM row themselves
+    with session_scope() as session:
 
-    saved_itinerary = Column(Text, default="")
-    saved_hotels = Column(Text, default="")
-    saved_price = Column(Text, default="")
+        query = session.get(Query, query_id)
 
-    lead = relationship("Lead", back_populates="queries")
+        if query is None:
+            return None
 
+        active_job = jobs.get_active_job(session, query_id)
+        latest_job = jobs.get_latest_job(session, query_id)
+
+        return {
+            "id": query.id,
+            "client_name": query.lead.name if query.lead else "",
+            "destination": query.destination,
+            "saved_itinerary": query.saved_itinerary,
+            "saved_hotels": query.saved_hotels,
+            "saved_price": query.saved_price,
+            "active_job_id": active_job.id if active_job else None,
+            "latest_job": (
+                {
+                    "id": latest_job.id,
+                    "status": latest_job.status,
+                    "message": latest_job.message
+                }
+                if latest_job else None
+            )
+        }
+
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=200, show_spinner=False)
+def cached_search(data_version, query_text, limit):
+
+    with session_scope() as session:
+        return search.search(session, query_text, limit=limit)
+
+
+@st.cache_data(ttl=READ_CACHE_TTL, max_entries=50, show_spinner=False)
+def cached_prompt_cache_stats(data_version):
+
+    with session_scope() as session:
+        return prompt_cache.get_cache_stats(session)
 
-Base.metadata.create_all(bind=engine)
 
 # ===============================
-# 4. PDF IMPORT
+# 5. PDF IMPORT
 # ===============================
-try:
-    from pdf_maker import create_itinerary_pdf
-except ImportError:
-    create_itinerary_pdf = None
+# Quotes and vouchers are rendered through the content-addressed PDF cache
+import pdf_cache
 
 
 # ===============================
-# 5. VOUCHER PDF ENGINE
+# 6. VOUCHER PDF ENGINE
 # ===============================
-def create_voucher_pdf(
-    client_name,
-    conf_no,
-    hotel_details,
-    check_in,
-    check_out,
-    nights,
-    room_type,
-    inclusions,
-    notes,
-    occupancy_details
-):
-
-    def clean(text):
-        if not text:
-            return ""
-
-        return (
-            str(text)
-            .replace("•", "-")
-            .replace("‘", "'")
-            .replace("’", "'")
-            .replace("“", '"')
-            .replace("”", '"')
-            .replace("–", "-")
-            .replace("—", "-")
-            .encode("latin-1", "ignore")
-            .decode("latin-1")
-        )
+import bulk_vouchers
 
-    client_name = clean(client_name)
-    conf_no = clean(conf_no)
-    hotel_details = clean(hotel_details)
-    check_in = clean(check_in)
-    check_out = clean(check_out)
-    room_type = clean(room_type)
-    inclusions = clean(inclusions)
-    notes = clean(notes)
-    occupancy_details = clean(occupancy_details)
-
-    raw_names = client_name.split(",")
-    stacked_names = "\n".join(
-        [name.strip() for name in raw_names if name.strip()]
-    )
 
-    pdf = FPDF("P", "mm", "A4")
-    pdf.add_page()
+# ===============================
+# 7. GOOGLE AI ENGINE
+# ===============================
+# Model discovery and the configured client are cached process-wide in ai_engine,
+# responses to repeated prompts in the prompt_cache table. Non-streaming
+# generation runs as a background job (jobs.py) off the script thread.
+import ai_engine
+import batch
+import prompt_cache
+import rate_governor
+import resilience
+
 
-    GOLD = (186, 163, 104)
-    LIGHT_GOLD = (252, 251, 248)
-    DARK_TEXT = (40, 40, 40)
-    GREY_TEXT = (100, 100, 100)
+def get_google_api_key():
 
-    # ================= HEADER =================
-    if os.path.exists("logo.png"):
-        pdf.image("logo.png", x=10, y=10, h=25)
+    try:
+        clean_key = st.secrets["GOOGLE_API_KEY"].strip()
 
-    pdf.set_font("Helvetica", "B", 18)
-    pdf.set_text_color(*GOLD)
-    pdf.set_xy(100, 12)
-    pdf.multi_cell(100, 6, "PRISTINE VACATIONS", align="R")
+    except Exception:
+        return None, "API Key missing in Streamlit Secrets."
 
-    pdf.set_font("Helvetica", "", 9)
-    pdf.set_text_color(*GREY_TEXT)
-    pdf.set_xy(100, 19)
+    if not clean_key:
+        return None, "API Key is empty."
 
-    pdf.multi_cell(
-        100,
-        5,
-        "College Road, Ludhiana, India 141001\n+91 161 4613384\ninfo@pristine.in | www.pristinevacations.com",
-        align="R"
-    )
+    return clean_key, None
 
-    pdf.set_draw_color(*GOLD)
-    pdf.line(10, 42, 200, 42)
 
-    pdf.set_y(50)
+def submit_itinerary_job(prompt_text, session, query_id, force_refresh=False):
 
-    # ================= TITLE =================
-    pdf.set_font("Helvetica", "B", 14)
-    pdf.set_text_color(*DARK_TEXT)
+    clean_key, key_error = get_google_api_key()
 
-    pdf.cell(
-        0,
-        8,
-        "H O T E L   A C C O M M O D A T I O N   V O U C H E R",
-        ln=True,
-        align="C"
+    if key_error:
+        return None, key_error
+
+    # Picks up jobs left queued by a previous process (no-op after the first call)
+    jobs.resume_pending_jobs(clean_key)
+
+    job_id = jobs.submit_generation_job(
+        session,
+        query_id,
+        prompt_text,
+        clean_key,
+        force_refresh=force_refresh
     )
 
-    pdf.ln(6)
+    return job_id, None
 
-    # ================= CONFIRMATION =================
-    pdf.set_fill_color(*LIGHT_GOLD)
 
-    pdf.set_font("Helvetica", "B", 9)
-    pdf.cell(95, 8, " CONFIRMATION NO.", fill=True)
-    pdf.cell(95, 8, " BOOKING STATUS", fill=True, ln=True)
+def stream_itinerary_free(prompt_text, session, force_refresh=False):
 
-    pdf.set_font("Helvetica", "", 11)
-    pdf.cell(95, 8, f" {conf_no}", fill=True)
+    clean_key, key_error = get_google_api_key()
 
-    pdf.set_font("Helvetica", "B", 11)
-    pdf.set_text_color(*GOLD)
+    if key_error:
+        raise ai_engine.GenerationError(key_error)
 
-    pdf.cell(
-        95,
-        8,
-        " Confirmed & Guaranteed",
-        fill=True,
-        ln=True
+    return prompt_cache.stream_with_cache(
+        session,
+        prompt_text,
+        clean_key,
+        force_refresh=force_refresh
     )
 
-    pdf.ln(5)
 
-    # ================= GUEST + HOTEL =================
-    pdf.set_text_color(*DARK_TEXT)
+@st.fragment(run_every=2)
+def job_status_panel(job_id):
 
-    pdf.set_font("Helvetica", "B", 9)
-    pdf.cell(95, 8, " GUEST DETAILS", fill=True)
-    pdf.cell(95, 8, " PROPERTY DETAILS", fill=True, ln=True)
+    # Polls only this fragment; the full page reruns once the job has finished
+    with session_scope() as session:
 
-    x = pdf.get_x()
-    y = pdf.get_y()
+        job = session.get(GenerationJob, job_id)
 
-    # LEFT COLUMN
-    pdf.set_xy(x + 2, y + 2)
+        # Its worker died (restart mid-run) - requeue it on this process
+        if job is not None and jobs.is_stale(job):
 
-    pdf.set_font("Helvetica", "B", 11)
-    pdf.multi_cell(90, 6, stacked_names)
+            clean_key, key_error = get_google_api_key()
 
-    y_current = pdf.get_y()
+            if not key_error:
+                jobs.recover_stale_jobs(session, clean_key)
+                session.refresh(job)
 
-    pdf.set_xy(x + 2, y_current + 4)
+        status = job.status if job else "failed"
 
-    pdf.set_font("Helvetica", "", 10)
-    pdf.multi_cell(90, 5, occupancy_details)
+    if status in jobs.ACTIVE_STATUSES:
 
-    y_left_end = pdf.get_y()
+        governor = rate_governor.get_governor()
+        position = governor.position(jobs.job_label(job_id))
 
-    # RIGHT COLUMN
-    pdf.set_xy(x + 97, y + 2)
+        if position:
+            st.info(
+                f"⏳ Job #{job_id} is waiting for Gemini capacity: position {position}, "
+                f"about {governor.estimated_wait(position):.0f}s. "
+                "You can keep working or switch pages."
+            )
 
-    hotel_lines = hotel_details.split("\n", 1)
+        else:
+            st.info(f"⏳ Job #{job_id} is {status}... you can keep working or switch pages.")
 
-    pdf.set_font("Helvetica", "B", 12)
-    pdf.multi_cell(90, 6, hotel_lines[0])
+    else:
+        st.rerun()
 
-    if len(hotel_lines) > 1:
-        pdf.set_font("Helvetica", "", 10)
-        pdf.set_x(x + 97)
-        pdf.multi_cell(90, 5, hotel_lines[1])
 
-    y_right_end = pdf.get_y()
+def render_batch_report(report):
 
-    pdf.set_y(max(y_left_end, y_right_end) + 8)
+    finished = report["succeeded"] + report["failed"]
 
-    # ================= DATES =================
-    pdf.set_fill_color(*GOLD)
+    st.progress(
+        finished / report["total"] if report["total"] else 1.0,
+        text=f"{finished}/{report['total']} finished, {report['failed']} failed"
+    )
 
-    pdf.set_text_color(255, 255, 255)
+    m1, m2, m3 = st.columns(3)
 
-    pdf.set_font("Helvetica", "B", 9)
+    m1.metric(
+        "Throughput",
+        f"{report['per_minute']:.1f}/min" if report["per_minute"] else "-"
+    )
+    m2.metric(
+        "p50 Latency",
+        f"{report['p50_latency_seconds']:.1f}s" if report["p50_latency_seconds"] is not None else "-"
+    )
+    m3.metric(
+        "p95 Latency",
+        f"{report['p95_latency_seconds']:.1f}s" if report["p95_latency_seconds"] is not None else "-"
+    )
 
-    pdf.cell(63, 8, "CHECK-IN", fill=True, align="C")
-    pdf.cell(64, 8, "NIGHTS", fill=True, align="C")
-    pdf.cell(63, 8, "CHECK-OUT", fill=True, align="C", ln=True)
+    import pandas as pd
 
-    pdf.set_text_color(*DARK_TEXT)
+    st.dataframe(
+        pd.DataFrame(report["results"]),
+        hide_index=True,
+        use_container_width=True
+    )
 
-    pdf.set_font("Helvetica", "", 11)
 
-    pdf.cell(63, 10, check_in, align="C")
-    pdf.cell(64, 10, str(nights), align="C")
-    pdf.cell(63, 10, check_out, align="C", ln=True)
+@st.fragment(run_every=3)
+def batch_status_panel(job_ids):
 
-    pdf.ln(6)
+    # Polls only while jobs are outstanding; the final report is kept in
+    # session_state and the full page reruns once to stop the timer
+    with session_scope() as session:
+        report = batch.summarize_jobs(session, job_ids)
 
-    # ================= ROOM =================
-    pdf.set_fill_color(*LIGHT_GOLD)
+    if report["finished"]:
+        st.session_state['batch_report'] = report
+        del st.session_state['batch_job_ids']
+        st.rerun()
 
-    pdf.set_font("Helvetica", "B", 9)
+    render_batch_report(report)
 
-    pdf.cell(95, 8, " ROOM CATEGORY", fill=True)
-    pdf.cell(95, 8, " INCLUSIONS", fill=True, ln=True)
 
-    x = pdf.get_x()
-    y = pdf.get_y()
+# ===============================
+# 8. SIDEBAR
+# ===============================
+if os.path.exists("logo.png"):
+    st.sidebar.image("logo.png", width=200)
 
-    pdf.set_font("Helvetica", "", 10)
+st.sidebar.title("Navigation")
 
-    pdf.set_xy(x + 2, y + 2)
-    pdf.multi_cell(90, 6, room_type)
+with st.sidebar.expander("🤖 Gemini Capacity"):
 
-    y_room = pdf.get_y()
+    governor_stats = rate_governor.get_governor().snapshot()
 
-    pdf.set_xy(x + 97, y + 2)
-    pdf.multi_cell(90, 6, inclusions)
+    st.caption(
+        f"Admitted {governor_stats['admitted']} · Queued {governor_stats['queued']} · "
+        f"Rejected {governor_stats['rejected']}\n\n"
+        f"Waiting now: {governor_stats['waiting']} · "
+        f"Avg wait {governor_stats['avg_wait_seconds']:.1f}s · "
+        f"Next free slot in {rate_governor.get_governor().estimated_wait():.0f}s"
+    )
 
-    y_inc = pdf.get_y()
+    timing_stats = ai_engine.get_timing_stats()
 
-    pdf.set_y(max(y_room, y_inc) + 8)
+    st.caption("Time to first token: " + " · ".join(
+        f"{kind} {bucket['calls']} calls, "
+        + (f"avg {bucket['avg_seconds']:.1f}s" if bucket["calls"] else "no data")
+        for kind, bucket in timing_stats.items()
+    ))
 
-    # ================= NOTES =================
-    if notes.strip():
+    breaker_states = resilience.breaker_states()
 
-        pdf.set_font("Helvetica", "B", 9)
+    if breaker_states:
+        st.caption("Models: " + " · ".join(
+            f"{name} {state}" for name, state in breaker_states.items()
+        ))
 
-        pdf.cell(
-            0,
-            6,
-            "ARRIVAL & SPECIAL NOTES:",
-            ln=True
-        )
+    draft_stats = cached_prompt_cache_stats(get_data_version())
 
-        pdf.set_font("Helvetica", "", 10)
+    st.caption(
+        f"Cached drafts: {draft_stats['entries']} · Hits {draft_stats['hits']} · "
+        f"{draft_stats['size_bytes'] / 1048576:.1f} MB"
+    )
 
-        pdf.multi_cell(0, 5, notes)
+    st.download_button(
+        "Download Metrics",
+        rate_governor.metrics_text(),
+        file_name="gemini_governor.prom",
+        mime="text/plain"
+    )
 
-        pdf.ln(6)
+with st.sidebar.expander("📄 PDF Cache"):
 
-    # ================= IMPORTANT INFO =================
-    pdf.set_font("Helvetica", "B", 9)
+    pdf_stats = pdf_cache.get_cache_stats()
 
-    pdf.cell(
-        0,
-        6,
-        "IMPORTANT INFORMATION:",
-        ln=True
+    st.caption(
+        f"Hits {pdf_stats['hits']} · Misses {pdf_stats['misses']} · "
+        f"Evicted {pdf_stats['evictions']}\n\n"
+        f"{pdf_stats['entries']} PDFs, "
+        f"{pdf_stats['size_bytes'] / 1048576:.1f} of "
+        f"{pdf_stats['max_bytes'] / 1048576:.0f} MB"
     )
 
-    pdf.set_font("Helvetica", "", 9)
+menu = st.sidebar.radio(
+    "Go to:",
+    [
+        "Dashboard",
+        "New Enquiry",
+        "AI Itinerary Builder",
+        "Voucher Generator",
+        "Data Tools"
+    ]
+)
 
-    safe_info = (
-        "- Please present this voucher and a valid Passport/ID upon arrival.\n"
-        "- Standard check-in time is 14:00/15:00 hrs and check-out is 12:00 hrs.\n"
-        "- Incidental charges/City Tax/Resort Fee to be settled directly with the hotel."
-    )
+# ===============================
+# 9. PAGES
+# ===============================
+with session_scope() as db_session:
 
-    pdf.multi_cell(0, 5, safe_info)
+    # ===============================
+    # DASHBOARD
+    # ===============================
+    if menu == "Dashboard":
 
-    # ================= FOOTER =================
-    pdf.ln(15)
+        st.title("📊 Agency Dashboard")
 
-    pdf.set_draw_color(*GOLD)
-    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        import pandas as pd
 
-    pdf.ln(5)
+        metrics = cached_dashboard_metrics(get_data_version())
 
-    pdf.set_font("Helvetica", "", 9)
-    pdf.set_text_color(*GREY_TEXT)
+        c1, c2, c3, c4 = st.columns(4)
 
-    pdf.cell(
-        0,
-        5,
-        "PRISTINE VACATIONS | www.pristinevacations.com",
-        align="C"
-    )
+        c1.metric("Total Leads", metrics["total_leads"])
+        c2.metric("Active Queries", metrics["active_queries"])
+        c3.metric("Quotes Sent", metrics["quoted"])
+        c4.metric("Pending", metrics["pending"])
 
-    # ================= SAFE FILE GENERATION =================
-    temp_file = tempfile.NamedTemporaryFile(
-        delete=False,
-        suffix=".pdf"
-    )
+        if metrics["by_status"]:
 
-    pdf.output(temp_file.name)
+            with st.expander("Queries by Status"):
 
-    with open(temp_file.name, "rb") as f:
-        pdf_bytes = f.read()
+                st.dataframe(
+                    pd.DataFrame(
+                        sorted(metrics["by_status"].items()),
+                        columns=["Status", "Queries"]
+                    ),
+                    hide_index=True,
+                    use_container_width=True
+                )
 
-    os.remove(temp_file.name)
+        st.markdown("---")
 
-    return pdf_bytes
+        search_text = st.text_input(
+            "🔍 Search",
+            placeholder="Client name, phone, email, destination or anything in a saved itinerary"
+        )
 
+        if search_text.strip():
+
+            results = cached_search(get_data_version(), search_text, search.SEARCH_RESULT_LIMIT)
+
+            if results:
+                st.dataframe(
+                    pd.DataFrame(
+                        [
+                            {
+                                "Query ID": r["query_id"],
+                                "Client": r["client"],
+                                "Phone": r["phone"],
+                                "Destination": r["destination"],
+                                "Travel Date": r["travel_date"],
+                                "Status": r["status"],
+                                "Match": r["match"]
+                            }
+                            for r in results
+                        ]
+                    ),
+                    hide_index=True,
+                    use_container_width=True
+                )
 
-# ===============================
-# 6. GOOGLE AI ENGINE
-# ===============================
-def generate_itinerary_free(prompt_text):
+            else:
+                st.info("No matches.")
 
-    try:
-        clean_key = st.secrets["GOOGLE_API_KEY"].strip()
+        st.subheader("Active Queries")
 
-    except Exception:
-        return None, "API Key missing in Streamlit Secrets."
+        if metrics["active_queries"]:
 
-    if not clean_key:
-        return None, "API Key is empty."
+            f1, f2, f3 = st.columns(3)
 
-    genai.configure(api_key=clean_key)
+            status_filter = f1.selectbox(
+                "Status",
+                ["All"] + sorted(metrics["by_status"].keys())
+            )
 
-    try:
-        available_models = [
-            m.name
-            for m in genai.list_models()
-            if 'generateContent' in m.supported_generation_methods
-        ]
+            sort_by = f2.selectbox("Sort By", ACTIVE_QUERY_SORTS)
 
-        chosen_model = None
+            page_size = f3.selectbox("Rows per Page", [25, 50, 100])
 
-        preferred_models = [
-            'models/gemini-2.5-flash',
-            'models/gemini-2.0-flash',
-            'models/gemini-flash-latest',
-            'models/gemini-2.5-pro',
-            'models/gemini-pro-latest'
-        ]
+            # Cursor stack: one entry per visited page, reset when filters change
+            filter_key = (status_filter, sort_by, page_size)
 
-        for preferred in preferred_models:
-            if preferred in available_models:
-                chosen_model = preferred
-                break
+            if st.session_state.get('aq_filter_key') != filter_key:
+                st.session_state['aq_filter_key'] = filter_key
+                st.session_state['aq_cursors'] = [None]
 
-        if not chosen_model:
-            return None, "No compatible Gemini model found."
+            cursors = st.session_state['aq_cursors']
 
-    except Exception as e:
-        return None, f"Google connection failed: {str(e)}"
+            data, next_cursor = cached_active_queries_page(
+                get_data_version(),
+                None if status_filter == "All" else status_filter,
+                sort_by,
+                cursors[-1],
+                page_size
+            )
 
-    clean_model_name = chosen_model.replace("models/", "")
+            st.dataframe(
+                pd.DataFrame(data),
+                hide_index=True,
+                use_container_width=True
+            )
 
-    model = genai.GenerativeModel(clean_model_name)
+            p1, p2, p3 = st.columns([1, 1, 4])
 
-    for attempt in range(3):
+            if p1.button("⬅️ Previous", disabled=len(cursors) == 1):
+                cursors.pop()
+                st.rerun()
 
-        try:
-            response = model.generate_content(prompt_text)
+            if p2.button("Next ➡️", disabled=next_cursor is None):
+                cursors.append(next_cursor)
+                st.rerun()
 
-            return response.text, f"Success using {clean_model_name}"
+            p3.caption(f"Page {len(cursors)}")
 
-        except ResourceExhausted:
-            time.sleep(5)
+        else:
+            st.info("No queries found.")
 
-        except ServiceUnavailable:
-            time.sleep(5)
+    # ===============================
+    # NEW ENQUIRY
+    # ===============================
+    elif menu == "New Enquiry":
 
-        except Exception as e:
-            return None, f"Google Error: {str(e)}"
+        st.title("📝 New Booking Enquiry")
 
-    return None, "Google servers are busy. Please try again later."
+        with st.form("lead_form"):
 
+            c1, c2 = st.columns(2)
 
-# ===============================
-# 7. SIDEBAR
-# ===============================
-if os.path.exists("logo.png"):
-    st.sidebar.image("logo.png", width=200)
+            name = c1.text_input("Client Name")
+            phone = c2.text_input("Phone Number")
 
-st.sidebar.title("Navigation")
+            email = c1.text_input("Email")
 
-menu = st.sidebar.radio(
-    "Go to:",
-    [
-        "Dashboard",
-        "New Enquiry",
-        "AI Itinerary Builder",
-        "Voucher Generator"
-    ]
-)
+            source = c2.selectbox(
+                "Source",
+                ["Instagram", "Referral", "Website", "Walk-in"]
+            )
 
-# ===============================
-# DASHBOARD
-# ===============================
-if menu == "Dashboard":
+            st.markdown("---")
 
-    st.title("📊 Agency Dashboard")
+            st.subheader("Trip Details")
 
-    leads = db_session.query(Lead).all()
-    queries = db_session.query(Query).all()
+            dest = st.text_input("Destination")
 
-    c1, c2, c3, c4 = st.columns(4)
+            travel_date = st.date_input("Travel Date")
 
-    c1.metric("Total Leads", len(leads))
-    c2.metric("Active Queries", len(queries))
+            pax = st.number_input(
+                "No. of Pax",
+                min_value=1
+            )
 
-    quoted = len([q for q in queries if q.status == "Quoted"])
+            budget = st.text_input("Budget (Approx)")
 
-    c3.metric("Quotes Sent", quoted)
-    c4.metric("Pending", len(queries) - quoted)
+            notes = st.text_area("Requirements / Notes")
 
-    st.markdown("---")
+            link_existing = st.checkbox(
+                "Add to the existing client when the phone or email matches",
+                value=True
+            )
 
-    st.subheader("Active Queries")
+            if st.form_submit_button("Save Enquiry"):
 
-    if queries:
+                if name and dest:
 
-        data = []
+                    # A returning client keeps one lead and a history of trips
+                    lead = (
+                        dedup.find_matching_lead(db_session, phone, email)
+                        if link_existing else None
+                    )
 
-        for q in queries:
+                    returning_client = lead is not None
 
-            data.append({
-                "Client": q.lead.name,
-                "Destination": q.destination,
-                "Travel Date": q.travel_date,
-                "Status": q.status,
-                "Last Saved": "✅" if q.saved_itinerary else "❌"
-            })
+                    if lead is None:
 
-        st.dataframe(
-            pd.DataFrame(data),
-            use_container_width=True
-        )
+                        # Stored normalized, the same way the importer stores them
+                        lead = Lead(
+                            name=name,
+                            email=contacts.normalize_email(email) or email,
+                            phone=contacts.normalize_phone(phone) or phone,
+                            source=source
+                        )
 
-    else:
-        st.info("No queries found.")
+                    new_query = Query(
+                        lead=lead,
+                        destination=dest,
+                        travel_date=str(travel_date),
+                        pax=pax,
+                        budget=budget,
+                        notes=notes
+                    )
 
-# ===============================
-# NEW ENQUIRY
-# ===============================
-elif menu == "New Enquiry":
+                    # Lead and query in one transaction
+                    db_session.add(new_query)
+                    db_session.commit()
 
-    st.title("📝 New Booking Enquiry")
+                    if returning_client:
+                        st.success(
+                            f"✅ Saved to existing client {lead.name} "
+                            f"(Lead ID: {lead.id}, matched on phone/email)."
+                        )
 
-    with st.form("lead_form"):
+                    else:
+                        st.success(f"✅ Saved! Lead ID: {lead.id}")
 
-        c1, c2 = st.columns(2)
+                else:
+                    st.error("⚠️ Name and Destination required.")
 
-        name = c1.text_input("Client Name")
-        phone = c2.text_input("Phone Number")
+    # ===============================
+    # AI ITINERARY BUILDER
+    # ===============================
+    elif menu == "AI Itinerary Builder":
 
-        email = c1.text_input("Email")
+        st.header("✨ Smart Itinerary Creator")
 
-        source = c2.selectbox(
-            "Source",
-            ["Instagram", "Referral", "Website", "Walk-in"]
-        )
+        with st.expander("⚡ Batch Generate Pending Queries"):
 
-        st.markdown("---")
+            pending_count = cached_dashboard_metrics(get_data_version())["by_status"].get("Pending", 0)
+
+            st.caption(
+                f"{pending_count} queries are Pending. Drafts are built from each "
+                "query's destination, travel date and notes, and saved as 'Draft Generated'."
+            )
+
+            b1, b2 = st.columns(2)
+
+            batch_limit = b1.number_input(
+                "Queries to Generate",
+                min_value=1,
+                max_value=max(pending_count, 1),
+                value=min(max(pending_count, 1), 20)
+            )
+
+            batch_force = b2.checkbox(
+                "Force regenerate",
+                key="batch_force"
+            )
+
+            if st.button("Queue Batch", disabled=pending_count == 0):
+
+                clean_key, key_error = get_google_api_key()
 
-        st.subheader("Trip Details")
+                if key_error:
+                    st.error(key_error)
 
-        dest = st.text_input("Destination")
+                else:
+
+                    jobs.resume_pending_jobs(clean_key)
+                    st.session_state.pop('batch_report', None)
+
+                    # Runs on the shared job pool, bounded by GENERATION_JOB_WORKERS
+                    st.session_state['batch_job_ids'] = [
+                        jobs.submit_generation_job(
+                            db_session,
+                            batch_query.id,
+                            batch.prompt_for_query(batch_query),
+                            clean_key,
+                            force_refresh=batch_force
+                        )
+                        for batch_query in (
+                            db_session.get(Query, query_id)
+                            for query_id in batch.select_queries(
+                                db_session,
+                                status="Pending",
+                                limit=batch_limit
+                            )
+                        )
+                    ]
+
+            if st.session_state.get('batch_job_ids'):
+                batch_status_panel(st.session_state['batch_job_ids'])
 
-        travel_date = st.date_input("Travel Date")
+            elif st.session_state.get('batch_report'):
+                render_batch_report(st.session_state['batch_report'])
 
-        pax = st.number_input(
-            "No. of Pax",
-            min_value=1
+            if st.session_state.get('batch_job_ids') or st.session_state.get('batch_report'):
+
+                if st.button("Clear Batch Report"):
+                    st.session_state.pop('batch_job_ids', None)
+                    st.session_state.pop('batch_report', None)
+                    st.rerun()
+
+        # Only the top matches (or the newest open queries) are ever loaded,
+        # however many enquiries the agency has taken over the years
+        p1, p2 = st.columns([2, 3])
+
+        find_text = p1.text_input(
+            "Find Client",
+            placeholder="Query ID, name, phone or destination"
         )
 
-        budget = st.text_input("Budget (Approx)")
+        if find_text.strip():
 
-        notes = st.text_area("Requirements / Notes")
+            picks = cached_find_queries(get_data_version(), find_text, QUERY_PICKER_SIZE)
 
-        if st.form_submit_button("Save Enquiry"):
+            if not picks:
+                p1.caption("No matches.")
 
-            if name and dest:
+        else:
+            picks = cached_recent_open_queries(get_data_version(), QUERY_PICKER_SIZE)
 
-                new_lead = Lead(
-                    name=name,
-                    email=email,
-                    phone=phone,
-                    source=source
-                )
+        query_options = {
+            f"{p['query_id']}: {p['client']} ({p['destination']}) · {p['status']}": p["query_id"]
+            for p in picks
+        }
 
-                db_session.add(new_lead)
-                db_session.commit()
+        # The query being worked on stays selected while searching for another
+        current_id = st.session_state.get('current_query_id')
 
-                new_query = Query(
-                    lead_id=new_lead.id,
-                    destination=dest,
-                    travel_date=str(travel_date),
-                    pax=pax,
-                    budget=budget,
-                    notes=notes
-                )
+        if current_id and current_id not in query_options.values():
 
-                db_session.add(new_query)
-                db_session.commit()
+            current = cached_query_detail(get_data_version(), current_id)
 
-                st.success(f"✅ Saved! Lead ID: {new_lead.id}")
+            if current:
+                query_options = {
+                    f"{current_id}: {current['client_name']} ({current['destination']})": current_id,
+                    **query_options
+                }
 
-            else:
-                st.error("⚠️ Name and Destination required.")
+        if not query_options:
+            st.info("No matching enquiries." if find_text.strip() else "No open enquiries.")
+            st.stop()
 
-# ===============================
-# AI ITINERARY BUILDER
-# ===============================
-elif menu == "AI Itinerary Builder":
+        option_ids = list(query_options.values())
 
-    st.header("✨ Smart Itinerary Creator")
+        selected_query_label = p2.selectbox(
+            "Select Client",
+            list(query_options.keys()),
+            index=option_ids.index(current_id) if current_id in option_ids else 0,
+            help="Newest open queries; type in Find Client to search all of them"
+        )
 
-    queries = db_session.query(Query).all()
+        selected_query = (
+            cached_query_detail(get_data_version(), query_options[selected_query_label])
+            if selected_query_label else None
+        )
 
-    if not queries:
-        st.info("No enquiries found.")
-        st.stop()
+        if selected_query:
 
-    query_options = {
-        f"{q.id}: {q.lead.name} ({q.destination})": q
-        for q in queries
-    }
+            if (
+                'current_query_id' not in st.session_state
+                or st.session_state['current_query_id'] != selected_query["id"]
+            ):
 
-    selected_query_label = st.selectbox(
-        "Select Client",
-        list(query_options.keys())
-    )
+                st.session_state['current_query_id'] = selected_query["id"]
 
-    if selected_query_label:
+                st.session_state['generated_itinerary'] = (
+                    selected_query["saved_itinerary"] or ""
+                )
 
-        selected_query = query_options[selected_query_label]
+                st.session_state['saved_hotels'] = (
+                    selected_query["saved_hotels"]
+                    or "Option 1: Hilton (BB)\nOption 2: Marriott (BB)"
+                )
 
-        if (
-            'current_query_id' not in st.session_state
-            or st.session_state['current_query_id'] != selected_query.id
-        ):
+                st.session_state['saved_price'] = (
+                    selected_query["saved_price"]
+                    or "Total Cost: INR 1,50,000"
+                )
 
-            st.session_state['current_query_id'] = selected_query.id
+                # Results of jobs finished before this point are already loaded
+                latest_job = selected_query["latest_job"]
 
-            st.session_state['generated_itinerary'] = (
-                selected_query.saved_itinerary or ""
+                st.session_state['seen_job_id'] = (
+                    latest_job["id"] if latest_job else None
+                )
+
+            col1, col2 = st.columns(2)
+
+            with col1:
+                start_date = st.date_input("Trip Start Date")
+
+                split_stay = st.text_input(
+                    "Structure",
+                    placeholder="e.g. 3N Mara, 1N Nairobi"
+                )
+
+            with col2:
+                sightseeing = st.text_area(
+                    "Major Sightseeing",
+                    placeholder="e.g. Museum of the Future"
+                )
+
+            pnr_text = st.text_area(
+                "Flight Details",
+                height=70
             )
 
-            st.session_state['saved_hotels'] = (
-                selected_query.saved_hotels
-                or "Option 1: Hilton (BB)\nOption 2: Marriott (BB)"
+            g1, g2 = st.columns(2)
+
+            force_refresh = g1.checkbox(
+                "Force regenerate (skip cached draft)",
+                value=False
             )
 
-            st.session_state['saved_price'] = (
-                selected_query.saved_price
-                or "Total Cost: INR 1,50,000"
+            stream_output = g2.checkbox(
+                "Stream into editor (waits on this page)",
+                value=False
             )
 
-        col1, col2 = st.columns(2)
+            if st.button(
+                "Generate Draft Itinerary",
+                type="primary"
+            ):
+
+                prompt = ai_engine.build_itinerary_prompt(
+                    selected_query["destination"],
+                    start_date,
+                    structure=split_stay,
+                    pnr=pnr_text,
+                    highlights=sightseeing
+                )
 
-        with col1:
-            start_date = st.date_input("Trip Start Date")
+                if stream_output:
 
-            split_stay = st.text_input(
-                "Structure",
-                placeholder="e.g. 3N Mara, 1N Nairobi"
-            )
+                    wait_estimate = rate_governor.get_governor().estimated_wait()
 
-        with col2:
-            sightseeing = st.text_area(
-                "Major Sightseeing",
-                placeholder="e.g. Museum of the Future"
-            )
+                    if wait_estimate >= 1:
+                        st.caption(f"Waiting about {wait_estimate:.0f}s for Gemini capacity...")
 
-        pnr_text = st.text_area(
-            "Flight Details",
-            height=70
-        )
+                    # Render chunks as they arrive; only a complete draft is saved
+                    streamed_parts = []
+
+                    def tracked_stream():
+                        for chunk in stream_itinerary_free(
+                            prompt,
+                            db_session,
+                            force_refresh=force_refresh
+                        ):
+                            streamed_parts.append(chunk)
+                            yield chunk
+
+                    try:
+                        with st.container(border=True):
+                            st.write_stream(tracked_stream())
+
+                        result_text = "".join(streamed_parts)
+                        status_msg = "Draft streamed and saved."
+
+                    except ai_engine.GenerationError as e:
+
+                        result_text = None
+                        status_msg = str(e)
 
-        if st.button(
-            "Generate Draft Itinerary",
-            type="primary"
-        ):
+                        if streamed_parts:
 
-            with st.spinner("Generating AI Itinerary..."):
+                            # Keep the partial text in the editor, unsaved
+                            st.session_state['generated_itinerary'] = "".join(streamed_parts)
 
-                prompt = f"""
-                Act as a Senior Consultant for Pristine Vacations.
+                            status_msg += (
+                                " The partial draft is in the editor below"
+                                " but has NOT been saved."
+                            )
 
-                Create a luxury structured itinerary for:
-                {selected_query.destination}
+                else:
 
-                DETAILS:
-                - Start Date: {start_date}
-                - Structure: {split_stay}
-                - Flight PNR: {pnr_text}
-                - Highlights: {sightseeing}
+                    # Background job: the page stays responsive and the result
+                    # is written to the query even if the consultant navigates away
+                    result_text = None
 
-                STRICT FORMAT:
-                Day X: [Date] - [Highlight]
-                """
+                    job_id, status_msg = submit_itinerary_job(
+                        prompt,
+                        db_session,
+                        selected_query["id"],
+                        force_refresh=force_refresh
+                    )
 
-                result_text, status_msg = generate_itinerary_free(prompt)
+                    if job_id:
+                        st.rerun()
 
                 if result_text:
 
                     st.session_state['generated_itinerary'] = result_text
 
-                    selected_query.saved_itinerary = result_text
-                    selected_query.status = "Draft Generated"
+                    query_row = db_session.get(Query, selected_query["id"])
+
+                    query_row.saved_itinerary = result_text
+                    query_row.status = "Draft Generated"
 
                     db_session.commit()
 
-                    st.success(status_msg)
+                    # Shown after the rerun below
+                    st.session_state['generation_status'] = status_msg
 
                     st.rerun()
 
                 else:
                     st.error(status_msg)
 
-        if st.session_state['generated_itinerary']:
+            if st.session_state.get('generation_status'):
+                st.success(st.session_state.pop('generation_status'))
 
-            st.markdown("---")
+            if selected_query["active_job_id"]:
+                job_status_panel(selected_query["active_job_id"])
+
+            else:
+
+                latest_job = selected_query["latest_job"]
+
+                if latest_job and latest_job["id"] != st.session_state.get('seen_job_id'):
+
+                    st.session_state['seen_job_id'] = latest_job["id"]
+
+                    if latest_job["status"] == "done":
+                        st.session_state['generated_itinerary'] = (
+                            selected_query["saved_itinerary"] or ""
+                        )
+                        st.success(latest_job["message"])
+
+                    else:
+                        st.error(latest_job["message"])
+
+            if st.session_state['generated_itinerary']:
+
+                st.markdown("---")
+
+                st.subheader("1. Itinerary Content")
+
+                final_text = st.text_area(
+                    "Edit Itinerary:",
+                    value=st.session_state['generated_itinerary'],
+                    height=500
+                )
+
+                col_a, col_b = st.columns(2)
+
+                with col_a:
+
+                    st.subheader("2. Accommodation")
+
+                    hotel_text = st.text_area(
+                        "Enter Hotel Details:",
+                        value=st.session_state['saved_hotels'],
+                        height=200
+                    )
+
+                with col_b:
+
+                    st.subheader("3. Investment")
+
+                    price_text = st.text_area(
+                        "Enter Final Price:",
+                        value=st.session_state['saved_price'],
+                        height=200
+                    )
+
+                c1, c2 = st.columns(2)
+
+                with c1:
+
+                    if st.button("💾 Save Progress"):
+
+                        query_row = db_session.get(Query, selected_query["id"])
 
-            st.subheader("1. Itinerary Content")
+                        query_row.saved_itinerary = final_text
+                        query_row.saved_hotels = hotel_text
+                        query_row.saved_price = price_text
 
-            final_text = st.text_area(
-                "Edit Itinerary:",
-                value=st.session_state['generated_itinerary'],
-                height=500
+                        query_row.status = "Work in Progress"
+
+                        db_session.commit()
+
+                        st.success("Saved!")
+
+                with c2:
+
+                    quote_inputs = dict(
+                        client_name=selected_query["client_name"],
+                        destination=selected_query["destination"],
+                        itinerary_text=final_text,
+                        hotel_details=hotel_text,
+                        price_text=price_text
+                    )
+
+                    finalize_clicked = st.button("📄 Finalize & Download PDF")
+
+                    # Keyed (which loads the PDF engine) only once a quote
+                    # has been finalized in this session
+                    quote_key = (
+                        pdf_cache.itinerary_key(**quote_inputs)
+                        if finalize_clicked or st.session_state.get('quote_pdf_key')
+                        else None
+                    )
+
+                    if finalize_clicked:
+                        st.session_state['quote_pdf_key'] = quote_key
+
+                    # The download stays offered across reruns until the
+                    # content changes; repeats are served from the PDF cache
+                    if quote_key and st.session_state.get('quote_pdf_key') == quote_key:
+
+                        try:
+
+                            pdf_data, pdf_hit = pdf_cache.itinerary_pdf(**quote_inputs)
+
+                            st.download_button(
+                                label="Click to Save PDF",
+                                data=pdf_data,
+                                file_name=f"Quote_{selected_query['client_name']}.pdf",
+                                mime="application/pdf"
+                            )
+
+                            if pdf_hit:
+                                st.caption("Unchanged since last render - served from the PDF cache.")
+
+                        except Exception as e:
+                            st.error(f"PDF Error: {str(e)}")
+
+
+    # ===============================
+    # VOUCHER GENERATOR
+    # ===============================
+    elif menu == "Voucher Generator":
+
+        st.header("🎟️ Premium Hotel Voucher")
+
+        with st.expander("📦 Bulk Vouchers from CSV / Excel"):
+
+            st.caption(
+                "One row per voucher. Columns: "
+                + ", ".join(bulk_vouchers.VOUCHER_COLUMNS)
+                + ". Nights are worked out from the dates when left blank."
             )
 
-            col_a, col_b = st.columns(2)
+            st.download_button(
+                label="Download CSV Template",
+                data=bulk_vouchers.template_csv(),
+                file_name="voucher_template.csv",
+                mime="text/csv"
+            )
+
+            voucher_sheet = st.file_uploader(
+                "Voucher Sheet",
+                type=["csv", "xlsx"]
+            )
+
+            if voucher_sheet and st.button("Generate All Vouchers"):
+
+                try:
+                    voucher_rows = bulk_vouchers.read_voucher_rows(
+                        voucher_sheet,
+                        voucher_sheet.name
+                    )
+
+                except bulk_vouchers.VoucherSheetError as e:
+                    st.error(str(e))
+                    voucher_rows = []
 
-            with col_a:
+                if voucher_rows:
 
-                st.subheader("2. Accommodation")
+                    bulk_progress = st.progress(0.0, text="Rendering vouchers...")
 
-                hotel_text = st.text_area(
-                    "Enter Hotel Details:",
-                    value=st.session_state['saved_hotels'],
-                    height=200
+                    bulk_report = bulk_vouchers.build_voucher_zip(
+                        voucher_rows,
+                        progress=lambda done, total: bulk_progress.progress(
+                            done / total,
+                            text=f"Rendered {done}/{total}"
+                        )
+                    )
+
+                    st.session_state['bulk_voucher_report'] = bulk_report
+                    st.session_state['bulk_voucher_name'] = (
+                        os.path.splitext(voucher_sheet.name)[0] + "_vouchers.zip"
+                    )
+
+            bulk_report = st.session_state.get('bulk_voucher_report')
+
+            if bulk_report:
+
+                st.success(
+                    f"{bulk_report['rendered']}/{bulk_report['total']} vouchers "
+                    f"rendered in {bulk_report['elapsed_seconds']:.1f}s."
                 )
 
-            with col_b:
+                if bulk_report['errors']:
+                    st.warning(
+                        f"{len(bulk_report['errors'])} rows skipped "
+                        "(also listed in errors.csv inside the ZIP)."
+                    )
+
+                    import pandas as pd
 
-                st.subheader("3. Investment")
+                    st.dataframe(
+                        pd.DataFrame(bulk_report['errors']),
+                        hide_index=True,
+                        use_container_width=True
+                    )
 
-                price_text = st.text_area(
-                    "Enter Final Price:",
-                    value=st.session_state['saved_price'],
-                    height=200
+                st.download_button(
+                    label="⬇️ Download Vouchers (ZIP)",
+                    data=bulk_report['zip_bytes'],
+                    file_name=st.session_state['bulk_voucher_name'],
+                    mime="application/zip"
                 )
 
+        with st.container(border=True):
+
+            st.subheader("1. Guest & Booking Details")
+
             c1, c2 = st.columns(2)
 
-            with c1:
+            v_client = c1.text_area(
+                "Lead Passengers (Separate with commas)",
+                height=100
+            )
 
-                if st.button("💾 Save Progress"):
+            v_occ = c2.text_area(
+                "Occupancy Breakdown",
+                height=100
+            )
 
-                    selected_query.saved_itinerary = final_text
-                    selected_query.saved_hotels = hotel_text
-                    selected_query.saved_price = price_text
+            c3, c4 = st.columns(2)
 
-                    selected_query.status = "Work in Progress"
+            v_conf = c3.text_input(
+                "Hotel Confirmation No."
+            )
 
-                    db_session.commit()
+            v_hotel = c4.text_area(
+                "Property Name & Address",
+                height=68
+            )
+
+            st.subheader("2. Travel Dates")
+
+            d1, d2, d3 = st.columns(3)
+
+            v_in = d1.date_input("Check-In Date")
+            v_out = d2.date_input("Check-Out Date")
+
+            nights = 0
 
-                    st.success("Saved!")
+            if v_in and v_out:
+                nights = (v_out - v_in).days
+
+                if nights < 0:
+                    nights = 0
+
+            d3.metric("Total Nights", nights)
+
+            st.subheader("3. Room & Inclusions")
+
+            r1, r2 = st.columns(2)
+
+            v_room = r1.text_area(
+                "Room Category",
+                height=100
+            )
+
+            v_inc = r2.text_area(
+                "Inclusions",
+                height=100
+            )
+
+            v_notes = st.text_input(
+                "Arrival Information & Notes"
+            )
 
-            with c2:
+            if st.button(
+                "📄 Generate Premium Voucher",
+                type="primary"
+            ):
 
-                if st.button("📄 Finalize & Download PDF"):
+                if v_client and v_conf and v_hotel:
 
                     try:
 
-                        pdf_data = create_itinerary_pdf(
-                            selected_query.lead.name,
-                            selected_query.destination,
-                            final_text,
-                            hotel_text,
-                            price_text
+                        in_str = v_in.strftime("%d %b %Y")
+                        out_str = v_out.strftime("%d %b %Y")
+
+                        pdf_bytes, _ = pdf_cache.voucher_pdf(
+                            client_name=v_client,
+                            conf_no=v_conf,
+                            hotel_details=v_hotel,
+                            check_in=in_str,
+                            check_out=out_str,
+                            nights=nights,
+                            room_type=v_room,
+                            inclusions=v_inc,
+                            notes=v_notes,
+                            occupancy_details=v_occ
+                        )
+
+                        st.success("Voucher generated successfully!")
+
+                        safe_name = (
+                            v_client.split(",")[0]
+                            .strip()
+                            .replace(" ", "_")
                         )
 
                         st.download_button(
-                            label="Click to Save PDF",
-                            data=pdf_data,
-                            file_name=f"Quote_{selected_query.lead.name}.pdf",
+                            label="⬇️ Download Premium Voucher",
+                            data=pdf_bytes,
+                            file_name=f"Hotel_Voucher_{safe_name}.pdf",
                             mime="application/pdf"
                         )
 
                     except Exception as e:
-                        st.error(f"PDF Error: {str(e)}")
+                        st.error(f"Voucher Error: {str(e)}")
 
+                else:
+                    st.warning(
+                        "Please fill mandatory fields."
+                    )
 
-# ===============================
-# VOUCHER GENERATOR
-# ===============================
-elif menu == "Voucher Generator":
+    # ===============================
+    # DATA TOOLS
+    # ===============================
+    elif menu == "Data Tools":
 
-    st.header("🎟️ Premium Hotel Voucher")
+        st.title("🗂️ Data Tools")
 
-    with st.container(border=True):
+        st.subheader("📥 Import Leads & Enquiries")
 
-        st.subheader("1. Guest & Booking Details")
+        st.caption(
+            "CSV or Excel export from Instagram, the website or the old system. "
+            "Columns are matched by name (Name / Full Name, Phone / Mobile, Email, "
+            "Source, Destination, Travel Date, Pax, Budget, Notes). Phones and emails "
+            "are normalized, and a client who already exists (same phone or email) "
+            "gets the new enquiry instead of a second lead."
+        )
 
-        c1, c2 = st.columns(2)
+        st.download_button(
+            label="Download CSV Template",
+            data=importer.template_csv(),
+            file_name="leads_template.csv",
+            mime="text/csv"
+        )
 
-        v_client = c1.text_area(
-            "Lead Passengers (Separate with commas)",
-            height=100
+        leads_file = st.file_uploader(
+            "Leads File",
+            type=["csv", "xlsx"]
         )
 
-        v_occ = c2.text_area(
-            "Occupancy Breakdown",
-            height=100
+        import_source = st.selectbox(
+            "Source (for rows without one)",
+            ["Import", "Instagram", "Website", "Referral", "Walk-in"]
         )
 
-        c3, c4 = st.columns(2)
+        if leads_file and st.button("Import"):
 
-        v_conf = c3.text_input(
-            "Hotel Confirmation No."
-        )
+            import_progress = st.progress(0.0, text="Importing...")
 
-        v_hotel = c4.text_area(
-            "Property Name & Address",
-            height=68
-        )
+            def show_import_progress(report):
 
-        st.subheader("2. Travel Dates")
+                import_progress.progress(
+                    min(leads_file.tell() / max(leads_file.size, 1), 1.0),
+                    text=f"{report['rows']:,} rows · {report['rows_per_second']:,.0f} rows/s"
+                )
 
-        d1, d2, d3 = st.columns(3)
+            try:
+                st.session_state['import_report'] = importer.import_leads(
+                    db_session,
+                    leads_file,
+                    leads_file.name,
+                    default_source=import_source,
+                    progress=show_import_progress
+                )
 
-        v_in = d1.date_input("Check-In Date")
-        v_out = d2.date_input("Check-Out Date")
+            except importer.ImportFileError as e:
+                st.error(str(e))
 
-        nights = 0
+        import_report = st.session_state.get('import_report')
 
-        if v_in and v_out:
-            nights = (v_out - v_in).days
+        if import_report:
 
-            if nights < 0:
-                nights = 0
+            st.success(
+                f"Imported {import_report['rows']:,} rows in "
+                f"{import_report['elapsed_seconds']:.1f}s "
+                f"({import_report['rows_per_second']:,.0f} rows/s)."
+            )
 
-        d3.metric("Total Nights", nights)
+            m1, m2, m3, m4 = st.columns(4)
 
-        st.subheader("3. Room & Inclusions")
+            m1.metric("New Leads", import_report['leads_created'])
+            m2.metric("Existing Clients", import_report['leads_reused'])
+            m3.metric("Enquiries", import_report['queries_created'])
+            m4.metric("Skipped Rows", len(import_report['errors']))
 
-        r1, r2 = st.columns(2)
+            if import_report['errors']:
 
-        v_room = r1.text_area(
-            "Room Category",
-            height=100
-        )
+                import pandas as pd
 
-        v_inc = r2.text_area(
-            "Inclusions",
-            height=100
-        )
+                st.dataframe(
+                    pd.DataFrame(import_report['errors'][:1000]),
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+        st.markdown("---")
 
-        v_notes = st.text_input(
-            "Arrival Information & Notes"
+        st.subheader("🧹 Duplicate Leads")
+
+        st.caption(
+            "Leads with the same phone number or email (however it was typed) "
+            "are one client. Merging keeps the oldest lead, fills in details it "
+            "is missing and moves every enquiry from the duplicates onto it."
         )
 
-        if st.button(
-            "📄 Generate Premium Voucher",
-            type="primary"
-        ):
+        if st.button("Find Duplicates"):
+            st.session_state['dedup_report'] = dedup.merge_duplicates(db_session, dry_run=True)
 
-            if v_client and v_conf and v_hotel:
+        dedup_report = st.session_state.get('dedup_report')
 
-                try:
+        if dedup_report:
 
-                    in_str = v_in.strftime("%d %b %Y")
-                    out_str = v_out.strftime("%d %b %Y")
-
-                    pdf_bytes = create_voucher_pdf(
-                        client_name=v_client,
-                        conf_no=v_conf,
-                        hotel_details=v_hotel,
-                        check_in=in_str,
-                        check_out=out_str,
-                        nights=nights,
-                        room_type=v_room,
-                        inclusions=v_inc,
-                        notes=v_notes,
-                        occupancy_details=v_occ
-                    )
+            if dedup_report['leads_merged']:
+                st.success(
+                    f"Merged {dedup_report['leads_merged']} duplicate leads into "
+                    f"{dedup_report['groups']} clients and moved "
+                    f"{dedup_report['queries_moved']} enquiries "
+                    f"({dedup_report['elapsed_seconds']:.1f}s)."
+                )
 
-                    st.success("Voucher generated successfully!")
+            elif dedup_report['groups']:
 
-                    safe_name = (
-                        v_client.split(",")[0]
-                        .strip()
-                        .replace(" ", "_")
-                    )
+                st.info(
+                    f"{dedup_report['duplicate_leads']} duplicate leads across "
+                    f"{dedup_report['groups']} clients."
+                )
+
+                st.caption(
+                    "e.g. Lead IDs "
+                    + "; ".join(", ".join(str(i) for i in group) for group in dedup_report['examples'][:5])
+                )
+
+                if st.button(f"Merge {dedup_report['duplicate_leads']} Duplicates"):
+
+                    merge_progress = st.progress(0.0, text="Merging...")
 
-                    st.download_button(
-                        label="⬇️ Download Premium Voucher",
-                        data=pdf_bytes,
-                        file_name=f"Hotel_Voucher_{safe_name}.pdf",
-                        mime="application/pdf"
+                    st.session_state['dedup_report'] = dedup.merge_duplicates(
+                        db_session,
+                        progress=lambda done, total: merge_progress.progress(
+                            done / total,
+                            text=f"Merged {done}/{total} clients"
+                        )
                     )
 
-                except Exception as e:
-                    st.error(f"Voucher Error: {str(e)}")
+                    st.rerun()
 
             else:
-                st.warning(
-                    "Please fill mandatory fields."
-                )
\ No newline at end of file
+                st.info("No duplicate leads found.")
+
+        st.markdown("---")
+
+        st.subheader("📤 Export")
+
+        st.caption(
+            "Leads, enquiries or saved itineraries as CSV or Parquet. Rows are "
+            "streamed from the database into a file a batch at a time, so "
+            "large tables export without loading them into memory."
+        )
+
+        e1, e2, e3 = st.columns(3)
+
+        export_table = e1.selectbox("Table", exporter.EXPORT_TABLES)
+        export_format = e2.selectbox("Format", exporter.EXPORT_FORMATS)
+
+        export_status = e3.selectbox(
+            "Status",
+            ["All"] + sorted(cached_dashboard_metrics(get_data_version())["by_status"].keys())
+        )
+
+        e4, e5, e6, e7 = st.columns(4)
+
+        export_source = e4.text_input("Source")
+        export_destination = e5.text_input("Destination contains")
+        export_from = e6.date_input("Created From", value=None)
+        export_to = e7.date_input("Created To", value=None)
+
+        if st.button("Prepare Export"):
+
+            # The previous export's file is replaced, not accumulated
+            old_export = st.session_state.pop('export_report', None)
+
+            if old_export and os.path.exists(old_export['path']):
+                os.remove(old_export['path'])
+
+            fd, export_path = tempfile.mkstemp(suffix=f".{export_format}")
+            os.close(fd)
+
+            # Row count as it goes - the total is not known up front
+            export_progress = st.empty()
+            exported = False
+
+            try:
+                export_report = exporter.export_rows(
+                    db_session,
+                    export_table,
+                    export_path,
+                    fmt=export_format,
+                    progress=lambda rows: export_progress.caption(f"{rows:,} rows written..."),
+                    status=None if export_status == "All" else export_status,
+                    source=export_source.strip() or None,
+                    destination=export_destination.strip() or None,
+                    created_from=export_from,
+                    created_to=export_to
+                )
+
+                export_report['path'] = export_path
+                st.session_state['export_report'] = export_report
+                exported = True
+
+            except exporter.ExportError as e:
+                st.error(str(e))
+
+            finally:
+                # Whatever stopped it (database error, interrupt), a failed
+                # export leaves no file behind
+                if not exported:
+                    os.remove(export_path)
+
+        export_report = st.session_state.get('export_report')
+
+        if export_report and os.path.exists(export_report['path']):
+
+            st.success(
+                f"Exported {export_report['rows']:,} {export_report['table']} in "
+                f"{export_report['elapsed_seconds']:.1f}s "
+                f"({export_report['rows_per_second']:,.0f} rows/s)."
+            )
+
+            with open(export_report['path'], "rb") as export_file:
+                st.download_button(
+                    label=f"⬇️ Download {export_report['format'].upper()}",
+                    data=export_file,
+                    file_name=exporter.export_file_name(export_report['table'], export_report['format']),
+                    mime="text/csv" if export_report['format'] == "csv" else "application/octet-stream"
+                )
@@ -0,0 +1,235 @@
+import datetime
+
+from sqlalchemy import Table, Column, Integer, String, DateTime, MetaData, inspect, select, text, bindparam
+
+from models import Base
+
+# ===============================
+# SCHEMA VERSION TABLE
+# ===============================
+version_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String),
+    Column("applied_at", DateTime)
+)
+
+
+# Rows per round trip when a migration backfills in Python
+BACKFILL_BATCH_ROWS = 5000
+
+
+# ===============================
+# HELPERS
+# ===============================
+# Every step is idempotent, so a database created by the old main.py,
+# the old models.py or a fresh install all converge on the same schema.
+def _create_tables(conn, *table_names):
+
+    tables = [Base.metadata.tables[name] for name in table_names]
+
+    Base.metadata.create_all(conn, tables=tables, checkfirst=True)
+
+
+def _add_missing_columns(conn, table_name):
+
+    table = Base.metadata.tables[table_name]
+
+    existing = {
+        col["name"]
+        for col in inspect(conn).get_columns(table_name)
+    }
+
+    for column in table.columns:
+
+        if column.name in existing:
+            continue
+
+        # Added as plain nullable columns: SQLite cannot ADD COLUMN ... NOT NULL
+        # without a default, and old rows have no value to give anyway.
+        col_type = column.type.compile(dialect=conn.dialect)
+
+        conn.execute(text(
+            f'ALTER TABLE {table_name} ADD COLUMN {column.name} {col_type}'
+        ))
+
+
+def _create_indexes(conn, table_name):
+
+    table = Base.metadata.tables[table_name]
+
+    existing = {
+        index["name"]
+        for index in inspect(conn).get_indexes(table_name)
+    }
+
+    for index in table.indexes:
+        if index.name not in existing:
+            index.create(conn)
+
+
+# ===============================
+# MIGRATIONS
+# ===============================
+def _001_baseline(conn):
+    _create_tables(conn, "users", "leads", "queries", "itineraries")
+
+
+def _002_reconcile_columns(conn):
+
+    # main.py and models.py used to create different column sets on the
+    # same tables - bring whichever one we find up to the canonical schema
+    for table_name in ("leads", "queries", "itineraries"):
+        _add_missing_columns(conn, table_name)
+
+    conn.execute(text(
+        "UPDATE queries SET status = 'Pending' WHERE status IS NULL"
+    ))
+
+
+def _003_access_path_indexes(conn):
+
+    for table_name in ("leads", "queries", "itineraries"):
+        _create_indexes(conn, table_name)
+
+
+def _004_prompt_cache(conn):
+    _create_tables(conn, "prompt_cache")
+
+
+def _005_generation_jobs(conn):
+    _create_tables(conn, "generation_jobs")
+
+
+def _006_search_index(conn):
+
+    # SQLite only (FTS5 table + triggers); a no-op elsewhere, where
+    # search.py uses LIKE
+    import search
+
+    search.create_search_index(conn)
+
+
+def _007_lead_match_keys(conn):
+
+    import contacts
+
+    _add_missing_columns(conn, "leads")
+
+    leads = Base.metadata.tables["leads"]
+
+    # Backfilled in Python (the normalization rules live in contacts.py),
+    # streamed a batch at a time with one UPDATE round trip per batch
+    rows = conn.execute(
+        select(leads.c.id, leads.c.phone, leads.c.email).order_by(leads.c.id),
+        execution_options={"yield_per": BACKFILL_BATCH_ROWS}
+    )
+
+    update = (
+        leads.update()
+        .where(leads.c.id == bindparam("lead_id"))
+        .values(phone_key=bindparam("phone_key"), email_key=bindparam("email_key"))
+    )
+
+    for batch in rows.partitions():
+        conn.execute(update, [
+            dict(lead_id=lead_id, **contacts.match_keys(phone, email))
+            for lead_id, phone, email in batch
+        ])
+
+    _create_indexes(conn, "leads")
+
+
+def _008_one_active_job_per_query(conn):
+
+    # Older duplicates from the check-then-insert era would violate the index
+    conn.execute(text("""
+        UPDATE generation_jobs
+        SET status = 'failed',
+            message = 'Superseded by an earlier job for the same query',
+            finished_at = :now
+        WHERE status IN ('queued', 'running')
+          AND query_id IS NOT NULL
+          AND id NOT IN (
+              SELECT min(id) FROM generation_jobs
+              WHERE status IN ('queued', 'running') AND query_id IS NOT NULL
+              GROUP BY query_id
+          )
+    """), {"now": datetime.datetime.utcnow()})
+
+    _create_indexes(conn, "generation_jobs")
+
+
+def _009_status_travel_date_index(conn):
+    _create_indexes(conn, "queries")
+
+
+def _010_job_heartbeat(conn):
+    _add_missing_columns(conn, "generation_jobs")
+
+
+MIGRATIONS = [
+    (1, "Baseline tables", _001_baseline),
+    (2, "Reconcile legacy lead/query columns", _002_reconcile_columns),
+    (3, "Indexes for dashboard and lookup access paths", _003_access_path_indexes),
+    (4, "Prompt/response cache for itinerary generation", _004_prompt_cache),
+    (5, "Background generation jobs", _005_generation_jobs),
+    (6, "Full-text search index over leads and queries", _006_search_index),
+    (7, "Normalized phone / email match keys on leads", _007_lead_match_keys),
+    (8, "One active generation job per query", _008_one_active_job_per_query),
+    (9, "Index for status-filtered travel date paging", _009_status_travel_date_index),
+    (10, "Heartbeat for running generation jobs", _010_job_heartbeat),
+]
+
+
+# ===============================
+# RUNNER
+# ===============================
+def get_schema_version(engine):
+
+    with engine.connect() as conn:
+
+        if not inspect(conn).has_table("schema_version"):
+            return 0
+
+        current = conn.execute(
+            select(schema_version.c.version)
+            .order_by(schema_version.c.version.desc())
+            .limit(1)
+        ).scalar()
+
+    return current or 0
+
+
+def run_migrations(engine):
+
+    with engine.begin() as conn:
+        version_metadata.create_all(conn, checkfirst=True)
+
+    current = get_schema_version(engine)
+
+    applied = []
+
+    for version, description, upgrade in MIGRATIONS:
+
+        if version <= current:
+            continue
+
+        # One transaction per step: a failure leaves the database at the
+        # last good version instead of half-way through a migration
+        with engine.begin() as conn:
+
+            upgrade(conn)
+
+            conn.execute(schema_version.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.datetime.utcnow()
+            ))
+
+        applied.append(version)
+
+    return applied
@@ -1,7 +1,11 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, Text, Date, Boolean
-from sqlalchemy.orm import declarative_base, relationship, sessionmaker
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, Index, text
+from sqlalchemy.orm import declarative_base, relationship, validates
 from datetime import datetime
 
+import contacts
+
+# Canonical schema for pristine_crm.db.
+# Tables are created / upgraded by migrations.run_migrations(), never at import time.
 Base = declarative_base()
 
 # 1. User Table (For login later)
@@ -16,37 +20,104 @@ class Lead(Base):
     __tablename__ = 'leads'
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
-    phone = Column(String) 
-    email = Column(String)
-    
+    phone = Column(String, index=True)
+    email = Column(String, index=True)
+    source = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+    # Normalized phone / email (contacts.py) - duplicates are found by these
+    phone_key = Column(String, index=True)
+    email_key = Column(String, index=True)
+
     queries = relationship("Query", back_populates="lead")
 
+    # Keys follow the ORM attributes; bulk inserts pass them explicitly
+    @validates("phone", "email")
+    def _update_match_key(self, field, value):
+
+        if field == "phone":
+            self.phone_key = contacts.phone_key(value)
+
+        else:
+            self.email_key = contacts.email_key(value)
+
+        return value
+
 # 3. Query Table (The Trips)
 class Query(Base):
     __tablename__ = 'queries'
     id = Column(Integer, primary_key=True)
-    lead_id = Column(Integer, ForeignKey('leads.id'))
+    lead_id = Column(Integer, ForeignKey('leads.id'), index=True)
     destination = Column(String)
-    status = Column(String)
-    budget = Column(Float)
+    travel_date = Column(String, index=True)
+    pax = Column(Integer)
+    budget = Column(String) # Free text, e.g. "INR 2L approx"
     notes = Column(Text)
-    created_at = Column(Date, default=datetime.utcnow)
-    
+
+    # Workflow
+    status = Column(String, default="Pending", index=True)
+
+    saved_itinerary = Column(Text, default="")
+    saved_hotels = Column(Text, default="")
+    saved_price = Column(Text, default="")
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+
     lead = relationship("Lead", back_populates="queries")
     itineraries = relationship("Itinerary", back_populates="query")
 
+    # Dashboard: one status, in travel date order (keyset paging)
+    __table_args__ = (
+        Index("ix_queries_status_travel_date", "status", "travel_date"),
+    )
+
 # 4. Itinerary Table (To Save AI Results)
 class Itinerary(Base):
     __tablename__ = 'itineraries'
     id = Column(Integer, primary_key=True)
-    query_id = Column(Integer, ForeignKey('queries.id'))
+    query_id = Column(Integer, ForeignKey('queries.id'), index=True)
     content = Column(Text) # The full text
     price = Column(String)
-    created_at = Column(Date, default=datetime.utcnow)
-    
+    created_at = Column(DateTime, default=datetime.utcnow)
+
     query = relationship("Query", back_populates="itineraries")
 
-# Database Setup
-engine = create_engine('sqlite:///pristine_crm.db')
-Base.metadata.create_all(engine)
-Session = sessionmaker(bind=engine)
\ No newline at end of file
+# 5. Prompt Cache (Gemini responses, keyed by normalized prompt + model)
+class PromptCache(Base):
+    __tablename__ = 'prompt_cache'
+    id = Column(Integer, primary_key=True)
+    cache_key = Column(String(64), unique=True, nullable=False) # sha256 hex
+    model_name = Column(String)
+    response_text = Column(Text)
+    size_bytes = Column(Integer)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+# 6. Generation Jobs (AI itineraries generated off the Streamlit script thread)
+class GenerationJob(Base):
+    __tablename__ = 'generation_jobs'
+    id = Column(Integer, primary_key=True)
+    query_id = Column(Integer, ForeignKey('queries.id'), index=True)
+    prompt = Column(Text)
+    force_refresh = Column(Boolean, default=False)
+    status = Column(String, default="queued", index=True) # queued / running / done / failed
+    message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime) # stamped by the live worker (jobs.py)
+    finished_at = Column(DateTime)
+
+    query = relationship("Query")
+
+    # At most one queued / running job per query, enforced by the database
+    # so two sessions clicking Generate at once cannot both insert one
+    __table_args__ = (
+        Index(
+            "uq_generation_jobs_active_query",
+            "query_id",
+            unique=True,
+            sqlite_where=text("status IN ('queued', 'running')"),
+            postgresql_where=text("status IN ('queued', 'running')")
+        ),
+    )
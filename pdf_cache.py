@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import branding
+import config
+import text_clean
+
+# ===============================
+# SETTINGS
+# ===============================
+PDF_CACHE_DIR = config.get_setting(
+    "PDF_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "pdf")
+)
+
+PDF_CACHE_MAX_BYTES = config.get_int("PDF_CACHE_MAX_MB", 200) * 1024 * 1024
+
+PDF_CACHE_ENABLED = config.get_bool("PDF_CACHE_ENABLED", True)
+
+_stats_lock = threading.Lock()
+
+_stats = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0
+}
+
+
+def _count(name, amount=1):
+
+    with _stats_lock:
+        _stats[name] += amount
+
+
+# ===============================
+# KEYS
+# ===============================
+def make_cache_key(kind, template_version, inputs):
+
+    # Content address: the engine, its template version, the logo and font
+    # it embeds and every input. Bump TEMPLATE_VERSION in the engine when
+    # the layout changes and old entries simply stop matching (then age out).
+    try:
+        logo = os.stat(branding.LOGO_PATH)
+        logo_version = f"{logo.st_size}:{logo.st_mtime_ns}"
+
+    except OSError:
+        logo_version = None
+
+    payload = json.dumps(
+        [kind, template_version, logo_version, text_clean.font_signature(), inputs],
+        sort_keys=True,
+        default=str
+    )
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _path(cache_key):
+
+    return os.path.join(PDF_CACHE_DIR, f"{cache_key}.pdf")
+
+
+# ===============================
+# STORE
+# ===============================
+# One file per PDF. A file's mtime is its last use, so eviction is
+# least-recently-used across every process sharing the directory
+# (Streamlit sessions, bulk voucher workers, the command line).
+def get(cache_key):
+
+    path = _path(cache_key)
+
+    try:
+        with open(path, "rb") as f:
+            pdf_bytes = f.read()
+
+        os.utime(path)
+
+    except OSError:
+        return None
+
+    return pdf_bytes
+
+
+def put(cache_key, pdf_bytes):
+
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+
+    # Write-then-rename: a concurrent reader never sees half a PDF
+    fd, temp_path = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(pdf_bytes)
+
+        os.replace(temp_path, _path(cache_key))
+
+    except OSError:
+        try:
+            os.remove(temp_path)
+
+        except OSError:
+            pass
+
+        return
+
+    evict()
+
+
+def _entries():
+
+    entries = []
+
+    try:
+        names = os.listdir(PDF_CACHE_DIR)
+
+    except OSError:
+        return entries
+
+    for name in names:
+
+        if not name.endswith(".pdf"):
+            continue
+
+        try:
+            stat = os.stat(os.path.join(PDF_CACHE_DIR, name))
+
+        except OSError:
+            continue
+
+        entries.append((stat.st_mtime, stat.st_size, name))
+
+    return entries
+
+
+def evict(max_bytes=None):
+
+    max_bytes = PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+
+    entries = _entries()
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+
+    for _, size, name in sorted(entries):
+
+        if total <= max_bytes:
+            break
+
+        try:
+            os.remove(os.path.join(PDF_CACHE_DIR, name))
+            removed += 1
+
+        except OSError:
+            pass # another process got there first
+
+        total -= size
+
+    if removed:
+        _count("evictions", removed)
+
+    return removed
+
+
+def get_or_render(kind, template_version, render, **inputs):
+
+    # Returns (pdf_bytes, hit)
+    if not PDF_CACHE_ENABLED:
+        return render(**inputs), False
+
+    cache_key = make_cache_key(kind, template_version, inputs)
+
+    pdf_bytes = get(cache_key)
+
+    if pdf_bytes is not None:
+        _count("hits")
+        return pdf_bytes, True
+
+    _count("misses")
+
+    pdf_bytes = render(**inputs)
+    put(cache_key, pdf_bytes)
+
+    return pdf_bytes, False
+
+
+def get_cache_stats():
+
+    entries = _entries()
+
+    with _stats_lock:
+        stats = dict(_stats)
+
+    lookups = stats["hits"] + stats["misses"]
+
+    stats.update(
+        entries=len(entries),
+        size_bytes=sum(size for _, size, _ in entries),
+        max_bytes=PDF_CACHE_MAX_BYTES,
+        hit_rate=stats["hits"] / lookups if lookups else None
+    )
+
+    return stats
+
+
+# ===============================
+# ENGINES
+# ===============================
+# Imported on first render: fpdf is only needed when a PDF is actually
+# built, not for the key of one that is already cached.
+def itinerary_key(client_name, destination, itinerary_text, hotel_details, price_text):
+
+    import pdf_maker
+
+    return make_cache_key(
+        "quote",
+        pdf_maker.TEMPLATE_VERSION,
+        dict(
+            client_name=client_name,
+            destination=destination,
+            itinerary_text=itinerary_text,
+            hotel_details=hotel_details,
+            price_text=price_text
+        )
+    )
+
+
+def itinerary_pdf(client_name, destination, itinerary_text, hotel_details, price_text):
+
+    import pdf_maker
+
+    return get_or_render(
+        "quote",
+        pdf_maker.TEMPLATE_VERSION,
+        pdf_maker.create_itinerary_pdf,
+        client_name=client_name,
+        destination=destination,
+        itinerary_text=itinerary_text,
+        hotel_details=hotel_details,
+        price_text=price_text
+    )
+
+
+def voucher_pdf(**voucher_fields):
+
+    # Same keyword arguments as voucher_maker.create_voucher_pdf
+    import voucher_maker
+
+    return get_or_render(
+        "voucher",
+        voucher_maker.TEMPLATE_VERSION,
+        voucher_maker.create_voucher_pdf,
+        **voucher_fields
+    )
@@ -1,24 +1,39 @@
 from fpdf import FPDF
 
+import branding
+import text_clean
+
+# Bump when the quote layout changes - invalidates cached PDFs (pdf_cache.py)
+TEMPLATE_VERSION = "2"
+
+def render_pdf(pdf, out=None):
+    # Shared output path for quotes and vouchers: fpdf2 builds the document in
+    # memory, so hand back those bytes (out=None) or write them into a
+    # caller-provided binary writable (open file, BytesIO, zip entry...).
+    if out is None:
+        return bytes(pdf.output())
+
+    pdf.output(out)
+
 class PDF(FPDF):
+    # Core font unless text_clean.setup_fonts() swaps in the Unicode TTF
+    brand_font = 'Arial'
+
     def header(self):
-        # 1. LOGO
-        try:
-            self.image('logo.png', 10, 8, 30) 
-        except:
-            pass 
+        # 1. LOGO (decoded once per process - see branding.py)
+        branding.place_logo(self, 10, 8, 30)
 
         # 2. BRANDING STRIP
         self.set_fill_color(0, 102, 102) # Teal
         self.rect(0, 0, 210, 5, 'F') 
 
         # 3. COMPANY NAME
-        self.set_font('Arial', 'B', 12)
+        self.set_font(self.brand_font, 'B', 12)
         self.set_text_color(0, 102, 102)
-        self.cell(0, 10, 'PRISTINE VACATIONS', 0, 1, 'R')
-        self.set_font('Arial', '', 8)
+        self.cell(0, 10, branding.COMPANY_NAME, 0, 1, 'R')
+        self.set_font(self.brand_font, '', 8)
         self.set_text_color(100, 100, 100)
-        self.cell(0, 5, 'Making Holidays Memorable', 0, 1, 'R')
+        self.cell(0, 5, branding.TAGLINE, 0, 1, 'R')
         self.ln(10)
 
     def footer(self):
@@ -26,92 +41,86 @@ class PDF(FPDF):
         self.set_draw_color(200, 200, 200)
         self.line(10, 272, 200, 272)
         
-        self.set_font('Arial', 'B', 9)
+        self.set_font(self.brand_font, 'B', 9)
         self.set_text_color(0, 0, 0)
-        self.cell(0, 5, 'PRISTINE VACATIONS', 0, 1, 'C')
+        self.cell(0, 5, branding.COMPANY_NAME, 0, 1, 'C')
         
-        self.set_font('Arial', '', 8)
+        self.set_font(self.brand_font, '', 8)
         self.set_text_color(50, 50, 50)
-        self.cell(0, 5, 'College Road, Ludhiana 141001, Phone: 0161-4623384', 0, 1, 'C')
-        self.cell(0, 5, 'Email - info@pristine.in', 0, 1, 'C')
+        for line in branding.QUOTE_FOOTER_LINES:
+            self.cell(0, 5, line, 0, 1, 'C')
         self.cell(0, 5, f'Page {self.page_no()}', 0, 0, 'R')
 
-def create_itinerary_pdf(client_name, destination, itinerary_text, hotel_details, price_text):
+def create_itinerary_pdf(client_name, destination, itinerary_text, hotel_details, price_text, out=None):
     pdf = PDF()
+    pdf.brand_font, unicode_text = text_clean.setup_fonts(pdf, 'Arial')
     pdf.set_auto_page_break(auto=True, margin=30)
     pdf.add_page()
     
     def clean(text):
-        return text.replace('₹', 'Rs.').replace('’', "'").replace('–', "-").encode('latin-1', 'replace').decode('latin-1')
+        return text_clean.clean(text, unicode=unicode_text)
 
     # 1. TITLE
-    pdf.set_font("Arial", "B", 20)
+    pdf.set_font(pdf.brand_font, "B", 20)
     pdf.set_text_color(0, 102, 102)
     pdf.cell(0, 10, "Travel Proposal", 0, 1, 'L')
     
-    pdf.set_font("Arial", "", 12)
+    pdf.set_font(pdf.brand_font, "", 12)
     pdf.set_text_color(0, 0, 0)
     pdf.cell(0, 8, f"Prepared for: {clean(client_name)}", 0, 1, 'L')
     pdf.cell(0, 8, f"Destination: {clean(destination)}", 0, 1, 'L')
     pdf.ln(5)
     
     # 2. ITINERARY
-    lines = itinerary_text.split('\n')
+    # Cleaned once as a whole - cheaper than line by line
+    lines = clean(itinerary_text).split('\n')
     for line in lines:
-        line = clean(line.strip())
+        line = line.strip()
         if not line: continue
         
         if line.startswith("Day") or line.startswith("**Day"):
             pdf.ln(5)
             pdf.set_fill_color(0, 102, 102)
             pdf.set_text_color(255, 255, 255)
-            pdf.set_font("Arial", "B", 11)
+            pdf.set_font(pdf.brand_font, "B", 11)
             pdf.cell(0, 8, f"  {line.replace('*', '')}", 0, 1, 'L', 1)
             pdf.ln(2)
         else:
             pdf.set_text_color(50, 50, 50)
-            pdf.set_font("Arial", "", 10)
+            pdf.set_font(pdf.brand_font, "", 10)
             pdf.multi_cell(0, 5, line)
             
     # 3. ACCOMMODATION
     if hotel_details:
         pdf.add_page()
-        pdf.set_font("Arial", "B", 14)
+        pdf.set_font(pdf.brand_font, "B", 14)
         pdf.set_text_color(0, 102, 102)
         pdf.cell(0, 10, "Accommodation Details", 0, 1)
         
-        pdf.set_font("Arial", "", 10)
+        pdf.set_font(pdf.brand_font, "", 10)
         pdf.set_text_color(0, 0, 0)
         pdf.set_fill_color(245, 245, 245)
         pdf.multi_cell(0, 6, clean(hotel_details), 1, 'L', True)
         pdf.ln(10)
 
     # 4. INVESTMENT
-    pdf.set_font("Arial", "B", 14)
+    pdf.set_font(pdf.brand_font, "B", 14)
     pdf.set_text_color(0, 102, 102)
     pdf.cell(0, 10, "Investment & Inclusions", 0, 1)
     
-    pdf.set_font("Arial", "", 10)
+    pdf.set_font(pdf.brand_font, "", 10)
     pdf.set_text_color(0, 0, 0)
     pdf.set_fill_color(255, 252, 240)
     pdf.multi_cell(0, 6, clean(price_text), 1, 'L', True)
     
     # 5. TERMS & CONDITIONS (Restored Full List)
     pdf.ln(15)
-    pdf.set_font("Arial", "B", 10)
+    pdf.set_font(pdf.brand_font, "B", 10)
     pdf.set_text_color(0, 0, 0)
     pdf.cell(0, 8, "Terms & Conditions:", 0, 1)
     
-    pdf.set_font("Arial", "", 9)
+    pdf.set_font(pdf.brand_font, "", 9)
     pdf.set_text_color(50, 50, 50)
-    terms = """1. All rates are subject to TCS and GST as per government regulations.
-2. Rates are subject to change as per availability.
-3. No booking is confirmed until the advance payment is received.
-4. Passports must be valid for at least 6 months from the date of return.
-5. Final payment is subject to ROE (Rate of Exchange) fluctuations.
-6. Standard Hotel Check-in: 14:00 | Check-out: 11:00.
-7. Visa issuance is at the sole discretion of the Embassy."""
-    
-    pdf.multi_cell(0, 5, terms)
+    pdf.multi_cell(0, 5, branding.QUOTE_TERMS)
     
-    return pdf.output(dest='S').encode('latin-1')
\ No newline at end of file
+    return render_pdf(pdf, out)
\ No newline at end of file
@@ -0,0 +1,235 @@
+import datetime
+import hashlib
+import time
+
+from sqlalchemy import func, delete, select
+
+import ai_engine
+import config
+from database import upsert
+from models import PromptCache
+
+# ===============================
+# SETTINGS
+# ===============================
+PROMPT_CACHE_MAX_ENTRIES = config.get_int("PROMPT_CACHE_MAX_ENTRIES", 500)
+PROMPT_CACHE_TTL = config.get_int("PROMPT_CACHE_TTL", 7 * 24 * 3600) # seconds
+
+
+# ===============================
+# KEYS
+# ===============================
+def normalize_prompt(prompt_text):
+
+    # The builder's f-string prompt carries indentation and blank lines that
+    # change with code layout, not with what the consultant asked for
+    lines = (" ".join(line.split()) for line in prompt_text.splitlines())
+
+    return "\n".join(line for line in lines if line)
+
+
+def make_cache_key(prompt_text, model_name):
+
+    payload = f"{model_name}\n{normalize_prompt(prompt_text)}"
+
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ===============================
+# STORE
+# ===============================
+def _use(session, entry):
+
+    now = datetime.datetime.utcnow()
+
+    if entry.created_at and (now - entry.created_at).total_seconds() > PROMPT_CACHE_TTL:
+        session.delete(entry)
+        return None
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = now
+
+    return entry.response_text
+
+
+def lookup(session, cache_key):
+
+    entry = session.execute(
+        select(PromptCache).where(PromptCache.cache_key == cache_key)
+    ).scalar_one_or_none()
+
+    return None if entry is None else _use(session, entry)
+
+
+def lookup_candidates(session, prompt_text, model_names):
+
+    # (response_text, model_name) from the first candidate model with an
+    # entry, preferred model first. A draft a fallback wrote while the
+    # preferred model was throttled is still a hit - otherwise every repeat
+    # would go back to Gemini. One IN query for all candidates.
+    keys = {make_cache_key(prompt_text, name): name for name in model_names}
+
+    entries = {
+        entry.cache_key: entry
+        for entry in session.execute(
+            select(PromptCache).where(PromptCache.cache_key.in_(list(keys)))
+        ).scalars()
+    }
+
+    for cache_key, model_name in keys.items():
+
+        if cache_key not in entries:
+            continue
+
+        response_text = _use(session, entries[cache_key])
+
+        if response_text is not None:
+            return response_text, model_name
+
+    return None, None
+
+
+def store(session, cache_key, model_name, response_text):
+
+    now = datetime.datetime.utcnow()
+
+    upsert(
+        session,
+        PromptCache,
+        [{
+            "cache_key": cache_key,
+            "model_name": model_name,
+            "response_text": response_text,
+            "size_bytes": len(response_text.encode("utf-8")),
+            "hit_count": 0,
+            "created_at": now,
+            "last_used_at": now
+        }],
+        index_elements=["cache_key"]
+    )
+
+    evict(session)
+
+
+def evict(session):
+
+    expired_before = (
+        datetime.datetime.utcnow()
+        - datetime.timedelta(seconds=PROMPT_CACHE_TTL)
+    )
+
+    session.execute(
+        delete(PromptCache).where(PromptCache.created_at < expired_before)
+    )
+
+    total = session.execute(select(func.count(PromptCache.id))).scalar()
+
+    excess = total - PROMPT_CACHE_MAX_ENTRIES
+
+    if excess > 0:
+
+        # Least recently used first
+        oldest = (
+            select(PromptCache.id)
+            .order_by(PromptCache.last_used_at.asc())
+            .limit(excess)
+        )
+
+        session.execute(
+            delete(PromptCache).where(PromptCache.id.in_(oldest))
+        )
+
+
+def get_cache_stats(session):
+
+    entries, hits, size = session.execute(
+        select(
+            func.count(PromptCache.id),
+            func.coalesce(func.sum(PromptCache.hit_count), 0),
+            func.coalesce(func.sum(PromptCache.size_bytes), 0)
+        )
+    ).one()
+
+    return {"entries": entries, "hits": hits, "size_bytes": size}
+
+
+# ===============================
+# CACHED GENERATION
+# ===============================
+def generate_with_cache(session, prompt_text, api_key, force_refresh=False, label=None):
+
+    started = time.perf_counter()
+
+    # Same models the uncached call would try (cached in ai_engine)
+    try:
+        model_names = [name for name, _ in ai_engine.get_candidate_models(api_key)]
+
+    except Exception as e:
+        return None, f"Google connection failed: {str(e)}"
+
+    if not model_names:
+        return None, "No compatible Gemini model found."
+
+    if not force_refresh:
+
+        cached_text, cached_by = lookup_candidates(session, prompt_text, model_names)
+
+        if cached_text is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            return cached_text, f"Loaded from cache ({cached_by}, {elapsed_ms:.0f} ms)"
+
+    result_text, status_msg, answered_by = ai_engine.generate_itinerary_detailed(
+        prompt_text,
+        api_key,
+        label=label
+    )
+
+    # Stored under the model that actually answered, so a hit reports the
+    # model that wrote the draft
+    if result_text:
+        store(
+            session,
+            make_cache_key(prompt_text, answered_by),
+            answered_by,
+            result_text
+        )
+
+    return result_text, status_msg
+
+
+def stream_with_cache(session, prompt_text, api_key, force_refresh=False):
+
+    # Streaming twin of generate_with_cache: a hit is yielded as one chunk,
+    # a miss is stored only after the stream has completed successfully
+    try:
+        model_names = [name for name, _ in ai_engine.get_candidate_models(api_key)]
+
+    except Exception as e:
+        raise ai_engine.GenerationError(f"Google connection failed: {str(e)}")
+
+    if not model_names:
+        raise ai_engine.GenerationError("No compatible Gemini model found.")
+
+    if not force_refresh:
+
+        cached_text, _ = lookup_candidates(session, prompt_text, model_names)
+
+        if cached_text is not None:
+            yield cached_text
+            return
+
+    parts = []
+    info = {}
+
+    for chunk in ai_engine.stream_itinerary(prompt_text, api_key, info=info):
+        parts.append(chunk)
+        yield chunk
+
+    answered_by = info.get("model_name", model_names[0])
+
+    store(
+        session,
+        make_cache_key(prompt_text, answered_by),
+        answered_by,
+        "".join(parts)
+    )
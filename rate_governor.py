@@ -0,0 +1,252 @@
+import threading
+import time
+from collections import deque
+
+import config
+
+# ===============================
+# SETTINGS
+# ===============================
+# Defaults sit a little under Gemini's free-tier flash quota; raise them to
+# match the project's actual per-minute limits.
+GEMINI_REQUESTS_PER_MINUTE = config.get_int("GEMINI_REQUESTS_PER_MINUTE", 10)
+GEMINI_TOKENS_PER_MINUTE = config.get_int("GEMINI_TOKENS_PER_MINUTE", 200000)
+
+# Output budget assumed for a multi-day itinerary when estimating tokens
+GEMINI_EXPECTED_OUTPUT_TOKENS = config.get_int("GEMINI_EXPECTED_OUTPUT_TOKENS", 2500)
+
+GOVERNOR_MAX_QUEUE = config.get_int("GEMINI_GOVERNOR_MAX_QUEUE", 50)
+GOVERNOR_MAX_WAIT_SECONDS = config.get_float("GEMINI_GOVERNOR_MAX_WAIT_SECONDS", 180.0)
+
+
+class RateLimitRejected(Exception):
+    pass
+
+
+def estimate_tokens(prompt_text):
+
+    # ~4 characters per token for English prompts, plus the expected answer
+    return len(prompt_text) // 4 + GEMINI_EXPECTED_OUTPUT_TOKENS
+
+
+# ===============================
+# TOKEN BUCKET
+# ===============================
+class TokenBucket:
+
+    def __init__(self, per_minute):
+
+        self.capacity = float(per_minute)
+        self.refill_per_second = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now):
+
+        elapsed = now - self.updated_at
+
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def time_until(self, amount, now):
+
+        self._refill(now)
+
+        amount = min(amount, self.capacity)
+
+        if self.tokens >= amount:
+            return 0.0
+
+        return (amount - self.tokens) / self.refill_per_second
+
+    def consume(self, amount, now):
+
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+
+# ===============================
+# GOVERNOR
+# ===============================
+class _Ticket:
+
+    # One per waiting call. No __eq__, so comparisons (deque.remove included)
+    # are by identity - two waiters with the same label and estimate are
+    # still two different places in the queue.
+    __slots__ = ("label", "estimated_tokens")
+
+    def __init__(self, label, estimated_tokens):
+        self.label = label
+        self.estimated_tokens = estimated_tokens
+
+
+class RateGovernor:
+
+    # Callers are admitted strictly in arrival order (FIFO): only the head of
+    # the queue may take from the buckets, so a burst of clicks turns into
+    # an evenly spaced stream of calls instead of a synchronized retry storm.
+
+    def __init__(self, requests_per_minute, tokens_per_minute, max_queue, max_wait_seconds):
+
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_queue = max_queue
+        self.max_wait_seconds = max_wait_seconds
+
+        self._cond = threading.Condition()
+        self._queue = deque()
+
+        self._metrics = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected": 0,
+            "wait_seconds_total": 0.0
+        }
+
+    def acquire(self, estimated_tokens, label=None):
+
+        # Blocks until the call may proceed; returns the seconds waited.
+        ticket = _Ticket(label, estimated_tokens)
+        started = time.monotonic()
+        deadline = started + self.max_wait_seconds
+
+        with self._cond:
+
+            if len(self._queue) >= self.max_queue:
+                self._metrics["rejected"] += 1
+                raise RateLimitRejected(
+                    f"Gemini is at capacity ({len(self._queue)} requests waiting). "
+                    "Please try again shortly."
+                )
+
+            self._queue.append(ticket)
+
+            had_to_wait = False
+
+            while True:
+
+                now = time.monotonic()
+
+                if self._queue[0] is ticket:
+
+                    wait = max(
+                        self.requests.time_until(1, now),
+                        self.tokens.time_until(estimated_tokens, now)
+                    )
+
+                    if wait <= 0:
+
+                        self.requests.consume(1, now)
+                        self.tokens.consume(estimated_tokens, now)
+                        self._queue.popleft()
+
+                        waited = now - started
+
+                        self._metrics["admitted"] += 1
+                        self._metrics["wait_seconds_total"] += waited
+
+                        if had_to_wait:
+                            self._metrics["queued"] += 1
+
+                        self._cond.notify_all()
+
+                        return waited
+
+                else:
+                    wait = None
+
+                had_to_wait = True
+
+                remaining = deadline - now
+
+                if remaining <= 0:
+
+                    self._queue.remove(ticket)
+                    self._metrics["rejected"] += 1
+                    self._cond.notify_all()
+
+                    raise RateLimitRejected(
+                        f"Waited {self.max_wait_seconds:.0f}s for Gemini capacity. "
+                        "Please try again shortly."
+                    )
+
+                self._cond.wait(min(wait, remaining) if wait else remaining)
+
+    def position(self, label):
+
+        # 1-based place in the queue, or None when not waiting
+        with self._cond:
+            for index, ticket in enumerate(self._queue):
+                if ticket.label == label:
+                    return index + 1
+
+        return None
+
+    def estimated_wait(self, position=None):
+
+        # Seconds until a caller at `position` (default: a new arrival) is
+        # admitted, assuming the request bucket is the binding limit
+        with self._cond:
+
+            if position is None:
+                position = len(self._queue) + 1
+
+            now = time.monotonic()
+            head_wait = self.requests.time_until(1, now)
+
+        return head_wait + (position - 1) / self.requests.refill_per_second
+
+    def snapshot(self):
+
+        with self._cond:
+
+            now = time.monotonic()
+            self.requests._refill(now)
+            self.tokens._refill(now)
+
+            admitted = self._metrics["admitted"]
+
+            return {
+                "admitted": admitted,
+                "queued": self._metrics["queued"],
+                "rejected": self._metrics["rejected"],
+                "waiting": len(self._queue),
+                "avg_wait_seconds": (
+                    self._metrics["wait_seconds_total"] / admitted
+                    if admitted else 0.0
+                ),
+                "requests_available": self.requests.tokens,
+                "tokens_available": self.tokens.tokens
+            }
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+
+    global _governor
+
+    with _governor_lock:
+
+        if _governor is None:
+            _governor = RateGovernor(
+                GEMINI_REQUESTS_PER_MINUTE,
+                GEMINI_TOKENS_PER_MINUTE,
+                GOVERNOR_MAX_QUEUE,
+                GOVERNOR_MAX_WAIT_SECONDS
+            )
+
+        return _governor
+
+
+def metrics_text():
+
+    # Prometheus text exposition, for scraping or logging
+    snapshot = get_governor().snapshot()
+
+    return "".join(
+        f"gemini_governor_{name} {value}\n"
+        for name, value in snapshot.items()
+    )
@@ -0,0 +1,176 @@
+import random
+import re
+import threading
+import time
+
+import config
+
+# ===============================
+# SETTINGS
+# ===============================
+BACKOFF_BASE_SECONDS = config.get_float("GEMINI_BACKOFF_BASE_SECONDS", 1.0)
+BACKOFF_MAX_SECONDS = config.get_float("GEMINI_BACKOFF_MAX_SECONDS", 30.0)
+
+BREAKER_FAILURE_THRESHOLD = config.get_int("GEMINI_BREAKER_FAILURES", 3)
+BREAKER_RESET_SECONDS = config.get_float("GEMINI_BREAKER_RESET_SECONDS", 60.0)
+
+
+# ===============================
+# BACKOFF
+# ===============================
+def backoff_delay(attempt, retry_after=None, base=None, cap=None):
+
+    # "Full jitter": uniform in [0, min(cap, base * 2^attempt)], so callers
+    # that failed together do not retry together. A server retry hint is a
+    # floor - retrying before it is pointless.
+    base = BACKOFF_BASE_SECONDS if base is None else base
+    cap = BACKOFF_MAX_SECONDS if cap is None else cap
+
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+
+    if retry_after:
+        delay = max(delay, min(retry_after, cap))
+
+    return delay
+
+
+_RETRY_HINT_PATTERNS = [
+    re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+]
+
+
+def retry_after_seconds(exc):
+
+    # Gemini 429s carry a google.rpc.RetryInfo detail and repeat it in the
+    # message ("Please retry in 37.2s"); plain HTTP errors may carry Retry-After
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+
+    if headers and headers.get("Retry-After"):
+        try:
+            return float(headers["Retry-After"])
+        except ValueError:
+            pass
+
+    for detail in getattr(exc, "details", None) or []:
+
+        retry_delay = getattr(detail, "retry_delay", None)
+
+        if retry_delay is not None:
+            return retry_delay.seconds + retry_delay.nanos / 1e9
+
+    for pattern in _RETRY_HINT_PATTERNS:
+
+        match = pattern.search(str(exc))
+
+        if match:
+            return float(match.group(1))
+
+    return None
+
+
+# ===============================
+# CIRCUIT BREAKER
+# ===============================
+class CircuitBreaker:
+
+    # closed -> open after `failure_threshold` consecutive failures;
+    # open -> half-open after `reset_seconds`, which lets one trial call
+    # through; its success closes the breaker, its failure re-opens it.
+
+    def __init__(self, name, failure_threshold=None, reset_seconds=None):
+
+        self.name = name
+        self.failure_threshold = failure_threshold or BREAKER_FAILURE_THRESHOLD
+        self.reset_seconds = reset_seconds or BREAKER_RESET_SECONDS
+
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+
+        if self._opened_at is None:
+            return "closed"
+
+        if time.monotonic() - self._opened_at >= self.reset_seconds:
+            return "half-open"
+
+        return "open"
+
+    def allow(self):
+
+        with self._lock:
+
+            state = self._state()
+
+            if state == "closed":
+                return True
+
+            if state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+
+            return False
+
+    def record_success(self):
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+
+        # The allowed call never happened (e.g. rejected by the rate governor)
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+
+        with self._lock:
+
+            self._failures += 1
+            self._trial_in_flight = False
+
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+    def retry_in(self):
+
+        with self._lock:
+
+            if self._opened_at is None:
+                return 0.0
+
+            return max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at))
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+
+    with _breakers_lock:
+
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+
+        return _breakers[name]
+
+
+def breaker_states():
+
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+
+    return {breaker.name: breaker.state for breaker in breakers}
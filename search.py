@@ -0,0 +1,493 @@
+import re
+import unicodedata
+from contextlib import contextmanager
+
+from sqlalchemy import text, or_, func
+from sqlalchemy.exc import OperationalError
+
+import config
+from models import Lead, Query
+
+# Full-text search over clients and trips.
+#
+# On SQLite an FTS5 table (search_index) holds one row per lead and one
+# per query (rowid = query id, with its client's name, phone and email
+# copied in, so "sharma dubai" finds the trip). Triggers on leads and
+# queries keep it current inside the writing transaction; migration 6
+# creates it and indexes the existing rows. Other databases (or a SQLite
+# built without FTS5) fall back to LIKE scans.
+
+# ===============================
+# SETTINGS
+# ===============================
+SEARCH_RESULT_LIMIT = config.get_int("SEARCH_RESULT_LIMIT", 25)
+
+# Matches scored per search, newest first (see _search_fts)
+SEARCH_RANK_WINDOW = config.get_int("SEARCH_RANK_WINDOW", 5000)
+
+SEARCH_TABLE = "search_index"
+
+# bm25 weight per FTS column, in table order: a hit on the client's name
+# or phone outranks the same word somewhere in an itinerary
+COLUMN_WEIGHTS = [
+    ("lead_id", 0.0),
+    ("name", 10.0),
+    ("phone", 8.0),
+    ("phone_digits", 8.0),
+    ("email", 8.0),
+    ("destination", 5.0),
+    ("notes", 2.0),
+    ("itinerary", 1.0),
+    ("hotels", 1.0)
+]
+
+# Client rows sit above every query row. Both ranges grow upwards: FTS5
+# flushes its pending index whenever a transaction inserts a rowid lower
+# than the one before, so descending rowids would cost a segment per row.
+LEAD_ROWID_OFFSET = 1 << 40
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+_fts_available = {}
+
+
+# ===============================
+# INDEX DEFINITION (SQLite)
+# ===============================
+def _phone_digits(column):
+
+    # The phone as one run of digits and as its last ten digits, so
+    # "9876543210" finds "+91 98765-43210"
+    digits = f"coalesce({column}, '')"
+
+    for char in " -+().":
+        digits = f"replace({digits}, '{char}', '')"
+
+    return f"{digits} || ' ' || substr({digits}, -10)"
+
+
+_COLUMNS = "rowid, lead_id, name, phone, phone_digits, email, destination, notes, itinerary, hotels"
+
+_LEAD_ROWS = f"""
+    INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+    SELECT {LEAD_ROWID_OFFSET} + l.id, l.id, l.name, l.phone, {_phone_digits('l.phone')}, l.email,
+           NULL, NULL, NULL, NULL
+    FROM leads l
+"""
+
+_QUERY_ROWS = f"""
+    INSERT INTO {SEARCH_TABLE} ({_COLUMNS})
+    SELECT q.id, q.lead_id, l.name, l.phone, {_phone_digits('l.phone')}, l.email,
+           q.destination, q.notes, q.saved_itinerary, q.saved_hotels
+    FROM queries q
+    LEFT JOIN leads l ON l.id = q.lead_id
+"""
+
+# Rows are always replaced by rowid (an index lookup), never by scanning
+# the UNINDEXED lead_id column
+_TRIGGERS = {
+    "search_lead_insert": f"""
+        AFTER INSERT ON leads BEGIN
+            {_LEAD_ROWS} WHERE l.id = new.id;
+        END
+    """,
+    "search_lead_update": f"""
+        AFTER UPDATE OF name, phone, email ON leads BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = {LEAD_ROWID_OFFSET} + old.id;
+            {_LEAD_ROWS} WHERE l.id = new.id;
+            DELETE FROM {SEARCH_TABLE}
+            WHERE rowid IN (SELECT id FROM queries WHERE lead_id = new.id);
+            {_QUERY_ROWS} WHERE q.lead_id = new.id;
+        END
+    """,
+    "search_lead_delete": f"""
+        AFTER DELETE ON leads BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = {LEAD_ROWID_OFFSET} + old.id;
+            DELETE FROM {SEARCH_TABLE}
+            WHERE rowid IN (SELECT id FROM queries WHERE lead_id = old.id);
+            {_QUERY_ROWS} WHERE q.lead_id = old.id;
+        END
+    """,
+    "search_query_insert": f"""
+        AFTER INSERT ON queries BEGIN
+            {_QUERY_ROWS} WHERE q.id = new.id;
+        END
+    """,
+    # Status changes (every job and quote) leave the index alone
+    "search_query_update": f"""
+        AFTER UPDATE OF lead_id, destination, notes, saved_itinerary, saved_hotels ON queries BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+            {_QUERY_ROWS} WHERE q.id = new.id;
+        END
+    """,
+    "search_query_delete": f"""
+        AFTER DELETE ON queries BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id;
+        END
+    """
+}
+
+
+def create_search_index(conn):
+
+    # Called by migration 6. Returns False where FTS5 is not available;
+    # search() then uses LIKE instead.
+    if conn.dialect.name != "sqlite":
+        return False
+
+    columns = ", ".join(
+        f"{name} UNINDEXED" if weight == 0 else name
+        for name, weight in COLUMN_WEIGHTS
+    )
+
+    try:
+        # prefix: "sha*" reads a prefix index instead of expanding every term
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"{columns}, "
+            "prefix='2 3 4', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        ))
+
+    except OperationalError:
+        return False # no such module: fts5
+
+    for name, body in _TRIGGERS.items():
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+        conn.execute(text(f"CREATE TRIGGER {name} {body}"))
+
+    rebuild_search_index(conn)
+
+    return True
+
+
+def rebuild_search_index(conn):
+
+    # Re-index everything (first install, or after writes made with the
+    # triggers missing)
+    conn.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    conn.execute(text(_LEAD_ROWS))
+    conn.execute(text(_QUERY_ROWS))
+    conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"))
+
+
+@contextmanager
+def deferred_indexing(session):
+
+    # For bulk inserts: the per-row insert triggers are dropped for the rest
+    # of the session's transaction and everything inserted meanwhile is
+    # indexed with one INSERT ... SELECT per table on the way out.
+    if not uses_fts(session):
+        yield
+        return
+
+    # pysqlite only opens a transaction at the first INSERT / UPDATE /
+    # DELETE, so DDL before that commits on its own. Begin explicitly: other
+    # connections never see the triggers missing, and a rollback restores them.
+    # IMMEDIATE takes the write lock up front - a deferred transaction that
+    # reads first cannot upgrade under WAL once another writer has committed
+    # (SQLITE_BUSY_SNAPSHOT, which busy_timeout does not retry).
+    dbapi_connection = session.connection().connection.dbapi_connection
+
+    if not dbapi_connection.in_transaction:
+        dbapi_connection.execute("BEGIN IMMEDIATE")
+
+    # New rowids are always above the current maximum
+    lead_max = session.execute(text("SELECT coalesce(max(id), 0) FROM leads")).scalar()
+    query_max = session.execute(text("SELECT coalesce(max(id), 0) FROM queries")).scalar()
+
+    insert_triggers = ["search_lead_insert", "search_query_insert"]
+
+    for name in insert_triggers:
+        session.execute(text(f"DROP TRIGGER IF EXISTS {name}"))
+
+    def restore():
+
+        session.execute(text(f"{_LEAD_ROWS} WHERE l.id > :after"), {"after": lead_max})
+        session.execute(text(f"{_QUERY_ROWS} WHERE q.id > :after"), {"after": query_max})
+
+        for name in insert_triggers:
+            session.execute(text(f"CREATE TRIGGER {name} {_TRIGGERS[name]}"))
+
+    # Put back even when the body raises, in case the caller commits anyway -
+    # but never let a failed restore hide the body's own error (the rollback
+    # that follows puts the triggers back in that case)
+    try:
+        yield
+
+    except BaseException:
+        try:
+            restore()
+
+        except Exception:
+            pass
+
+        raise
+
+    restore()
+
+
+def uses_fts(session):
+
+    bind = session.get_bind()
+    key = str(bind.url)
+
+    if key not in _fts_available:
+
+        if bind.dialect.name != "sqlite":
+            _fts_available[key] = False
+
+        else:
+            _fts_available[key] = session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": SEARCH_TABLE}
+            ).first() is not None
+
+    return _fts_available[key]
+
+
+# ===============================
+# SEARCH
+# ===============================
+def _fold(word):
+
+    # Lower case without accents, like the tokenizer's remove_diacritics
+    word = word.lower()
+
+    if word.isascii():
+        return word
+
+    return "".join(
+        c for c in unicodedata.normalize("NFKD", word)
+        if not unicodedata.combining(c)
+    )
+
+
+def search_terms(query_text):
+
+    # Same word boundaries as the unicode61 tokenizer; punctuation never
+    # reaches FTS5's query syntax
+    return [_fold(word) for word in _TOKEN.findall(str(query_text or ""))]
+
+
+def build_match_query(terms):
+
+    # Every term must match, each as a prefix
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _result(kind, query_id, lead_id, client, phone, destination, travel_date, status, match, score):
+
+    return {
+        "kind": kind,
+        "query_id": query_id,
+        "lead_id": lead_id,
+        "client": client,
+        "phone": phone,
+        "destination": destination,
+        "travel_date": travel_date,
+        "status": (status or "Pending") if kind == "query" else None,
+        "match": match,
+        "score": score
+    }
+
+
+def _drop_covered_leads(results, limit):
+
+    # A client whose trips matched needs no separate "client" line
+    trip_leads = {r["lead_id"] for r in results if r["kind"] == "query"}
+
+    return [
+        r for r in results
+        if r["kind"] == "query" or r["lead_id"] not in trip_leads
+    ][:limit]
+
+
+def _snippet(fields, terms, length=10):
+
+    # A few words around the matched terms, from the field that matches the
+    # most of them. Done here rather than with FTS5's snippet(), which has
+    # to walk the whole match list again for every row it decorates.
+    best = None
+
+    for value in fields:
+
+        if not value:
+            continue
+
+        spans = [m.span() for m in _TOKEN.finditer(value)]
+        words = [_fold(value[start:end]) for start, end in spans]
+
+        hits = {i for i, word in enumerate(words) if word.startswith(terms)}
+        matched = sum(1 for term in terms if any(words[i].startswith(term) for i in hits))
+
+        if hits and (best is None or matched > best[0]):
+            best = (matched, value, spans, hits)
+
+    if best is None:
+        return None
+
+    _, value, spans, hits = best
+
+    first = max(min(hits) - 2, 0)
+    last = min(first + length, len(spans))
+
+    parts = ["…" if first else ""]
+    position = spans[first][0] if first else 0
+
+    for i in range(first, last):
+
+        start, end = spans[i]
+        parts.append(value[position:start])
+        parts.append(f"[{value[start:end]}]" if i in hits else value[start:end])
+        position = end
+
+    parts.append("…" if last < len(spans) else value[position:])
+
+    return "".join(parts)
+
+
+def _search_fts(session, terms, limit):
+
+    match = build_match_query(terms)
+    weights = ", ".join(str(weight) for _, weight in COLUMN_WEIGHTS)
+
+    # 1. bm25 over the newest SEARCH_RANK_WINDOW matching trips and clients
+    # (FTS5 walks rowids in order and stops), best scores first. A word
+    # that is in every itinerary then costs the window, not the table.
+    window = (
+        f"SELECT rowid, bm25({SEARCH_TABLE}, {weights}) AS score "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match"
+    )
+
+    ranked = session.execute(
+        text(
+            f"SELECT rowid, score FROM ({window} AND rowid < :offset ORDER BY rowid DESC LIMIT :window) "
+            "UNION ALL "
+            f"SELECT rowid, score FROM ({window} AND rowid > :offset ORDER BY rowid DESC LIMIT :window) "
+            "ORDER BY score LIMIT :limit"
+        ),
+        {"match": match, "offset": LEAD_ROWID_OFFSET, "window": SEARCH_RANK_WINDOW, "limit": limit * 2}
+    ).all()
+
+    if not ranked:
+        return []
+
+    scores = {rowid: score for rowid, score in ranked}
+    ids = ", ".join(str(int(rowid)) for rowid in scores)
+
+    # 2. Display columns for just those rows (rowid lookups, no MATCH)
+    rows = session.execute(text(
+        "SELECT s.rowid, s.lead_id, s.name, s.phone, s.email, s.destination, s.notes, "
+        "s.itinerary, s.hotels, s.phone_digits, q.travel_date, q.status "
+        f"FROM {SEARCH_TABLE} s "
+        "LEFT JOIN queries q ON q.id = s.rowid "
+        f"WHERE s.rowid IN ({ids})"
+    )).all()
+
+    prefixes = tuple(terms)
+
+    results = [
+        _result(
+            "query" if row[0] < LEAD_ROWID_OFFSET else "lead",
+            row[0] if row[0] < LEAD_ROWID_OFFSET else None,
+            row[1], row[2], row[3], row[5], row[10], row[11],
+            _snippet(row[2:10], prefixes),
+            scores[row[0]]
+        )
+        for row in rows
+    ]
+
+    results.sort(key=lambda r: r["score"])
+
+    return _drop_covered_leads(results, limit)
+
+
+def _search_like(session, terms, limit):
+
+    # Each term must appear somewhere (case-insensitive); newest first
+    def _all_terms(columns):
+        return [
+            or_(*[func.lower(column).like(f"%{term}%") for column in columns])
+            for term in terms
+        ]
+
+    trips = (
+        session.query(
+            Query.id, Query.lead_id, Lead.name, Lead.phone,
+            Query.destination, Query.travel_date, Query.status
+        )
+        .outerjoin(Lead, Query.lead_id == Lead.id)
+        .filter(*_all_terms([
+            Lead.name, Lead.phone, Lead.email, Query.destination,
+            Query.notes, Query.saved_itinerary, Query.saved_hotels
+        ]))
+        .order_by(Query.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+    clients = (
+        session.query(Lead.id, Lead.name, Lead.phone)
+        .filter(*_all_terms([Lead.name, Lead.phone, Lead.email]))
+        .order_by(Lead.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+    results = [
+        _result("query", query_id, lead_id, name, phone, destination, travel_date, status, None, None)
+        for query_id, lead_id, name, phone, destination, travel_date, status in trips
+    ] + [
+        _result("lead", None, lead_id, name, phone, None, None, None, None, None)
+        for lead_id, name, phone in clients
+    ]
+
+    return _drop_covered_leads(results, limit)
+
+
+def search(session, query_text, limit=SEARCH_RESULT_LIMIT):
+
+    # Best matches first. Each result is a trip (kind "query") or a client
+    # with no matching trip (kind "lead").
+    terms = search_terms(query_text)
+
+    if not terms:
+        return []
+
+    if uses_fts(session):
+        return _search_fts(session, terms, limit)
+
+    return _search_like(session, terms, limit)
+
+
+def find_queries(session, query_text, limit=SEARCH_RESULT_LIMIT):
+
+    # Typeahead for picking a trip: "42" or "#42" puts query 42 first, then
+    # the best matches on client name, phone, destination, notes...
+    found = []
+
+    wanted = str(query_text or "").strip().lstrip("#")
+
+    if wanted.isdigit():
+
+        row = (
+            session.query(
+                Query.id, Query.lead_id, Lead.name, Lead.phone,
+                Query.destination, Query.travel_date, Query.status
+            )
+            .outerjoin(Lead, Query.lead_id == Lead.id)
+            .filter(Query.id == int(wanted))
+            .first()
+        )
+
+        if row:
+            found.append(_result("query", *row, None, None))
+
+    seen = {r["query_id"] for r in found}
+
+    for r in search(session, query_text, limit=limit):
+        if r["kind"] == "query" and r["query_id"] not in seen:
+            found.append(r)
+
+    return found[:limit]
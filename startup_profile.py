@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import config
+
+# Cold-start profile of the Streamlit app, run in a fresh interpreter so
+# nothing is already imported:
+#
+#   python startup_profile.py                 # report
+#   python startup_profile.py --budget 4      # exit 1 when over budget
+#   python startup_profile.py --json          # machine-readable
+#
+# Reports the import-time breakdown of the run (python -X importtime,
+# grouped by top-level package), the first render itself, and for every
+# other page the switch time and which heavy packages it pulled in.
+
+# ===============================
+# SETTINGS
+# ===============================
+STARTUP_BUDGET_SECONDS = config.get_float("STARTUP_BUDGET_SECONDS", 3.0)
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+
+# Worth calling out when a page loads them
+HEAVY_PACKAGES = ["pandas", "numpy", "google", "grpc", "fpdf", "PIL", "fontTools", "requests"]
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+# ===============================
+# CHILD (fresh interpreter)
+# ===============================
+def _top_level(modules):
+
+    return {name.split(".")[0] for name in modules}
+
+
+def _child():
+
+    # Runs under -X importtime; the breakdown goes to stderr, timings to stdout
+    started = time.perf_counter()
+
+    from streamlit.testing.v1 import AppTest
+
+    harness_seconds = time.perf_counter() - started
+
+    before = set(sys.modules)
+    started = time.perf_counter()
+
+    at = AppTest.from_file(APP_FILE, default_timeout=120)
+    at.run()
+
+    first_render = time.perf_counter() - started
+    loaded = set(sys.modules)
+
+    result = {
+        "harness_seconds": harness_seconds,
+        "first_page": at.sidebar.radio[0].value,
+        "first_render_seconds": first_render,
+        "first_render_heavy": sorted(_top_level(loaded - before) & set(HEAVY_PACKAGES)),
+        "exceptions": [str(e.value) for e in at.exception],
+        "pages": []
+    }
+
+    for page in at.sidebar.radio[0].options[1:]:
+
+        before = set(sys.modules)
+        started = time.perf_counter()
+
+        at.sidebar.radio[0].set_value(page)
+        at.run()
+
+        result["pages"].append({
+            "page": page,
+            "seconds": time.perf_counter() - started,
+            "new_heavy": sorted(_top_level(set(sys.modules) - before) & set(HEAVY_PACKAGES)),
+            "exceptions": [str(e.value) for e in at.exception]
+        })
+
+    print(json.dumps(result))
+
+
+# ===============================
+# PARENT
+# ===============================
+def parse_importtime(stderr):
+
+    # Top-level packages by cumulative import time (seconds). Only lines for
+    # a package's first module count - nested lines are already included
+    # in their parent's cumulative figure.
+    totals = {}
+
+    for line in stderr.splitlines():
+
+        match = _IMPORTTIME_LINE.match(line)
+
+        if not match:
+            continue
+
+        _, cumulative_us, indent, name = match.groups()
+
+        if len(indent) != 1:
+            continue
+
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + int(cumulative_us) / 1e6
+
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def profile():
+
+    # The child gets its own throwaway database, never the working one
+    with tempfile.TemporaryDirectory() as tmp:
+
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'profile.db')}")
+
+        started = time.perf_counter()
+
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", os.path.abspath(__file__), "--child"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(APP_FILE),
+            env=env
+        )
+
+        wall_seconds = time.perf_counter() - started
+
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "profile failed")
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["wall_seconds"] = wall_seconds
+    result["imports"] = parse_importtime(completed.stderr)
+
+    # What a container start actually waits for: the app's first page,
+    # without the test harness import
+    result["cold_start_seconds"] = result["first_render_seconds"]
+
+    return result
+
+
+def print_report(result, top=12):
+
+    print("Import time by top-level package (whole profile run):")
+
+    for package, seconds in result["imports"][:top]:
+        print(f"  {package:28} {seconds * 1000:8.0f} ms")
+
+    print(
+        f"\nFirst render ({result['first_page']}): "
+        f"{result['first_render_seconds']:.2f}s"
+        + (f"  loads: {', '.join(result['first_render_heavy'])}" if result["first_render_heavy"] else "")
+    )
+
+    for page in result["pages"]:
+        print(
+            f"  -> {page['page']:24} {page['seconds']:.2f}s"
+            + (f"  loads: {', '.join(page['new_heavy'])}" if page["new_heavy"] else "")
+        )
+
+    for error in result["exceptions"] + [e for p in result["pages"] for e in p["exceptions"]]:
+        print(f"  ! {error}")
+
+    print(f"\n(test harness import {result['harness_seconds']:.2f}s, total run {result['wall_seconds']:.2f}s)")
+
+
+def main(argv=None):
+
+    if argv is None and sys.argv[1:] == ["--child"]:
+        _child()
+        return 0
+
+    parser = argparse.ArgumentParser(description="Cold-start profile of the Streamlit app.")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_SECONDS, help="Max first-render seconds")
+    parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+
+    args = parser.parse_args(argv)
+
+    result = profile()
+    result["budget_seconds"] = args.budget
+    result["within_budget"] = result["cold_start_seconds"] <= args.budget
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+
+    else:
+        print_report(result)
+        print(
+            f"Cold start {result['cold_start_seconds']:.2f}s / budget {args.budget:.2f}s: "
+            + ("OK" if result["within_budget"] else "OVER BUDGET")
+        )
+
+    return 0 if result["within_budget"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+# App modules read their settings at import time: keep the test run away
+# from the working copy's database, PDF cache and secrets
+_scratch = tempfile.mkdtemp(prefix="pristine-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_scratch, 'crm.db')}"
+os.environ["PDF_CACHE_DIR"] = os.path.join(_scratch, "pdf_cache")
+os.environ["PRISTINE_SECRETS_FILE"] = os.path.join(_scratch, "secrets.toml")
+
+import pytest
+from sqlalchemy.orm import Session
+
+import database
+from database import create_db_engine
+from migrations import run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+
+    # A migrated database per test; session_scope() (jobs, batch) uses it too
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'crm.db'}")
+    run_migrations(engine)
+
+    database.SessionLocal.configure(bind=engine)
+
+    yield engine
+
+    database.SessionLocal.configure(bind=database.engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def submitted_jobs(monkeypatch):
+
+    # Replaces the job pool: records the submitted job ids, runs nothing
+    import jobs
+
+    submitted = []
+
+    class _RecordingPool:
+        def submit(self, fn, job_id, api_key):
+            submitted.append(job_id)
+
+    monkeypatch.setattr(jobs, "_get_executor", _RecordingPool)
+
+    return submitted
@@ -0,0 +1,115 @@
+import datetime
+import os
+import tempfile
+
+import pytest
+
+import exporter
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+
+@pytest.fixture
+def app():
+
+    # The whole Streamlit script, against conftest's scratch database
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_FILE, default_timeout=60)
+    at.run()
+
+    assert not at.exception
+
+    return at
+
+
+def _go(at, page):
+
+    at.sidebar.radio[0].set_value(page)
+    at.run()
+
+    assert not at.exception
+
+
+def _button(at, label):
+
+    return next(b for b in at.button if b.label == label)
+
+
+def test_failed_export_leaves_no_temp_file(app, monkeypatch, tmp_path):
+
+    # Regression: only ExportError removed the mkstemp file
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    def broken_export(*args, **kwargs):
+        raise RuntimeError("disk went away")
+
+    monkeypatch.setattr(exporter, "export_rows", broken_export)
+
+    _go(app, "Data Tools")
+
+    _button(app, "Prepare Export").click()
+    app.run()
+
+    assert [e.value for e in app.exception] == ["disk went away"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_batch_panel_stops_polling_once_finished(app):
+
+    # Regression: the run_every fragment kept polling after every job was done
+    from database import session_scope
+    from models import GenerationJob, Lead, Query
+
+    now = datetime.datetime.utcnow()
+
+    with session_scope() as session:
+
+        job = GenerationJob(
+            query=Query(lead=Lead(name="Asha Sharma"), destination="Bali"),
+            status="done",
+            started_at=now - datetime.timedelta(seconds=12),
+            finished_at=now,
+            message="ok"
+        )
+        session.add(job)
+        session.flush()
+
+        job_id = job.id
+
+    app.session_state["batch_job_ids"] = [job_id]
+
+    _go(app, "AI Itinerary Builder")
+
+    assert "batch_job_ids" not in app.session_state
+    assert app.session_state["batch_report"]["succeeded"] == 1
+
+    app.run()
+
+    assert [m.label for m in app.metric] == ["Throughput", "p50 Latency", "p95 Latency"]
+
+    _button(app, "Clear Batch Report").click()
+    app.run()
+
+    assert "batch_report" not in app.session_state
+
+
+def test_capacity_panel_shows_governor_models_and_cache(app, monkeypatch):
+
+    import resilience
+
+    breaker = resilience.CircuitBreaker("gemini-test", failure_threshold=1)
+    breaker.record_failure()
+    monkeypatch.setitem(resilience._breakers, "gemini-test", breaker)
+
+    app.run()
+
+    panel = next(e for e in app.sidebar.expander if "Capacity" in e.label)
+    captions = " ".join(c.value for c in panel.caption)
+
+    assert "Admitted" in captions
+    assert "Time to first token: cold" in captions
+    assert "gemini-test open" in captions
+    assert "Cached drafts:" in captions
+
+    assert [b.proto.label for b in panel.get("download_button")] == ["Download Metrics"]
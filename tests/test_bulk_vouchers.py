@@ -0,0 +1,91 @@
+import csv
+import io
+import os
+import zipfile
+
+import pytest
+
+import bulk_vouchers
+from bulk_vouchers import VoucherSheetError
+
+
+class _KillsTheWorker:
+
+    # Unpickling it in the render worker ends that process on the spot
+    def __reduce__(self):
+        return os._exit, (1,)
+
+
+def _rows(count):
+
+    return [
+        {
+            "client_name": f"Guest {i}",
+            "conf_no": f"CONF{i:03d}",
+            "hotel_details": "Taj Exotica, Goa",
+            "check_in": "2026-12-01",
+            "check_out": "05/12/2026"
+        }
+        for i in range(count)
+    ]
+
+
+def _errors_csv(archive):
+
+    return list(csv.DictReader(io.StringIO(archive.read("errors.csv").decode("utf-8"))))
+
+
+def test_sheet_headers_are_normalized():
+
+    sheet = io.BytesIO(b"Client Name,Conf No,Hotel Details,Check-In,Extra\nAsha,C1,Taj,2026-12-01,x\n")
+
+    assert bulk_vouchers.read_voucher_rows(sheet, "vouchers.csv") == [
+        {"client_name": "Asha", "conf_no": "C1", "hotel_details": "Taj", "check_in": "2026-12-01"}
+    ]
+
+
+def test_sheet_without_required_columns_is_rejected():
+
+    with pytest.raises(VoucherSheetError, match="hotel_details"):
+        bulk_vouchers.read_voucher_rows(io.BytesIO(b"client_name,conf_no\nAsha,C1\n"), "vouchers.csv")
+
+
+def test_legacy_xls_is_rejected_up_front():
+
+    # Regression: .xls went to read_excel, which needs xlrd (not shipped)
+    with pytest.raises(VoucherSheetError, match=r"\.xls"):
+        bulk_vouchers.read_voucher_rows(io.BytesIO(b"\xd0\xcf\x11\xe0"), "vouchers.xls")
+
+
+def test_bad_rows_are_listed_and_the_rest_rendered():
+
+    rows = _rows(3)
+    rows[1]["hotel_details"] = ""
+    rows[2]["check_in"] = "someday"
+
+    report = bulk_vouchers.build_voucher_zip(rows, max_workers=1)
+
+    assert (report["total"], report["rendered"]) == (3, 1)
+
+    with zipfile.ZipFile(io.BytesIO(report["zip_bytes"])) as archive:
+
+        assert sorted(archive.namelist()) == ["002_Hotel_Voucher_CONF000_Guest_0.pdf", "errors.csv"]
+        assert [row["row"] for row in _errors_csv(archive)] == ["3", "4"]
+        assert archive.read("002_Hotel_Voucher_CONF000_Guest_0.pdf").startswith(b"%PDF")
+
+
+def test_crashed_render_worker_keeps_the_finished_vouchers():
+
+    # Regression: a worker dying broke the pool and BrokenProcessPool
+    # escaped build_voucher_zip, losing every voucher already rendered
+    rows = _rows(bulk_vouchers.VOUCHER_POOL_MIN_ROWS * 3)
+    rows[-1]["notes"] = _KillsTheWorker()
+
+    report = bulk_vouchers.build_voucher_zip(rows, max_workers=2)
+
+    assert report["rendered"] + len(report["errors"]) == len(rows)
+    assert report["errors"]
+    assert all(e["error"].startswith("Render worker crashed") for e in report["errors"])
+
+    with zipfile.ZipFile(io.BytesIO(report["zip_bytes"])) as archive:
+        assert len(archive.namelist()) == report["rendered"] + 1
@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy import event
+
+from dashboard import ACTIVE_QUERY_SORTS, get_active_queries_page, get_dashboard_metrics, get_recent_open_queries
+from models import Lead, Query
+
+# (travel_date, status) per query, ids 1..n in this order
+TRIPS = [
+    ("2026-12-01", "Pending"),
+    (None, "Pending"),
+    ("2026-11-15", "Quoted"),
+    ("2026-12-01", "Pending"),
+    (None, "Quoted"),
+    ("2026-10-20", "Pending"),
+    (None, "Pending"),
+    ("2026-11-15", "Pending"),
+    ("2027-01-05", "Quoted"),
+    ("2026-10-20", "Pending"),
+    (None, "Pending"),
+]
+
+
+@pytest.fixture
+def trips(session):
+
+    lead = Lead(name="Asha Sharma")
+
+    session.add_all(
+        Query(lead=lead, destination=f"Trip {i}", travel_date=travel_date, status=status)
+        for i, (travel_date, status) in enumerate(TRIPS, start=1)
+    )
+    session.commit()
+
+    return [(i, travel_date, status) for i, (travel_date, status) in enumerate(TRIPS, start=1)]
+
+
+def _walk(session, **filters):
+
+    ids = []
+    cursor = None
+
+    while True:
+
+        page, cursor = get_active_queries_page(session, cursor=cursor, page_size=3, **filters)
+        ids.extend(row["ID"] for row in page)
+
+        if cursor is None:
+            return ids
+
+
+def _travel_date_order(trips):
+
+    undated = [i for i, travel_date, _ in trips if travel_date is None]
+    dated = sorted((travel_date, i) for i, travel_date, _ in trips if travel_date is not None)
+
+    return undated + [i for _, i in dated]
+
+
+@pytest.mark.parametrize("status", [None, "Pending", "Quoted"])
+def test_pages_cover_every_query_once_in_order(session, trips, status):
+
+    wanted = [t for t in trips if status is None or t[2] == status]
+    ids = [i for i, _, _ in wanted]
+
+    assert _walk(session, status=status, sort="Newest") == sorted(ids, reverse=True)
+    assert _walk(session, status=status, sort="Oldest") == sorted(ids)
+
+    # Undated first, then by date - ties and the segment switch fall on
+    # page boundaries with page_size 3
+    assert _walk(session, status=status, sort="Travel Date") == _travel_date_order(wanted)
+
+
+def test_travel_date_pages_are_index_range_scans(session, engine, trips):
+
+    # Regression: ordering by COALESCE(travel_date, '') hid the index, so
+    # every page sorted the whole filtered table in a temp B-tree
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+
+    try:
+        _walk(session, status="Pending", sort=ACTIVE_QUERY_SORTS[2])
+
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    assert statements
+
+    with engine.connect() as conn:
+
+        for statement, parameters in statements:
+
+            plan = " ".join(
+                row[-1]
+                for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            )
+
+            assert "ix_queries_status_travel_date" in plan
+            assert "TEMP B-TREE" not in plan
+
+
+def test_metrics_count_by_status(session, trips):
+
+    metrics = get_dashboard_metrics(session)
+
+    assert metrics["total_leads"] == 1
+    assert metrics["active_queries"] == len(TRIPS)
+    assert metrics["quoted"] == 3
+    assert metrics["pending"] == len(TRIPS) - 3
+
+
+def test_recent_open_queries_skip_quoted(session, trips):
+
+    recent = get_recent_open_queries(session, limit=3)
+
+    assert [r["query_id"] for r in recent] == [11, 10, 8]
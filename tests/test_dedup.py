@@ -0,0 +1,95 @@
+import pytest
+
+import contacts
+import dedup
+from models import Lead, Query
+
+
+@pytest.mark.parametrize("raw", [
+    "+91 98765 43210",
+    "098765 43210",
+    "9876543210",
+    "0091 98765-43210",
+    "9876543210.0",
+])
+def test_phone_formats_share_a_key(raw):
+
+    assert contacts.phone_key(raw) == "919876543210"
+
+
+def test_email_key_ignores_case_plus_addressing_and_gmail_dots():
+
+    assert contacts.email_key("Asha.Verma+travel@GoogleMail.com") == "ashaverma@gmail.com"
+    assert contacts.email_key("a.sha@example.com") == "a.sha@example.com"
+    assert contacts.email_key("not an email") is None
+
+
+def _lead(session, name, phone=None, email=None, source=None):
+
+    lead = Lead(name=name, phone=phone, email=email, source=source, **contacts.match_keys(phone, email))
+    session.add(lead)
+    session.flush()
+
+    return lead.id
+
+
+def test_groups_join_through_either_key(session):
+
+    # a-b share a phone, b-c an email: one client, found transitively
+    a = _lead(session, "Asha", phone="98765 43210")
+    b = _lead(session, "Asha V", phone="+919876543210", email="asha@example.com")
+    other = _lead(session, "Ravi", phone="9811111111")
+    c = _lead(session, "A. Verma", email="ASHA@example.com")
+    d = _lead(session, "Meera", email="meera@example.com")
+    e = _lead(session, "Meera S", email="meera+trips@example.com")
+    session.commit()
+
+    assert dedup.find_duplicate_groups(session) == [[a, b, c], [d, e]]
+    assert other not in sum(dedup.find_duplicate_groups(session), [])
+
+
+def test_find_matching_lead_returns_the_oldest(session):
+
+    first = _lead(session, "Asha", phone="98765 43210")
+    _lead(session, "Asha again", phone="+91 98765 43210")
+    session.commit()
+
+    assert dedup.find_matching_lead(session, "0091 9876543210", None).id == first
+    assert dedup.find_matching_lead(session, "9811111111", "nobody@example.com") is None
+
+
+def test_merge_moves_queries_and_fills_missing_details(session):
+
+    survivor = _lead(session, "Asha", phone="98765 43210")
+    duplicate = _lead(session, "Asha V", phone="+919876543210", email="asha@example.com", source="Instagram")
+    session.add_all([
+        Query(lead_id=survivor, destination="Bali"),
+        Query(lead_id=duplicate, destination="Dubai"),
+        Query(lead_id=duplicate, destination="Paris")
+    ])
+    session.commit()
+
+    report = dedup.merge_duplicates(session, batch_groups=1)
+
+    assert (report["groups"], report["leads_merged"], report["queries_moved"]) == (1, 1, 2)
+
+    session.expire_all()
+
+    assert session.get(Lead, duplicate) is None
+
+    lead = session.get(Lead, survivor)
+
+    assert (lead.email, lead.email_key, lead.source) == ("asha@example.com", "asha@example.com", "Instagram")
+    assert sorted(q.destination for q in session.query(Query).filter(Query.lead_id == survivor)) == ["Bali", "Dubai", "Paris"]
+
+
+def test_dry_run_changes_nothing(session):
+
+    _lead(session, "Asha", phone="98765 43210")
+    _lead(session, "Asha V", phone="+919876543210")
+    session.commit()
+
+    report = dedup.merge_duplicates(session, dry_run=True)
+
+    assert (report["groups"], report["leads_merged"]) == (1, 0)
+    assert session.query(Lead).count() == 2
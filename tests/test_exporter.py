@@ -0,0 +1,90 @@
+import csv
+import datetime
+import io
+
+import pytest
+
+import exporter
+from exporter import ExportError
+from models import Lead, Query
+
+
+@pytest.fixture
+def crm(session):
+
+    asha = Lead(name="Asha Sharma", phone="9876543210", source="Instagram")
+    ravi = Lead(name="Ravi Kumar", source="Walk-in")
+
+    session.add_all([
+        Query(lead=asha, destination="Dubai", status="Quoted", pax=2, saved_itinerary="Day 1: Marina"),
+        Query(lead=asha, destination="Bali", status="Pending", pax=2),
+        Query(lead=ravi, destination="Dubai Desert", status="Pending", pax=4, saved_itinerary="")
+    ])
+    session.commit()
+
+
+def _csv_rows(session, table, **filters):
+
+    out = io.BytesIO()
+    report = exporter.export_rows(session, table, out, fmt="csv", batch_rows=2, **filters)
+
+    rows = list(csv.DictReader(io.StringIO(out.getvalue().decode("utf-8"))))
+
+    assert report["rows"] == len(rows)
+
+    return rows
+
+
+def test_csv_streams_every_row_in_batches(session, crm):
+
+    progress = []
+    out = io.BytesIO()
+
+    report = exporter.export_rows(session, "queries", out, batch_rows=2, progress=progress.append)
+
+    assert report["rows"] == 3
+    assert progress == [2, 3]
+    assert out.getvalue().decode("utf-8").splitlines()[0] == "id,lead_id,client,destination,travel_date,pax,budget,status,created_at"
+
+
+def test_filters(session, crm):
+
+    assert [r["destination"] for r in _csv_rows(session, "queries", destination="dubai")] == ["Dubai", "Dubai Desert"]
+    assert [r["client"] for r in _csv_rows(session, "queries", source="Walk-in")] == ["Ravi Kumar"]
+    assert [r["name"] for r in _csv_rows(session, "leads", status="Quoted")] == ["Asha Sharma"]
+
+    today = datetime.date.today()
+
+    assert len(_csv_rows(session, "leads", created_from=today, created_to=today)) == 2
+    assert _csv_rows(session, "leads", created_to=today - datetime.timedelta(days=1)) == []
+
+
+def test_itineraries_only_include_saved_drafts(session, crm):
+
+    assert [(r["destination"], r["saved_itinerary"]) for r in _csv_rows(session, "itineraries")] == [("Dubai", "Day 1: Marina")]
+
+
+def test_parquet_keeps_column_types(session, crm, tmp_path):
+
+    # pyarrow is a hard requirement (requirements.txt), not an optional extra
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "queries.parquet"
+
+    report = exporter.export_rows(session, "queries", str(path), fmt="parquet", batch_rows=2)
+    table = pq.read_table(path)
+
+    assert report["rows"] == table.num_rows == 3
+    assert str(table.schema.field("id").type) == "int64"
+    assert str(table.schema.field("created_at").type) == "timestamp[us]"
+    assert table.column("destination").to_pylist() == ["Dubai", "Bali", "Dubai Desert"]
+    assert pq.ParquetFile(path).num_row_groups == 2
+
+
+def test_unknown_table_or_format(session):
+
+    with pytest.raises(ExportError, match="table"):
+        exporter.export_rows(session, "payments", io.BytesIO())
+
+    with pytest.raises(ExportError, match="format"):
+        exporter.export_rows(session, "leads", io.BytesIO(), fmt="xlsx")
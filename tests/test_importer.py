@@ -0,0 +1,83 @@
+import pytest
+
+import cli
+import dedup
+import importer
+from importer import ImportFileError
+from models import Lead, Query
+
+SHEET = """Full Name,Mobile Number,Email Address,Platform,Where To,Date of Travel,No of Pax
+Asha Sharma,098765 43210,asha@example.com,Instagram,Dubai,01/12/2026,2
+Ravi Kumar,9811111111,,,Bali,2026-11-05,4
+Asha S,+91 98765 43210,,,Paris,,2
+,9822222222,,,Goa,,
+Meera Shah,12,not-an-email,,Kyoto,,
+Kabir Mehta,9833333333,,,,,
+"""
+
+
+@pytest.fixture
+def sheet(tmp_path):
+
+    path = tmp_path / "leads.csv"
+    path.write_text(SHEET, encoding="utf-8")
+
+    return str(path)
+
+
+def test_rows_become_leads_and_enquiries(session, sheet):
+
+    report = importer.import_leads(session, sheet, "leads.csv", default_source="Import", chunk_rows=2)
+
+    assert report["rows"] == 6
+    assert (report["leads_created"], report["leads_reused"], report["queries_created"]) == (3, 1, 3)
+    assert [(e["row"], e["error"]) for e in report["errors"]] == [(5, "name is empty"), (6, "no valid phone or email")]
+
+    asha = session.query(Lead).filter(Lead.name == "Asha Sharma").one()
+
+    assert (asha.source, asha.phone_key) == ("Instagram", "919876543210")
+    assert sorted(q.destination for q in asha.queries) == ["Dubai", "Paris"]
+    assert session.query(Query).filter(Query.destination == "Dubai").one().travel_date == "2026-12-01"
+
+    # Rows for the same client across chunks never make a duplicate
+    assert dedup.find_duplicate_groups(session) == []
+
+
+def test_returning_client_is_reused(session, sheet):
+
+    session.add(Lead(name="Ravi K", phone="+91 98111 11111", phone_key="919811111111"))
+    session.commit()
+
+    report = importer.import_leads(session, sheet, "leads.csv")
+
+    assert (report["leads_created"], report["leads_reused"]) == (2, 2)
+    assert session.query(Lead).count() == 3
+
+
+def test_file_without_a_contact_column_is_rejected(session, tmp_path):
+
+    path = tmp_path / "names.csv"
+    path.write_text("Name,Destination\nAsha,Dubai\n", encoding="utf-8")
+
+    with pytest.raises(ImportFileError, match="phone or email"):
+        importer.import_leads(session, str(path), "names.csv")
+
+
+def test_cli_chunk_size_defaults_to_the_setting(engine, sheet, monkeypatch):
+
+    # Regression: --chunk-rows had its own hard-coded default, so the
+    # IMPORT_CHUNK_ROWS setting never reached the command line
+    seen = []
+    import_leads = importer.import_leads
+
+    def recording_import(*args, **kwargs):
+        seen.append(kwargs["chunk_rows"])
+        return import_leads(*args, **kwargs)
+
+    monkeypatch.setattr(importer, "IMPORT_CHUNK_ROWS", 2)
+    monkeypatch.setattr(importer, "import_leads", recording_import)
+
+    assert cli.main(["import", sheet]) == 0
+    assert cli.main(["import", sheet, "--chunk-rows", "50"]) == 0
+
+    assert seen == [2, 50]
@@ -0,0 +1,169 @@
+import datetime
+import threading
+import time
+
+from sqlalchemy.exc import IntegrityError
+
+import jobs
+import prompt_cache
+from database import session_scope
+from models import GenerationJob, Lead, Query
+
+
+def _add_query(session):
+
+    query = Query(lead=Lead(name="Asha Verma"), destination="Bali")
+    session.add(query)
+    session.commit()
+
+    return query.id
+
+
+def _wait_for(predicate, timeout=10):
+
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+
+    return False
+
+
+def _job_status(job_id):
+
+    with session_scope() as session:
+        return session.get(GenerationJob, job_id).status
+
+
+def test_second_submit_returns_the_active_job(session, submitted_jobs):
+
+    query_id = _add_query(session)
+
+    first = jobs.submit_generation_job(session, query_id, "prompt", "key")
+    second = jobs.submit_generation_job(session, query_id, "prompt", "key")
+
+    assert first == second
+    assert submitted_jobs == [first]
+
+
+def test_database_allows_one_active_job_per_query(session):
+
+    query_id = _add_query(session)
+
+    session.add(GenerationJob(query_id=query_id, status="queued"))
+    session.commit()
+
+    session.add(GenerationJob(query_id=query_id, status="running"))
+
+    try:
+        session.commit()
+        raised = False
+
+    except IntegrityError:
+        session.rollback()
+        raised = True
+
+    assert raised
+
+    # Finished jobs do not count
+    session.add(GenerationJob(query_id=query_id, status="done"))
+    session.commit()
+
+
+def test_lost_race_against_a_finished_winner_returns_it(session, submitted_jobs, monkeypatch):
+
+    # Regression: the winner finished between the unique-index violation and
+    # the lookup, and get_active_job() returned None
+    query_id = _add_query(session)
+
+    winner = GenerationJob(query_id=query_id, status="queued")
+    session.add(winner)
+    session.commit()
+
+    monkeypatch.setattr(jobs, "get_active_job", lambda session, query_id: None)
+
+    real_latest = jobs.get_latest_job
+
+    def finish_then_look(session, query_id):
+        session.get(GenerationJob, winner.id).status = "done"
+        session.commit()
+        return real_latest(session, query_id)
+
+    monkeypatch.setattr(jobs, "get_latest_job", finish_then_look)
+
+    assert jobs.submit_generation_job(session, query_id, "prompt", "key") == winner.id
+    assert submitted_jobs == []
+
+
+def test_job_without_heartbeat_is_requeued(session, submitted_jobs):
+
+    query_id = _add_query(session)
+    long_ago = datetime.datetime.utcnow() - datetime.timedelta(seconds=jobs.JOB_STALE_SECONDS + 60)
+
+    job = GenerationJob(query_id=query_id, status="running", started_at=long_ago, heartbeat_at=long_ago)
+    session.add(job)
+    session.commit()
+
+    assert jobs.is_stale(job)
+    assert jobs.recover_stale_jobs(session, "key") == [job.id]
+    assert submitted_jobs == [job.id]
+
+    session.refresh(job)
+    assert job.status == "queued"
+
+    # The presumed-dead worker must not overwrite the new run
+    assert not jobs._finish(session, job.id, long_ago, status="done", message="late")
+
+
+def test_long_running_job_with_heartbeat_is_not_requeued(session, submitted_jobs):
+
+    # Regression: staleness used started_at only, so a slow generation
+    # (governor queue, retries) was requeued and ran twice
+    query_id = _add_query(session)
+    long_ago = datetime.datetime.utcnow() - datetime.timedelta(seconds=jobs.JOB_STALE_SECONDS + 60)
+
+    job = GenerationJob(
+        query_id=query_id,
+        status="running",
+        started_at=long_ago,
+        heartbeat_at=datetime.datetime.utcnow()
+    )
+    session.add(job)
+    session.commit()
+
+    assert not jobs.is_stale(job)
+    assert jobs.recover_stale_jobs(session, "key") == []
+    assert submitted_jobs == []
+
+
+def test_worker_heartbeat_keeps_a_slow_job_alive(session, monkeypatch):
+
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.1)
+    monkeypatch.setattr(jobs, "JOB_STALE_SECONDS", 0.5)
+
+    release = threading.Event()
+
+    def slow_generation(session, prompt_text, api_key, force_refresh=False, label=None):
+        release.wait(10)
+        return "Day 1: Arrival", "ok"
+
+    monkeypatch.setattr(prompt_cache, "generate_with_cache", slow_generation)
+
+    query_id = _add_query(session)
+    job_id = jobs.submit_generation_job(session, query_id, "prompt", "key")
+
+    assert _wait_for(lambda: _job_status(job_id) == "running")
+
+    time.sleep(1.0)
+
+    with session_scope() as check:
+        assert jobs.recover_stale_jobs(check, "key") == []
+
+    release.set()
+
+    assert _wait_for(lambda: _job_status(job_id) == "done")
+
+    session.expire_all()
+    assert session.get(Query, query_id).saved_itinerary == "Day 1: Arrival"
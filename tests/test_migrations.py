@@ -0,0 +1,142 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+import contacts
+import migrations
+import search
+from database import create_db_engine
+from migrations import MIGRATIONS, run_migrations, get_schema_version
+
+# The schema the original single-file main.py created
+LEGACY_SCHEMA = """
+    CREATE TABLE leads (
+        id INTEGER NOT NULL, name VARCHAR, email VARCHAR, phone VARCHAR,
+        source VARCHAR, created_at DATETIME, PRIMARY KEY (id)
+    );
+    CREATE TABLE queries (
+        id INTEGER NOT NULL, lead_id INTEGER, destination VARCHAR,
+        travel_date VARCHAR, pax INTEGER, budget VARCHAR, notes TEXT,
+        status VARCHAR, saved_itinerary TEXT, saved_hotels TEXT,
+        saved_price TEXT, PRIMARY KEY (id), FOREIGN KEY(lead_id) REFERENCES leads (id)
+    );
+"""
+
+LEGACY_LEADS = [
+    (1, "Asha Verma", "Asha.Verma@Gmail.com", "098765 43210"),
+    (2, "Ravi Kumar", None, "+91 98765 00000"),
+    (3, "Meera Shah", "meera@example.com", None),
+    (4, "Asha V", None, "9876543210"),
+    (5, "Walk-in", None, None),
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+
+    path = tmp_path / "legacy.db"
+
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO leads (id, name, email, phone) VALUES (?, ?, ?, ?)", LEGACY_LEADS)
+    conn.executemany(
+        "INSERT INTO queries (lead_id, destination, status) VALUES (?, ?, ?)",
+        [(1, "Bali", None), (2, "Dubai", "Pending"), (3, "Paris", None)]
+    )
+    conn.commit()
+    conn.close()
+
+    engine = create_db_engine(f"sqlite:///{path}")
+
+    yield engine
+
+    engine.dispose()
+
+
+def test_versions_are_numbered_without_gaps():
+
+    assert [version for version, _, _ in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1))
+
+
+def test_legacy_database_upgrades_to_latest(legacy_engine):
+
+    assert get_schema_version(legacy_engine) == 0
+    assert run_migrations(legacy_engine) == [version for version, _, _ in MIGRATIONS]
+    assert get_schema_version(legacy_engine) == len(MIGRATIONS)
+
+    with legacy_engine.connect() as conn:
+
+        statuses = conn.execute(text("SELECT status FROM queries ORDER BY id")).scalars().all()
+
+        assert statuses == ["Pending", "Pending", "Pending"]
+
+    # Nothing left to do on the next start
+    assert run_migrations(legacy_engine) == []
+
+
+def test_match_keys_are_backfilled_across_batches(legacy_engine, monkeypatch):
+
+    monkeypatch.setattr(migrations, "BACKFILL_BATCH_ROWS", 2)
+
+    run_migrations(legacy_engine)
+
+    with legacy_engine.connect() as conn:
+        rows = conn.execute(text("SELECT id, phone, email, phone_key, email_key FROM leads ORDER BY id")).all()
+
+    assert len(rows) == len(LEGACY_LEADS)
+
+    for lead_id, phone, email, phone_key, email_key in rows:
+        assert {"phone_key": phone_key, "email_key": email_key} == contacts.match_keys(phone, email)
+
+    assert rows[0].phone_key == rows[3].phone_key == "919876543210"
+    assert rows[0].email_key == "ashaverma@gmail.com"
+
+
+def test_search_index_is_built_once(legacy_engine, monkeypatch):
+
+    # Regression: the index was built by one step and rebuilt by the next
+    builds = []
+    rebuild = search.rebuild_search_index
+
+    def counting_rebuild(conn):
+        builds.append(conn)
+        rebuild(conn)
+
+    monkeypatch.setattr(search, "rebuild_search_index", counting_rebuild)
+
+    run_migrations(legacy_engine)
+
+    assert len(builds) == 1
+
+    with legacy_engine.connect() as conn:
+        indexed = conn.execute(text(f"SELECT count(*) FROM {search.SEARCH_TABLE}")).scalar()
+
+    assert indexed == len(LEGACY_LEADS) + 3
+
+
+def test_duplicate_active_jobs_are_failed_before_the_unique_index(engine):
+
+    # Databases from before the one-active-job index may hold duplicates
+    version = next(
+        version for version, _, upgrade in MIGRATIONS
+        if upgrade is migrations._008_one_active_job_per_query
+    )
+
+    with engine.begin() as conn:
+
+        conn.execute(text("DROP INDEX uq_generation_jobs_active_query"))
+        conn.execute(text("INSERT INTO leads (id, name) VALUES (1, 'Asha')"))
+        conn.execute(text("INSERT INTO queries (id, lead_id, destination) VALUES (1, 1, 'Bali')"))
+        conn.execute(text(
+            "INSERT INTO generation_jobs (id, query_id, status) "
+            "VALUES (1, 1, 'queued'), (2, 1, 'running'), (3, 1, 'queued')"
+        ))
+        conn.execute(text("DELETE FROM schema_version WHERE version >= :version"), {"version": version})
+
+    assert run_migrations(engine)[0] == version
+
+    with engine.connect() as conn:
+        statuses = conn.execute(text("SELECT status FROM generation_jobs ORDER BY id")).scalars().all()
+
+    assert statuses == ["queued", "failed", "failed"]
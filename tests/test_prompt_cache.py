@@ -0,0 +1,99 @@
+import pytest
+
+import ai_engine
+import prompt_cache
+import rate_governor
+import resilience
+from resilience import CircuitBreaker
+
+PROMPT = """
+    Create a luxury structured itinerary for:
+    Bali
+"""
+
+
+class _Model:
+
+    def __init__(self, calls, answer=None, error=None):
+        self.calls = calls
+        self.answer = answer
+        self.error = error
+
+    def generate_content(self, prompt_text, **kwargs):
+
+        self.calls.append(self)
+
+        if self.error:
+            raise self.error
+
+        return type("Response", (), {"text": self.answer})()
+
+
+@pytest.fixture
+def models(monkeypatch):
+
+    from google.api_core.exceptions import ResourceExhausted
+
+    calls = []
+
+    candidates = [
+        ("gemini-preferred", _Model(calls, error=ResourceExhausted("quota"))),
+        ("gemini-fallback", _Model(calls, answer="Day 1: Arrival in Bali"))
+    ]
+
+    monkeypatch.setattr(ai_engine, "get_candidate_models", lambda api_key: list(candidates))
+    monkeypatch.setattr(rate_governor, "_governor", rate_governor.RateGovernor(10**6, 10**9, 50, 5.0))
+
+    for name, _ in candidates:
+        monkeypatch.setitem(resilience._breakers, name, CircuitBreaker(name))
+
+    return calls
+
+
+def test_normalized_prompts_share_a_key():
+
+    assert (
+        prompt_cache.make_cache_key(PROMPT, "m")
+        == prompt_cache.make_cache_key("Create a luxury structured itinerary for:\n  Bali  ", "m")
+    )
+    assert prompt_cache.make_cache_key(PROMPT, "m") != prompt_cache.make_cache_key(PROMPT, "n")
+
+
+def test_draft_written_by_a_fallback_model_is_a_hit(session, models):
+
+    # Regression: lookups used the preferred model's key only, so a draft
+    # stored under the fallback that answered was never found again
+    text, status = prompt_cache.generate_with_cache(session, PROMPT, "key")
+    session.commit()
+
+    assert text == "Day 1: Arrival in Bali"
+    assert len(models) == 2
+
+    text, status = prompt_cache.generate_with_cache(session, PROMPT, "key")
+
+    assert text == "Day 1: Arrival in Bali"
+    assert status.startswith("Loaded from cache (gemini-fallback")
+    assert len(models) == 2
+
+    assert list(prompt_cache.stream_with_cache(session, PROMPT, "key")) == ["Day 1: Arrival in Bali"]
+    assert len(models) == 2
+
+    assert prompt_cache.get_cache_stats(session)["hits"] == 2
+
+
+def test_preferred_model_entry_wins(session, models):
+
+    prompt_cache.store(session, prompt_cache.make_cache_key(PROMPT, "gemini-fallback"), "gemini-fallback", "older")
+    prompt_cache.store(session, prompt_cache.make_cache_key(PROMPT, "gemini-preferred"), "gemini-preferred", "newer")
+
+    assert prompt_cache.lookup_candidates(session, PROMPT, ["gemini-preferred", "gemini-fallback"]) == ("newer", "gemini-preferred")
+
+
+def test_force_refresh_skips_the_cache(session, models):
+
+    prompt_cache.store(session, prompt_cache.make_cache_key(PROMPT, "gemini-fallback"), "gemini-fallback", "stale draft")
+
+    text, _ = prompt_cache.generate_with_cache(session, PROMPT, "key", force_refresh=True)
+
+    assert text == "Day 1: Arrival in Bali"
+    assert len(models) == 2
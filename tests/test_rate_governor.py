@@ -0,0 +1,104 @@
+import threading
+import time
+
+import pytest
+
+import rate_governor
+from rate_governor import RateGovernor, RateLimitRejected
+
+
+def _drained(requests_per_minute, max_queue=10, max_wait_seconds=5.0):
+
+    governor = RateGovernor(requests_per_minute, 10**9, max_queue, max_wait_seconds)
+    governor.requests.tokens = 0.0
+
+    return governor
+
+
+def _acquire_in_thread(governor, label, outcomes):
+
+    def run():
+        try:
+            governor.acquire(10, label=label)
+            outcomes.append((label, "admitted"))
+
+        except RateLimitRejected:
+            outcomes.append((label, "rejected"))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+
+    # Until it has joined the queue
+    while governor.position(label) is None and thread.is_alive():
+        time.sleep(0.01)
+
+    return thread
+
+
+def test_callers_are_admitted_in_arrival_order():
+
+    # One slot every 0.1 s
+    governor = _drained(600)
+    outcomes = []
+
+    threads = [_acquire_in_thread(governor, f"call-{i}", outcomes) for i in range(4)]
+
+    for thread in threads:
+        thread.join(10)
+
+    assert outcomes == [(f"call-{i}", "admitted") for i in range(4)]
+    assert governor.snapshot()["queued"] == 4
+
+
+def test_timed_out_waiter_leaves_an_identical_waiter_queued():
+
+    # Regression: tickets were (label, tokens) tuples, so the one that timed
+    # out removed its twin from the queue and the twin could never reach
+    # the head
+    governor = _drained(1)
+    outcomes = []
+
+    patient = _acquire_in_thread(governor, "same", outcomes)
+
+    governor.max_wait_seconds = 0.2
+    impatient = _acquire_in_thread(governor, "same", outcomes)
+    impatient.join(5)
+
+    assert outcomes == [("same", "rejected")]
+    assert governor.position("same") == 1
+
+    with governor._cond:
+        governor.requests.tokens = 1.0
+        governor._cond.notify_all()
+
+    patient.join(5)
+
+    assert outcomes == [("same", "rejected"), ("same", "admitted")]
+
+
+def test_full_queue_rejects_immediately():
+
+    governor = _drained(1, max_queue=1, max_wait_seconds=0.5)
+    outcomes = []
+
+    waiter = _acquire_in_thread(governor, "first", outcomes)
+
+    started = time.monotonic()
+
+    with pytest.raises(RateLimitRejected):
+        governor.acquire(10, label="second")
+
+    assert time.monotonic() - started < 0.1
+
+    waiter.join(5)
+
+
+def test_metrics_text_is_prometheus_exposition():
+
+    lines = rate_governor.metrics_text().splitlines()
+
+    names = {line.split()[0] for line in lines}
+
+    assert "gemini_governor_admitted" in names
+    assert "gemini_governor_waiting" in names
+    assert all(len(line.split()) == 2 for line in lines)
@@ -0,0 +1,146 @@
+import time
+
+import pytest
+
+import ai_engine
+import rate_governor
+import resilience
+from resilience import CircuitBreaker
+
+
+@pytest.fixture(autouse=True)
+def roomy_governor(monkeypatch):
+
+    # The process-wide governor would start throttling after a few tests
+    monkeypatch.setattr(rate_governor, "_governor", rate_governor.RateGovernor(10**6, 10**9, 50, 5.0))
+
+
+def _opened(name, reset_seconds=60.0):
+
+    breaker = CircuitBreaker(name, failure_threshold=2, reset_seconds=reset_seconds)
+
+    breaker.record_failure()
+    breaker.record_failure()
+
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failures():
+
+    breaker = CircuitBreaker("model", failure_threshold=2, reset_seconds=60.0)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert 0 < breaker.retry_in() <= 60.0
+
+
+def test_success_resets_the_failure_count():
+
+    breaker = CircuitBreaker("model", failure_threshold=2, reset_seconds=60.0)
+
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_one_trial_through():
+
+    breaker = _opened("model", reset_seconds=0.05)
+    time.sleep(0.1)
+
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens():
+
+    breaker = _opened("model", reset_seconds=0.05)
+    time.sleep(0.1)
+
+    assert breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+
+
+def test_released_trial_can_be_retried():
+
+    breaker = _opened("model", reset_seconds=0.05)
+    time.sleep(0.1)
+
+    assert breaker.allow()
+    breaker.release()
+
+    assert breaker.allow()
+
+
+class _RaisingModel:
+
+    def __init__(self, error):
+        self.error = error
+
+    def generate_content(self, *args, **kwargs):
+        raise self.error
+
+
+def test_non_retryable_error_releases_the_trial(monkeypatch):
+
+    # Regression: a half-open trial that hit e.g. a bad request kept
+    # _trial_in_flight set, and the model stayed unusable for good
+    breaker = _opened("test-bad-request", reset_seconds=0.05)
+    monkeypatch.setitem(resilience._breakers, "test-bad-request", breaker)
+    time.sleep(0.1)
+
+    with pytest.raises(ValueError):
+        ai_engine._call_resilient(
+            [("test-bad-request", _RaisingModel(ValueError("blocked prompt")))],
+            lambda model: model.generate_content("prompt"),
+            100
+        )
+
+    assert breaker.allow()
+
+
+def test_transient_error_falls_back_to_the_next_model(monkeypatch):
+
+    from google.api_core.exceptions import ResourceExhausted
+
+    class _Answering:
+        def generate_content(self, *args, **kwargs):
+            return "draft"
+
+    monkeypatch.setitem(resilience._breakers, "test-busy", CircuitBreaker("test-busy"))
+    monkeypatch.setitem(resilience._breakers, "test-free", CircuitBreaker("test-free"))
+
+    model_name, result = ai_engine._call_resilient(
+        [("test-busy", _RaisingModel(ResourceExhausted("quota"))), ("test-free", _Answering())],
+        lambda model: model.generate_content("prompt"),
+        100
+    )
+
+    assert (model_name, result) == ("test-free", "draft")
+    assert resilience.breaker_states()["test-busy"] == "closed"
+
+
+def test_backoff_respects_the_retry_hint():
+
+    for attempt in range(5):
+        assert 7.0 <= resilience.backoff_delay(attempt, retry_after=7.0, base=1.0, cap=30.0) <= 30.0
+
+
+def test_retry_hint_is_read_from_the_message():
+
+    assert resilience.retry_after_seconds(Exception("Please retry in 37.2s.")) == 37.2
+    assert resilience.retry_after_seconds(Exception("quota exceeded")) is None
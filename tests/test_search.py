@@ -0,0 +1,189 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import event, text
+
+import search
+from database import bulk_insert
+from models import Lead, Query
+
+
+def _seed(session):
+
+    asha = Lead(name="Asha Sharma", phone="+91 98765-43210", email="asha@example.com")
+    ravi = Lead(name="Ravi Kumar", phone="9811111111")
+    meera = Lead(name="Meera Shah")
+
+    session.add_all([
+        Query(lead=asha, destination="Dubai", notes="Anniversary trip"),
+        Query(lead=asha, destination="Bali"),
+        Query(lead=ravi, destination="Zürich"),
+        meera
+    ])
+    session.commit()
+
+    return asha, ravi, meera
+
+
+def _found(results):
+
+    return [(r["kind"], r["client"], r["destination"]) for r in results]
+
+
+def test_terms_match_across_client_and_trip(session):
+
+    _seed(session)
+
+    assert _found(search.search(session, "sharma dubai")) == [("query", "Asha Sharma", "Dubai")]
+
+
+def test_terms_are_prefixes_and_ignore_accents(session):
+
+    _seed(session)
+
+    assert _found(search.search(session, "zur")) == [("query", "Ravi Kumar", "Zürich")]
+    assert _found(search.search(session, "anniv")) == [("query", "Asha Sharma", "Dubai")]
+
+
+def test_phone_matches_however_it_was_typed(session):
+
+    _seed(session)
+
+    assert {r["destination"] for r in search.search(session, "9876543210")} == {"Dubai", "Bali"}
+
+
+def test_client_without_trips_is_a_lead_result(session):
+
+    _, _, meera = _seed(session)
+
+    results = search.search(session, "meera")
+
+    assert [(r["kind"], r["lead_id"]) for r in results] == [("lead", meera.id)]
+
+
+def test_index_follows_updates_and_deletes(session):
+
+    asha, ravi, _ = _seed(session)
+
+    ravi.name = "Ravindra Kumar"
+    bali = session.query(Query).filter(Query.destination == "Bali").one()
+    session.delete(bali)
+    session.commit()
+
+    assert _found(search.search(session, "ravindra")) == [("query", "Ravindra Kumar", "Zürich")]
+    assert search.search(session, "bali") == []
+
+
+def test_find_queries_puts_an_id_first(session):
+
+    _seed(session)
+
+    results = search.find_queries(session, "#3")
+
+    assert results[0]["query_id"] == 3
+
+
+def test_punctuation_never_reaches_the_match_syntax(session):
+
+    _seed(session)
+
+    assert search.search(session, '"dubai" (sharma*') == search.search(session, "dubai sharma")
+    assert search.search(session, "   ") == []
+
+
+# ===============================
+# DEFERRED INDEXING
+# ===============================
+def _triggers(session):
+
+    return sorted(session.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'")).scalars())
+
+
+def test_bulk_insert_is_indexed_on_the_way_out(session):
+
+    _seed(session)
+    before = _triggers(session)
+
+    with search.deferred_indexing(session):
+        bulk_insert(session, Lead, [dict(name="Kabir Mehta"), dict(name="Kavya Rao")])
+
+    session.commit()
+
+    assert _triggers(session) == before
+    assert sorted(r["client"] for r in search.search(session, "ka")) == ["Kabir Mehta", "Kavya Rao"]
+
+
+def test_interrupted_import_keeps_the_insert_triggers(session):
+
+    # Regression: the DROP TRIGGER ran outside a transaction and committed
+    # on its own, so rolling back an interrupted import lost the triggers
+    _seed(session)
+    before = _triggers(session)
+
+    with pytest.raises(KeyboardInterrupt):
+        with search.deferred_indexing(session):
+            bulk_insert(session, Lead, [dict(name="Kabir Mehta")])
+            raise KeyboardInterrupt
+
+    session.rollback()
+
+    assert _triggers(session) == before
+
+    session.add(Query(lead=Lead(name="Zara Khan"), destination="Kyoto"))
+    session.commit()
+
+    assert _found(search.search(session, "zara kyoto")) == [("query", "Zara Khan", "Kyoto")]
+    assert search.search(session, "kabir") == []
+
+
+def test_concurrent_commit_cannot_break_the_import(session, engine):
+
+    # Regression: a deferred BEGIN read max(id) first, and when another
+    # connection committed before the DROP TRIGGER, upgrading that WAL
+    # snapshot to a write failed with SQLITE_BUSY_SNAPSHOT
+    _seed(session)
+
+    other = sqlite3.connect(engine.url.database, timeout=0)
+    other_writes = []
+
+    def write_from_elsewhere(conn, cursor, statement, parameters, context, executemany):
+
+        if statement.startswith("DROP TRIGGER") and not other_writes:
+
+            try:
+                other.execute("INSERT INTO leads (name) VALUES ('Walk-in')")
+                other.commit()
+                other_writes.append("committed")
+
+            except sqlite3.OperationalError as e:
+                other_writes.append(str(e))
+
+    event.listen(engine, "before_cursor_execute", write_from_elsewhere)
+
+    try:
+        with search.deferred_indexing(session):
+            bulk_insert(session, Lead, [dict(name="Kabir Mehta")])
+
+        session.commit()
+
+    finally:
+        event.remove(engine, "before_cursor_execute", write_from_elsewhere)
+        other.close()
+
+    # The import held the write lock, so the other writer had to wait
+    assert other_writes == ["database is locked"]
+    assert _found(search.search(session, "kabir")) == [("lead", "Kabir Mehta", None)]
+
+
+def test_failed_restore_does_not_hide_the_original_error(session):
+
+    _seed(session)
+
+    with pytest.raises(ValueError, match="bad row"):
+        with search.deferred_indexing(session):
+            session.execute(text(f"DROP TABLE {search.SEARCH_TABLE}"))
+            raise ValueError("bad row")
+
+    session.rollback()
+
+    assert search.search(session, "sharma")
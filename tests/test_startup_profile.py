@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+
+import startup_profile
+
+PACKAGE_DIR = os.path.dirname(startup_profile.APP_FILE)
+
+
+def test_importtime_is_grouped_by_top_level_package():
+
+    stderr = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   pandas._libs",
+        "import time:       200 |       1500 | pandas",
+        "import time:       300 |        300 | json",
+        "import time:        50 |        500 | pandas.io",
+    ])
+
+    assert startup_profile.parse_importtime(stderr) == [("pandas", 0.002), ("json", 0.0003)]
+
+
+def test_profile_child_gets_a_throwaway_database(monkeypatch):
+
+    # Regression: the child ran the app (and its migrations) against the
+    # working copy's pristine_crm.db
+    seen = {}
+
+    def fake_run(args, **kwargs):
+
+        seen["database_url"] = kwargs["env"]["DATABASE_URL"]
+        seen["database_dir"] = os.path.dirname(seen["database_url"].split("sqlite:///", 1)[1])
+        seen["existed"] = os.path.isdir(seen["database_dir"])
+
+        result = {"first_render_seconds": 0.5, "first_render_heavy": [], "pages": [], "exceptions": []}
+
+        return subprocess.CompletedProcess(args, 0, stdout=json.dumps(result), stderr="")
+
+    monkeypatch.setattr(startup_profile.subprocess, "run", fake_run)
+
+    result = startup_profile.profile()
+
+    assert result["cold_start_seconds"] == 0.5
+    assert seen["database_url"] != os.environ["DATABASE_URL"]
+    assert seen["existed"]
+    assert not os.path.exists(seen["database_dir"])
+
+
+def test_ai_engine_import_leaves_google_unloaded():
+
+    # Regression: google.api_core (and grpc) came in with ai_engine, which
+    # main.py imports on every page. The bare "google" namespace package is
+    # set up by site at interpreter start, so only its submodules count.
+    completed = subprocess.run(
+        [sys.executable, "-c", "import sys, ai_engine; print(sorted(m for m in sys.modules if m.startswith(('google.', 'grpc'))))"],
+        capture_output=True,
+        text=True,
+        cwd=PACKAGE_DIR
+    )
+
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip() == "[]"
@@ -0,0 +1,181 @@
+import codecs
+import os
+import unicodedata
+
+import config
+
+# ===============================
+# SETTINGS
+# ===============================
+# Optional Unicode TrueType font (e.g. NotoSans-Regular.ttf). When set, both
+# PDF engines embed it instead of the core Arial/Helvetica, so Hindi names
+# and the rupee sign print as typed. Without it, text is folded to latin-1.
+UNICODE_FONT_PATH = config.get_setting("PDF_UNICODE_FONT")
+UNICODE_FONT_BOLD_PATH = config.get_setting("PDF_UNICODE_FONT_BOLD")
+
+UNICODE_FAMILY = "BrandUnicode"
+
+# Anything with no latin-1 equivalent, not even after stripping accents
+UNMAPPABLE = "?"
+
+
+# ===============================
+# TRANSLATION TABLES
+# ===============================
+# Typographic characters that word processors and Gemini produce, mapped to
+# what the core PDF fonts can print
+LATIN1_REPLACEMENTS = {
+    "₹": "Rs.",
+    "€": "EUR",
+    "•": "-",
+    "◦": "-",
+    "▪": "-",
+    "●": "-",
+    "‣": "-",
+    "‘": "'",
+    "’": "'",
+    "‚": "'",
+    "′": "'",
+    "“": '"',
+    "”": '"',
+    "„": '"',
+    "″": '"',
+    "–": "-",
+    "—": "-",
+    "‑": "-",
+    "−": "-",
+    "…": "...",
+    "✓": "-",
+    "✔": "-",
+    "→": "->",
+    "\u2009": " ",
+    "\u202f": " ",
+    "\u200b": "",
+    "\u200c": "",
+    "\u200d": "",
+    "\ufeff": ""
+}
+
+# Applied in table order; only characters actually present cost anything
+_REPLACEMENT_ITEMS = list(LATIN1_REPLACEMENTS.items())
+
+# With an embedded Unicode font almost everything prints; only invisible
+# characters that break line wrapping are dropped (ZWJ/ZWNJ are kept -
+# Indic scripts need them)
+UNICODE_REMOVALS = ["\u200b", "\ufeff"]
+
+
+class _Latin1Table(dict):
+
+    # codepoint -> replacement. Seeded with LATIN1_REPLACEMENTS; any other
+    # character is folded once (accents stripped, else UNMAPPABLE) and the
+    # result remembered, so each distinct character is worked out only once.
+    def __missing__(self, codepoint):
+
+        char = chr(codepoint)
+        folded = "".join(
+            c for c in unicodedata.normalize("NFKD", char)
+            if not unicodedata.combining(c)
+        )
+
+        try:
+            folded.encode("latin-1")
+            replacement = folded or UNMAPPABLE
+
+        except UnicodeEncodeError:
+            replacement = UNMAPPABLE
+
+        self[codepoint] = replacement
+
+        return replacement
+
+
+LATIN1_TABLE = _Latin1Table(
+    (ord(char), replacement)
+    for char, replacement in LATIN1_REPLACEMENTS.items()
+)
+
+
+def _latin1_fallback(error):
+
+    # Codec error handler for whatever the replacement table did not cover
+    # (accented Latin, other scripts): called once per unencodable run
+    run = error.object[error.start:error.end]
+
+    return "".join(LATIN1_TABLE[ord(char)] for char in run), error.end
+
+
+codecs.register_error("pdf-latin1", _latin1_fallback)
+
+
+# ===============================
+# PUBLIC API
+# ===============================
+def unicode_font_available():
+
+    return bool(UNICODE_FONT_PATH) and os.path.exists(UNICODE_FONT_PATH)
+
+
+def clean(text, unicode=False):
+
+    # Plain ASCII - most of a Gemini draft - is returned untouched. Otherwise
+    # each table character present is replaced at C speed and the latin-1
+    # codec folds the rest in a single encode. (A str.translate table reads
+    # better but is several times slower in CPython: it looks up every
+    # character in Python; see benchmarks/bench_text_clean.py.)
+    if not text:
+        return ""
+
+    text = str(text)
+
+    if unicode:
+        for char in UNICODE_REMOVALS:
+            if char in text:
+                text = text.replace(char, "")
+
+        return text
+
+    if text.isascii():
+        return text
+
+    for char, replacement in _REPLACEMENT_ITEMS:
+        if char in text:
+            text = text.replace(char, replacement)
+
+    return text.encode("latin-1", "pdf-latin1").decode("latin-1")
+
+
+def setup_fonts(pdf, core_family):
+
+    # Registers the Unicode font on a new document. Returns the family the
+    # engine should use and whether text may stay Unicode.
+    if not unicode_font_available():
+        return core_family, False
+
+    pdf.add_font(UNICODE_FAMILY, "", UNICODE_FONT_PATH)
+    pdf.add_font(
+        UNICODE_FAMILY,
+        "B",
+        UNICODE_FONT_BOLD_PATH
+        if UNICODE_FONT_BOLD_PATH and os.path.exists(UNICODE_FONT_BOLD_PATH)
+        else UNICODE_FONT_PATH
+    )
+
+    # Conjuncts in Devanagari need shaping, which needs uharfbuzz (optional)
+    try:
+        import uharfbuzz # noqa: F401
+        pdf.set_text_shaping(True)
+
+    except ImportError:
+        pass
+
+    return UNICODE_FAMILY, True
+
+
+def font_signature():
+
+    # Part of the PDF cache key: changing the font changes the output
+    if not unicode_font_available():
+        return None
+
+    return [UNICODE_FONT_PATH, UNICODE_FONT_BOLD_PATH]
@@ -0,0 +1,254 @@
+from fpdf import FPDF
+
+import branding
+import text_clean
+from pdf_maker import render_pdf
+
+# Bump when the voucher layout changes - invalidates cached PDFs (pdf_cache.py)
+TEMPLATE_VERSION = "2"
+
+
+def create_voucher_pdf(
+    client_name,
+    conf_no,
+    hotel_details,
+    check_in,
+    check_out,
+    nights,
+    room_type,
+    inclusions,
+    notes,
+    occupancy_details,
+    out=None
+):
+
+    pdf = FPDF("P", "mm", "A4")
+    font, unicode_text = text_clean.setup_fonts(pdf, "Helvetica")
+
+    def clean(text):
+        return text_clean.clean(text, unicode=unicode_text)
+
+    client_name = clean(client_name)
+    conf_no = clean(conf_no)
+    hotel_details = clean(hotel_details)
+    check_in = clean(check_in)
+    check_out = clean(check_out)
+    room_type = clean(room_type)
+    inclusions = clean(inclusions)
+    notes = clean(notes)
+    occupancy_details = clean(occupancy_details)
+
+    raw_names = client_name.split(",")
+    stacked_names = "\n".join(
+        [name.strip() for name in raw_names if name.strip()]
+    )
+
+    pdf.add_page()
+
+    GOLD = (186, 163, 104)
+    LIGHT_GOLD = (252, 251, 248)
+    DARK_TEXT = (40, 40, 40)
+    GREY_TEXT = (100, 100, 100)
+
+    # ================= HEADER =================
+    branding.place_logo(pdf, x=10, y=10, h=25)
+
+    pdf.set_font(font, "B", 18)
+    pdf.set_text_color(*GOLD)
+    pdf.set_xy(100, 12)
+    pdf.multi_cell(100, 6, branding.COMPANY_NAME, align="R")
+
+    pdf.set_font(font, "", 9)
+    pdf.set_text_color(*GREY_TEXT)
+    pdf.set_xy(100, 19)
+
+    pdf.multi_cell(
+        100,
+        5,
+        branding.VOUCHER_ADDRESS,
+        align="R"
+    )
+
+    pdf.set_draw_color(*GOLD)
+    pdf.line(10, 42, 200, 42)
+
+    pdf.set_y(50)
+
+    # ================= TITLE =================
+    pdf.set_font(font, "B", 14)
+    pdf.set_text_color(*DARK_TEXT)
+
+    pdf.cell(
+        0,
+        8,
+        "H O T E L   A C C O M M O D A T I O N   V O U C H E R",
+        ln=True,
+        align="C"
+    )
+
+    pdf.ln(6)
+
+    # ================= CONFIRMATION =================
+    pdf.set_fill_color(*LIGHT_GOLD)
+
+    pdf.set_font(font, "B", 9)
+    pdf.cell(95, 8, " CONFIRMATION NO.", fill=True)
+    pdf.cell(95, 8, " BOOKING STATUS", fill=True, ln=True)
+
+    pdf.set_font(font, "", 11)
+    pdf.cell(95, 8, f" {conf_no}", fill=True)
+
+    pdf.set_font(font, "B", 11)
+    pdf.set_text_color(*GOLD)
+
+    pdf.cell(
+        95,
+        8,
+        " Confirmed & Guaranteed",
+        fill=True,
+        ln=True
+    )
+
+    pdf.ln(5)
+
+    # ================= GUEST + HOTEL =================
+    pdf.set_text_color(*DARK_TEXT)
+
+    pdf.set_font(font, "B", 9)
+    pdf.cell(95, 8, " GUEST DETAILS", fill=True)
+    pdf.cell(95, 8, " PROPERTY DETAILS", fill=True, ln=True)
+
+    x = pdf.get_x()
+    y = pdf.get_y()
+
+    # LEFT COLUMN
+    pdf.set_xy(x + 2, y + 2)
+
+    pdf.set_font(font, "B", 11)
+    pdf.multi_cell(90, 6, stacked_names)
+
+    y_current = pdf.get_y()
+
+    pdf.set_xy(x + 2, y_current + 4)
+
+    pdf.set_font(font, "", 10)
+    pdf.multi_cell(90, 5, occupancy_details)
+
+    y_left_end = pdf.get_y()
+
+    # RIGHT COLUMN
+    pdf.set_xy(x + 97, y + 2)
+
+    hotel_lines = hotel_details.split("\n", 1)
+
+    pdf.set_font(font, "B", 12)
+    pdf.multi_cell(90, 6, hotel_lines[0])
+
+    if len(hotel_lines) > 1:
+        pdf.set_font(font, "", 10)
+        pdf.set_x(x + 97)
+        pdf.multi_cell(90, 5, hotel_lines[1])
+
+    y_right_end = pdf.get_y()
+
+    pdf.set_y(max(y_left_end, y_right_end) + 8)
+
+    # ================= DATES =================
+    pdf.set_fill_color(*GOLD)
+
+    pdf.set_text_color(255, 255, 255)
+
+    pdf.set_font(font, "B", 9)
+
+    pdf.cell(63, 8, "CHECK-IN", fill=True, align="C")
+    pdf.cell(64, 8, "NIGHTS", fill=True, align="C")
+    pdf.cell(63, 8, "CHECK-OUT", fill=True, align="C", ln=True)
+
+    pdf.set_text_color(*DARK_TEXT)
+
+    pdf.set_font(font, "", 11)
+
+    pdf.cell(63, 10, check_in, align="C")
+    pdf.cell(64, 10, str(nights), align="C")
+    pdf.cell(63, 10, check_out, align="C", ln=True)
+
+    pdf.ln(6)
+
+    # ================= ROOM =================
+    pdf.set_fill_color(*LIGHT_GOLD)
+
+    pdf.set_font(font, "B", 9)
+
+    pdf.cell(95, 8, " ROOM CATEGORY", fill=True)
+    pdf.cell(95, 8, " INCLUSIONS", fill=True, ln=True)
+
+    x = pdf.get_x()
+    y = pdf.get_y()
+
+    pdf.set_font(font, "", 10)
+
+    pdf.set_xy(x + 2, y + 2)
+    pdf.multi_cell(90, 6, room_type)
+
+    y_room = pdf.get_y()
+
+    pdf.set_xy(x + 97, y + 2)
+    pdf.multi_cell(90, 6, inclusions)
+
+    y_inc = pdf.get_y()
+
+    pdf.set_y(max(y_room, y_inc) + 8)
+
+    # ================= NOTES =================
+    if notes.strip():
+
+        pdf.set_font(font, "B", 9)
+
+        pdf.cell(
+            0,
+            6,
+            "ARRIVAL & SPECIAL NOTES:",
+            ln=True
+        )
+
+        pdf.set_font(font, "", 10)
+
+        pdf.multi_cell(0, 5, notes)
+
+        pdf.ln(6)
+
+    # ================= IMPORTANT INFO =================
+    pdf.set_font(font, "B", 9)
+
+    pdf.cell(
+        0,
+        6,
+        "IMPORTANT INFORMATION:",
+        ln=True
+    )
+
+    pdf.set_font(font, "", 9)
+
+    pdf.multi_cell(0, 5, branding.VOUCHER_INFO)
+
+    # ================= FOOTER =================
+    pdf.ln(15)
+
+    pdf.set_draw_color(*GOLD)
+    pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+
+    pdf.ln(5)
+
+    pdf.set_font(font, "", 9)
+    pdf.set_text_color(*GREY_TEXT)
+
+    pdf.cell(
+        0,
+        5,
+        branding.VOUCHER_FOOTER,
+        align="C"
+    )
+
+    # ================= OUTPUT =================
+    # Straight from fpdf's in-memory buffer - no temp file round trip
+    return render_pdf(pdf, out)